@@ -4,6 +4,7 @@ Django settings for backend project.
 
 from pathlib import Path
 import os
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -107,6 +108,25 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Binary audio bodies carry their sample format/rate in headers (see equalizer/parsers.py)
+CORS_ALLOW_HEADERS = (
+    *default_headers,
+    'x-sample-format',
+    'x-sample-rate',
+    'x-channels',
+)
+
+# Binary audio responses describe their body in headers (see equalizer/renderers.py)
+CORS_EXPOSE_HEADERS = [
+    'X-Sample-Rate',
+    'X-Sample-Format',
+    'X-Sample-Count',
+    'X-Channels',
+    'X-Meta',
+    'Content-Range',
+    'Accept-Ranges',
+]
+
 # Allow all origins in development (for easier debugging)
 if DEBUG:
     CORS_ALLOW_ALL_ORIGINS = True
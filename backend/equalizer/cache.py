@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def estimate_nbytes(value):
+    """
+    Approximate memory held by a cached value.
+    Counts numpy buffers (recursing into tuples/lists/dicts); other objects count as 0.
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_nbytes(v) for v in value)
+    if isinstance(value, dict):
+        return sum(estimate_nbytes(v) for v in value.values())
+    return 0
+
+
+class ByteBudgetCache:
+    """
+    Thread-safe LRU cache bounded by the total size of its entries.
+
+    Each entry's size is measured once on insert (estimate_nbytes by default).
+    Inserting past max_bytes evicts least-recently-used entries; an entry
+    larger than the whole budget is not stored at all.
+
+    With ttl (seconds) set, entries also expire after ttl seconds without
+    being read or written (each hit extends the entry's lifetime).
+    """
+
+    def __init__(self, max_bytes, name='cache', sizeof=estimate_nbytes, ttl=None):
+        self.name = name
+        self.max_bytes = int(max_bytes)
+        self.ttl = ttl
+        self._sizeof = sizeof
+        self._entries = OrderedDict()  # key -> (value, nbytes, expires_at)
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expiry(self):
+        return time.monotonic() + self.ttl if self.ttl is not None else None
+
+    def get(self, key, default=None):
+        """Return the cached value (marking it most recently used) or default."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None and entry[2] <= time.monotonic():
+                self._entries.pop(key)
+                self.current_bytes -= entry[1]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            if self.ttl is not None:
+                self._entries[key] = (entry[0], entry[1], self._expiry())
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """Insert or replace an entry. Returns False if it exceeds the whole budget."""
+        nbytes = self._sizeof(value)
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+
+            if nbytes > self.max_bytes:
+                return False
+
+            self._entries[key] = (value, nbytes, self._expiry())
+            self.current_bytes += nbytes
+            self._evict_locked()
+            return True
+
+    def pop(self, key, default=None):
+        """Remove an entry and return its value."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return default
+            self.current_bytes -= entry[1]
+            return entry[0]
+
+    def clear(self):
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Snapshot of size and hit/miss/eviction counters"""
+        with self._lock:
+            return {
+                'name': self.name,
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'maxBytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+    def _evict_locked(self):
+        if self.ttl is not None:
+            now = time.monotonic()
+            expired = [k for k, (_, _, expires_at) in self._entries.items() if expires_at <= now]
+            for k in expired:
+                self.current_bytes -= self._entries.pop(k)[1]
+                self.expirations += 1
+
+        while self.current_bytes > self.max_bytes and self._entries:
+            _, (_, nbytes, _) = self._entries.popitem(last=False)
+            self.current_bytes -= nbytes
+            self.evictions += 1
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class CountBoundedCache(ByteBudgetCache):
+    """
+    Thread-safe LRU cache bounded by its number of entries, for small values
+    (flags, scalars) whose memory does not matter. Same interface and TTL
+    support as ByteBudgetCache; stats report entries against maxEntries.
+    """
+
+    def __init__(self, max_entries, name='cache', ttl=None):
+        super().__init__(max_entries, name=name, sizeof=lambda value: 1, ttl=ttl)
+
+    @property
+    def max_entries(self):
+        return self.max_bytes
+
+    def stats(self):
+        stats = super().stats()
+        del stats['bytes']
+        stats['maxEntries'] = stats.pop('maxBytes')
+        return stats
@@ -0,0 +1,30 @@
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework import status
+
+from .utils import get_cache_stats, clear_fft_cache, clear_fft_plans
+from .stem_store import get_stem_store_stats, clear_stem_store
+
+
+def _cache_info():
+    return {**get_cache_stats(), 'stems': get_stem_store_stats()}
+
+
+@api_view(['GET'])
+def get_cache_info(request):
+    """Size and hit/miss/eviction counters of the processing caches and the stem store"""
+    return Response(_cache_info(), status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+def clear_caches(request):
+    """
+    Drop the FFT/STFT/output/band component caches and the FFT plans.
+    Stored separations are only removed with {"stems": true}.
+    """
+    clear_fft_cache()
+    clear_fft_plans()
+    if request.data.get('stems', False):
+        clear_stem_store()
+        print("🧹 Cleared the stem store")
+    return Response(_cache_info(), status=status.HTTP_200_OK)
@@ -0,0 +1,144 @@
+from rest_framework.decorators import api_view, parser_classes, renderer_classes
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from django.urls import reverse
+import numpy as np
+
+from .jobs import submit_job, get_job, cancel_job, get_job_stats, JobQueueFull, JOB_TYPES
+from .signal_registry import resolve_signal, SignalNotFound
+from .stem_store import get_stems_by_id
+from .parsers import AUDIO_PARSER_CLASSES
+from .renderers import AUDIO_RENDERER_CLASSES
+from .utils import get_signal_hash
+from .views import music_separation_payload, voice_separation_payload
+
+
+def _job_response(request, job, status_code=status.HTTP_200_OK):
+    """Job status dict plus its status/result URLs"""
+    job = dict(job)
+    job['statusUrl'] = request.build_absolute_uri(reverse('get_job_status', args=[job['jobId']]))
+    job['resultUrl'] = request.build_absolute_uri(reverse('get_job_result', args=[job['jobId']]))
+    return Response(job, status=status_code)
+
+
+def _job_not_found_response():
+    return Response(
+        {'error': 'Unknown or expired jobId', 'code': 'job_not_found'},
+        status=status.HTTP_404_NOT_FOUND
+    )
+
+
+@api_view(['POST'])
+@parser_classes(AUDIO_PARSER_CLASSES)
+def submit_separation_job(request):
+    """
+    Queue a separation without holding the request open.
+    Payload: {
+        "type": "separate-music" | "separate-voices",
+        "signalId": "..." (or "signal": [...], "sampleRate": 44100)
+    }
+    Returns 202 with { jobId, status, progress, statusUrl, resultUrl, ... };
+    429 when the job queue is full.
+    """
+    try:
+        job_type = request.data.get('type')
+        if job_type not in JOB_TYPES:
+            return Response(
+                {'error': f"'type' must be one of: {', '.join(JOB_TYPES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        signal, sample_rate, signal_hash = resolve_signal(request.data, dtype=np.float32)
+        sample_rate = int(sample_rate)
+        if signal is None:
+            return Response(
+                {'error': 'Signal data is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if signal_hash is None:
+            signal_hash = get_signal_hash(signal, sample_rate)
+
+        job = submit_job(job_type, signal, sample_rate, signal_hash)
+        return _job_response(request, job, status.HTTP_202_ACCEPTED)
+
+    except JobQueueFull as e:
+        return Response(
+            {'error': f'Too many separation jobs, try again later ({e})', 'code': 'queue_full'},
+            status=status.HTTP_429_TOO_MANY_REQUESTS
+        )
+    except SignalNotFound:
+        return Response(
+            {'error': 'Unknown or expired signalId, please upload the signal again',
+             'code': 'signal_not_found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except ParseError as e:
+        return Response({'error': f'Invalid request body: {e.detail}'}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response(
+            {'error': f'Could not queue the job: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['GET'])
+def get_job_status(request, job_id):
+    """Status and progress (0..1) of a job: queued, running, done, failed or cancelled"""
+    job = get_job(job_id)
+    if job is None:
+        return _job_not_found_response()
+    return _job_response(request, job)
+
+
+@api_view(['GET'])
+@renderer_classes(AUDIO_RENDERER_CLASSES)
+def get_job_result(request, job_id):
+    """
+    Result of a finished job, in the same shape as /separate-music or
+    /separate-voices. 202 with the job status while it is queued or running,
+    409 if it was cancelled, 500 if it failed.
+    """
+    job = get_job(job_id)
+    if job is None:
+        return _job_not_found_response()
+
+    if job['status'] in ('queued', 'running'):
+        return _job_response(request, job, status.HTTP_202_ACCEPTED)
+    if job['status'] == 'cancelled':
+        return Response({'error': 'Job was cancelled', 'code': 'job_cancelled'}, status=status.HTTP_409_CONFLICT)
+    if job['status'] == 'failed':
+        return Response(
+            {'error': f"Separation failed: {job['error']}", 'code': 'job_failed'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+    stored = get_stems_by_id(job['separationId'])
+    if stored is None:
+        return Response(
+            {'error': 'The job result has expired, please submit the job again',
+             'code': 'separation_not_found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    arrays, meta = stored
+    if job['type'] == 'separate-music':
+        payload = music_separation_payload(arrays, meta['sampleRate'], job['separationId'])
+    else:
+        payload = voice_separation_payload(arrays, meta['sampleRate'], job['separationId'])
+    return Response(payload, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+def cancel_separation_job(request, job_id):
+    """Cancel a queued or running job; finished jobs are returned unchanged"""
+    job = cancel_job(job_id)
+    if job is None:
+        return _job_not_found_response()
+    return _job_response(request, job)
+
+
+@api_view(['GET'])
+def get_job_queue_info(request):
+    """Job counts by status and the queue/concurrency limits"""
+    return Response(get_job_stats(), status=status.HTTP_200_OK)
@@ -0,0 +1,291 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+
+from django.conf import settings
+
+from .separation import separate_music, separate_voices, DEMUCS_MODEL, VOICE_SEPARATION_MODEL
+from .stem_store import get_stems, put_stems, get_entry_key
+from .utils import PARALLEL_START_METHOD
+
+# Asynchronous separation jobs: requests only enqueue work and return a job ID;
+# separations run in per-model process pools (each worker keeps its model
+# loaded) and report status/progress through a SQLite job table.
+JOB_DB_PATH = os.environ.get('EQUALIZER_JOB_DB', os.path.join(settings.BASE_DIR, 'jobs.sqlite3'))
+JOB_QUEUE_LIMIT = int(os.environ.get('EQUALIZER_JOB_QUEUE_LIMIT', 16))
+JOB_RETENTION_SECONDS = int(os.environ.get('EQUALIZER_JOB_RETENTION_SECONDS', 24 * 3600))
+
+# Job type -> (model name, concurrent jobs of that model)
+JOB_TYPES = {
+    'separate-music': (DEMUCS_MODEL, int(os.environ.get('EQUALIZER_MUSIC_JOB_WORKERS', 1))),
+    'separate-voices': (VOICE_SEPARATION_MODEL, int(os.environ.get('EQUALIZER_VOICE_JOB_WORKERS', 1))),
+}
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    error TEXT,
+    separation_id TEXT,
+    owner_pid INTEGER,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+'''
+
+_executors = {}
+_futures = {}
+_jobs_lock = threading.Lock()
+_db_ready = False
+
+
+class JobQueueFull(Exception):
+    """Raised when JOB_QUEUE_LIMIT jobs are already queued or running"""
+
+
+def _connect():
+    conn = sqlite3.connect(JOB_DB_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+def _init_db():
+    """Create the job table and fail jobs orphaned by a stopped server process"""
+    global _db_ready
+    if _db_ready:
+        return
+    conn = _connect()
+    try:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(_SCHEMA)
+        rows = conn.execute(
+            'SELECT id, owner_pid FROM jobs WHERE status IN (?, ?)', ACTIVE_STATUSES
+        ).fetchall()
+        orphaned = [row['id'] for row in rows if not row['owner_pid'] or not _pid_alive(row['owner_pid'])]
+        for job_id in orphaned:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+                ('Interrupted by a server restart', time.time(), job_id)
+            )
+        if orphaned:
+            print(f"⚠️ Marked {len(orphaned)} interrupted job(s) as failed")
+    finally:
+        conn.close()
+    _db_ready = True
+
+
+def _update_job(job_id, **fields):
+    """
+    Update a job's columns unless it was cancelled. Returns False if the job
+    is cancelled (or gone), so workers can skip or discard their work.
+    """
+    fields['updated_at'] = time.time()
+    columns = ', '.join(f'{name} = ?' for name in fields)
+    conn = _connect()
+    try:
+        cursor = conn.execute(
+            f"UPDATE jobs SET {columns} WHERE id = ? AND status != 'cancelled'",
+            (*fields.values(), job_id)
+        )
+        return cursor.rowcount > 0
+    finally:
+        conn.close()
+
+
+def _job_row_to_dict(row):
+    return {
+        'jobId': row['id'],
+        'type': row['type'],
+        'status': row['status'],
+        'progress': row['progress'],
+        'message': row['message'],
+        'error': row['error'],
+        'separationId': row['separation_id'],
+        'createdAt': row['created_at'],
+        'updatedAt': row['updated_at'],
+    }
+
+
+def run_separation(job_type, signal, sample_rate, signal_hash, progress=None):
+    """
+    Separate a signal (through the stem store) and return its separation ID.
+    progress(fraction, message) is called between stages.
+    """
+    progress = progress or (lambda fraction, message: None)
+    model_name, _ = JOB_TYPES[job_type]
+
+    if get_stems(signal_hash, model_name, sample_rate) is not None:
+        return get_entry_key(signal_hash, model_name, sample_rate)
+
+    progress(0.1, 'Separating')
+    if job_type == 'separate-music':
+        arrays, output_rate = separate_music(signal, sample_rate)
+    else:
+        arrays = separate_voices(
+            signal, sample_rate,
+            progress=lambda fraction, message: progress(0.1 + 0.8 * fraction, message),
+        )
+        output_rate = sample_rate
+
+    progress(0.9, 'Storing result')
+    separation_id = put_stems(signal_hash, model_name, sample_rate, arrays, meta={'sampleRate': output_rate})
+    if separation_id is None:
+        raise RuntimeError('Could not store the separation result')
+    return separation_id
+
+
+def _run_job(job_id, job_type, signal, sample_rate, signal_hash):
+    """Worker process entry point"""
+    if not _update_job(job_id, status='running', progress=0.0, message='Starting'):
+        return None  # cancelled while queued
+
+    try:
+        separation_id = run_separation(
+            job_type, signal, sample_rate, signal_hash,
+            progress=lambda fraction, message: _update_job(job_id, progress=fraction, message=message),
+        )
+    except Exception as e:
+        _update_job(job_id, status='failed', error=str(e), message='Failed')
+        raise
+
+    _update_job(job_id, status='done', progress=1.0, message='Done', separation_id=separation_id)
+    return separation_id
+
+
+def _get_executor(job_type):
+    """Process pool of a job type, sized to its concurrency limit"""
+    executor = _executors.get(job_type)
+    if executor is None:
+        _, workers = JOB_TYPES[job_type]
+        executor = ProcessPoolExecutor(max_workers=max(1, workers), mp_context=get_context(PARALLEL_START_METHOD))
+        _executors[job_type] = executor
+        print(f"🧵 Started {job_type} job pool ({workers} process(es))")
+    return executor
+
+
+def _job_finished(job_id, job_type, future):
+    with _jobs_lock:
+        _futures.pop(job_id, None)
+        if future.cancelled():
+            return
+        error = future.exception()
+        if isinstance(error, BrokenProcessPool):
+            # A worker died (e.g. out of memory): start a fresh pool next time
+            _executors.pop(job_type, None)
+    if error is not None:
+        _update_job(job_id, status='failed', error=str(error) or type(error).__name__, message='Failed')
+
+
+def submit_job(job_type, signal, sample_rate, signal_hash):
+    """
+    Queue a separation job and return its status dict. Raises ValueError for
+    unknown job types and JobQueueFull past JOB_QUEUE_LIMIT active jobs.
+    Already-stored separations complete immediately.
+    """
+    if job_type not in JOB_TYPES:
+        raise ValueError(f"Unknown job type: {job_type}")
+    model_name, _ = JOB_TYPES[job_type]
+    now = time.time()
+
+    with _jobs_lock:
+        _init_db()
+        conn = _connect()
+        try:
+            conn.execute(
+                'DELETE FROM jobs WHERE status NOT IN (?, ?) AND updated_at < ?',
+                (*ACTIVE_STATUSES, now - JOB_RETENTION_SECONDS)
+            )
+            active = conn.execute(
+                'SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)', ACTIVE_STATUSES
+            ).fetchone()[0]
+            if active >= JOB_QUEUE_LIMIT:
+                raise JobQueueFull(f"{active} jobs already queued or running")
+
+            job_id = uuid.uuid4().hex
+            stored = get_stems(signal_hash, model_name, sample_rate) is not None
+            conn.execute(
+                'INSERT INTO jobs (id, type, status, progress, message, separation_id, owner_pid, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (job_id, job_type, 'done' if stored else 'queued', 1.0 if stored else 0.0,
+                 'Done' if stored else 'Queued',
+                 get_entry_key(signal_hash, model_name, sample_rate) if stored else None,
+                 os.getpid(), now, now)
+            )
+        finally:
+            conn.close()
+
+        if not stored:
+            future = _get_executor(job_type).submit(_run_job, job_id, job_type, signal, sample_rate, signal_hash)
+            _futures[job_id] = future
+
+    if not stored:
+        future.add_done_callback(lambda f: _job_finished(job_id, job_type, f))
+        print(f"📥 Queued {job_type} job {job_id[:8]}")
+    return get_job(job_id)
+
+
+def get_job(job_id):
+    """Status dict of a job, or None if unknown"""
+    with _jobs_lock:
+        _init_db()
+    conn = _connect()
+    try:
+        row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+    finally:
+        conn.close()
+    return _job_row_to_dict(row) if row is not None else None
+
+
+def cancel_job(job_id):
+    """
+    Cancel a queued or running job and return its status dict (None if
+    unknown). Queued jobs never start; a running separation cannot be
+    interrupted, but its result is discarded by the job.
+    """
+    job = get_job(job_id)
+    if job is None or job['status'] not in ACTIVE_STATUSES:
+        return job
+
+    _update_job(job_id, status='cancelled', message='Cancelled')
+    with _jobs_lock:
+        future = _futures.get(job_id)
+    if future is not None:
+        future.cancel()
+    print(f"🛑 Cancelled job {job_id[:8]}")
+    return get_job(job_id)
+
+
+def get_job_stats():
+    """Job counts by status and the configured limits"""
+    with _jobs_lock:
+        _init_db()
+    conn = _connect()
+    try:
+        counts = dict(conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+    finally:
+        conn.close()
+    return {
+        'counts': counts,
+        'queueLimit': JOB_QUEUE_LIMIT,
+        'workers': {job_type: workers for job_type, (_, workers) in JOB_TYPES.items()},
+    }
@@ -0,0 +1,183 @@
+import json
+import struct
+
+import numpy as np
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.exceptions import ParseError
+
+
+# Raw sample formats accepted by RawAudioParser (always little-endian on the wire)
+RAW_SAMPLE_FORMATS = {
+    'float32': '<f4',
+    'float64': '<f8',
+}
+
+# WAV format tags
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def _query_params(parser_context):
+    """
+    Request query parameters as plain values. Each value is JSON-decoded when
+    possible (so sliders=[...], preview=true, n_fft=2048 arrive typed) and
+    kept as a string otherwise.
+    """
+    request = (parser_context or {}).get('request')
+    if request is None:
+        return {}
+
+    params = {}
+    for key, value in request.query_params.items():
+        try:
+            params[key] = json.loads(value)
+        except ValueError:
+            params[key] = value
+    return params
+
+
+def _header(parser_context, name):
+    request = (parser_context or {}).get('request')
+    if request is None:
+        return None
+    return request.META.get('HTTP_' + name.upper().replace('-', '_'))
+
+
+def _read_body(stream):
+    body = stream.read() if stream is not None else b''
+    if not body:
+        raise ParseError('Request body is empty')
+    return body
+
+
+class RawAudioParser(BaseParser):
+    """
+    Raw little-endian PCM samples (application/octet-stream).
+
+    Sample format comes from the X-Sample-Format header (float32 default,
+    or float64) and the sample rate from the X-Sample-Rate header or the
+    sampleRate query parameter. The signal is an np.frombuffer view of the
+    body (no per-sample conversion). With X-Channels > 1 the body holds
+    interleaved frames and the signal is a (channels x samples) view.
+    All other request fields are read from the query string.
+    """
+    media_type = 'application/octet-stream'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        data = _query_params(parser_context)
+
+        sample_format = (_header(parser_context, 'X-Sample-Format')
+                         or data.get('sampleFormat') or 'float32')
+        dtype = RAW_SAMPLE_FORMATS.get(str(sample_format).lower())
+        if dtype is None:
+            raise ParseError(f'Unsupported sample format: {sample_format}')
+
+        body = _read_body(stream)
+        itemsize = np.dtype(dtype).itemsize
+        if len(body) % itemsize != 0:
+            raise ParseError(f'Body length {len(body)} is not a multiple of {itemsize} bytes')
+
+        sample_rate = _header(parser_context, 'X-Sample-Rate')
+        if sample_rate is not None:
+            data['sampleRate'] = float(sample_rate)
+
+        channels = int(_header(parser_context, 'X-Channels') or data.get('channels') or 1)
+        if channels < 1 or (len(body) // itemsize) % channels != 0:
+            raise ParseError(f'Body does not hold whole frames of {channels} channels')
+
+        # Native-endian view; astype is a no-op on little-endian hosts
+        samples = np.frombuffer(body, dtype=dtype).astype(dtype[1:], copy=False)
+        data['signal'] = samples.reshape(-1, channels).T if channels > 1 else samples
+        return data
+
+
+def decode_wav(body):
+    """
+    Decode a RIFF/WAVE byte string into (samples, sample_rate).
+
+    Float WAVs are returned as an np.frombuffer view of the data chunk;
+    integer PCM (8/16/24/32-bit) is scaled to float32 in [-1, 1).
+    Multichannel audio is returned as a (channels x samples) view.
+    """
+    if len(body) < 12 or body[0:4] != b'RIFF' or body[8:12] != b'WAVE':
+        raise ParseError('Not a RIFF/WAVE body')
+
+    fmt = None
+    data_offset = data_size = None
+    pos = 12
+    while pos + 8 <= len(body):
+        chunk_id = body[pos:pos + 4]
+        chunk_size = struct.unpack_from('<I', body, pos + 4)[0]
+        chunk_start = pos + 8
+
+        if chunk_id == b'fmt ':
+            format_tag, channels, sample_rate = struct.unpack_from('<HHI', body, chunk_start)
+            bits = struct.unpack_from('<H', body, chunk_start + 14)[0]
+            if format_tag == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 26:
+                # Sub-format GUID starts with the real format tag
+                format_tag = struct.unpack_from('<H', body, chunk_start + 24)[0]
+            fmt = (format_tag, channels, sample_rate, bits)
+        elif chunk_id == b'data':
+            data_offset = chunk_start
+            data_size = min(chunk_size, len(body) - chunk_start)
+            break
+
+        # Chunks are word aligned
+        pos = chunk_start + chunk_size + (chunk_size & 1)
+
+    if fmt is None or data_offset is None:
+        raise ParseError('WAV body is missing its fmt or data chunk')
+
+    format_tag, channels, sample_rate, bits = fmt
+    if channels < 1:
+        raise ParseError('WAV body has no channels')
+
+    frame_bytes = channels * (bits // 8)
+    n_frames = data_size // frame_bytes if frame_bytes else 0
+    raw = memoryview(body)[data_offset:data_offset + n_frames * frame_bytes]
+
+    if format_tag == WAVE_FORMAT_IEEE_FLOAT and bits in (32, 64):
+        samples = np.frombuffer(raw, dtype='<f4' if bits == 32 else '<f8')
+    elif format_tag == WAVE_FORMAT_PCM and bits == 8:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif format_tag == WAVE_FORMAT_PCM and bits == 16:
+        samples = np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768.0
+    elif format_tag == WAVE_FORMAT_PCM and bits == 24:
+        b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        ints = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+        ints = np.where(ints & 0x800000, ints - 0x1000000, ints)
+        samples = ints.astype(np.float32) / 8388608.0
+    elif format_tag == WAVE_FORMAT_PCM and bits == 32:
+        samples = np.frombuffer(raw, dtype='<i4').astype(np.float32) / 2147483648.0
+    else:
+        raise ParseError(f'Unsupported WAV format (tag={format_tag}, bits={bits})')
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels).T
+
+    return samples, float(sample_rate)
+
+
+class WavAudioParser(BaseParser):
+    """
+    WAV request bodies (audio/wav). The sample rate comes from the WAV header;
+    all other request fields are read from the query string.
+    """
+    media_type = 'audio/wav'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        data = _query_params(parser_context)
+        samples, sample_rate = decode_wav(_read_body(stream))
+        data['signal'] = samples
+        data['sampleRate'] = sample_rate
+        return data
+
+
+class XWavAudioParser(WavAudioParser):
+    """Same as WavAudioParser for the legacy audio/x-wav media type"""
+    media_type = 'audio/x-wav'
+
+
+# Parsers for endpoints that take a signal: JSON as before, plus binary bodies
+AUDIO_PARSER_CLASSES = [JSONParser, RawAudioParser, WavAudioParser, XWavAudioParser]
@@ -0,0 +1,78 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .cache import CountBoundedCache
+from .utils import apply_equalization, cache_output, get_cached_output, normalize_output
+
+# Background full-track renders for progressive equalization, keyed by result key.
+# A finished render lands in the output cache; the future is dropped then.
+RENDER_THREADS = int(os.environ.get('EQUALIZER_RENDER_THREADS', 2))
+
+_executor = ThreadPoolExecutor(max_workers=RENDER_THREADS, thread_name_prefix='eq-render')
+_renders = {}
+_renders_lock = threading.Lock()
+# Peak-normalization factor of each finished render, so the client can match
+# the level of the window it was given first
+_render_scales = CountBoundedCache(4096, name='render_scales')
+
+
+def _render_full(result_key, signal, sample_rate, sliders, signal_hash):
+    try:
+        output_signal = apply_equalization(signal, sample_rate, sliders, signal_hash=signal_hash, normalize=False)
+        output_signal, scale = normalize_output(output_signal)
+        _render_scales.put(result_key, scale)
+        cache_output(result_key, output_signal, sample_rate)
+        print(f"✅ Background render finished (result {result_key[:8]})")
+    finally:
+        with _renders_lock:
+            _renders.pop(result_key, None)
+
+
+def start_background_render(result_key, signal, sample_rate, sliders, signal_hash):
+    """
+    Render the full output in the background unless it is cached or already
+    being rendered. Returns the render's future (None if already cached).
+    """
+    if get_cached_output(result_key) is not None:
+        return None
+
+    with _renders_lock:
+        future = _renders.get(result_key)
+        if future is None:
+            print(f"🧵 Background render started (result {result_key[:8]})")
+            future = _executor.submit(_render_full, result_key, signal, sample_rate, sliders, signal_hash)
+            _renders[result_key] = future
+        return future
+
+
+def get_render_status(result_key):
+    """'ready', 'pending' or 'unknown' (never started, failed or evicted)"""
+    if get_cached_output(result_key) is not None:
+        return 'ready'
+    with _renders_lock:
+        return 'pending' if result_key in _renders else 'unknown'
+
+
+def get_render_scale(result_key):
+    """Normalization factor applied to a background render (None if unknown)"""
+    return _render_scales.get(result_key)
+
+
+def wait_for_render(result_key, timeout=None):
+    """
+    Block until a pending render finishes and return (output_signal, sample_rate),
+    or None if the result is unknown. Raises the render's exception if it failed
+    and concurrent.futures.TimeoutError on timeout.
+    """
+    cached = get_cached_output(result_key)
+    if cached is not None:
+        return cached
+
+    with _renders_lock:
+        future = _renders.get(result_key)
+    if future is None:
+        return get_cached_output(result_key)
+
+    future.result(timeout=timeout)
+    return get_cached_output(result_key)
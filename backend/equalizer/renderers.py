@@ -0,0 +1,249 @@
+import gzip
+import json
+import struct
+
+import numpy as np
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; gzip is always available
+    zstandard = None
+
+
+# Bodies smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = 64 * 1024
+GZIP_LEVEL = 1
+ZSTD_LEVEL = 3
+
+# Container layout: magic, version, header length, JSON header, aligned array blobs
+CONTAINER_MAGIC = b'EQAC'
+CONTAINER_VERSION = 1
+CONTAINER_ALIGN = 16
+
+# Metadata headers the browser is allowed to read (see CORS_EXPOSE_HEADERS)
+EXPOSED_HEADERS = ('X-Sample-Rate', 'X-Sample-Format', 'X-Sample-Count', 'X-Channels', 'X-Meta')
+
+
+def split_arrays(data):
+    """
+    Separate numpy arrays from the rest of a response payload.
+
+    Returns (skeleton, arrays): skeleton is the payload with every ndarray
+    replaced by {"$array": i}, arrays is the list of those ndarrays in order.
+    """
+    arrays = []
+
+    def walk(value):
+        if isinstance(value, np.ndarray):
+            arrays.append(value)
+            return {'$array': len(arrays) - 1}
+        if isinstance(value, dict):
+            return {k: walk(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [walk(v) for v in value]
+        if isinstance(value, np.generic):
+            return value.item()
+        return value
+
+    return walk(data), arrays
+
+
+def _as_float32(array):
+    """Audio arrays go out as little-endian float32"""
+    if np.issubdtype(array.dtype, np.floating) or np.issubdtype(array.dtype, np.integer):
+        return np.ascontiguousarray(array, dtype='<f4')
+    return np.ascontiguousarray(array)
+
+
+def _as_int16(array):
+    """Clip to [-1, 1] and scale to little-endian int16 PCM"""
+    scaled = np.clip(np.asarray(array, dtype=np.float32), -1.0, 1.0) * 32767.0
+    return np.ascontiguousarray(np.round(scaled), dtype='<i2')
+
+
+def pack_container(skeleton, arrays):
+    """
+    Serialise a payload into the array container format:
+
+        b'EQAC' | uint32 version | uint32 header_len | header JSON | pad | blobs
+
+    The header is {"data": skeleton, "arrays": [{dtype, shape, offset, nbytes}]};
+    offsets are from the start of the body and 16-byte aligned so the client
+    can wrap each blob in a typed array without copying.
+    """
+    blobs = [_as_float32(a) for a in arrays]
+
+    # Header size depends on the offsets, so lay out blobs after a provisional header
+    def build_header(base):
+        entries = []
+        offset = base
+        for blob in blobs:
+            entries.append({
+                'dtype': blob.dtype.str,
+                'shape': list(blob.shape),
+                'offset': offset,
+                'nbytes': blob.nbytes,
+            })
+            offset += blob.nbytes
+            offset += -offset % CONTAINER_ALIGN
+        return json.dumps({'data': skeleton, 'arrays': entries}, separators=(',', ':')).encode('utf-8')
+
+    prefix_len = len(CONTAINER_MAGIC) + 8
+    base = 0
+    while True:
+        header = build_header(base)
+        start = prefix_len + len(header)
+        start += -start % CONTAINER_ALIGN
+        if start == base:
+            break
+        base = start
+
+    parts = [CONTAINER_MAGIC, struct.pack('<II', CONTAINER_VERSION, len(header)), header]
+    position = prefix_len + len(header)
+    for blob in blobs:
+        pad = -position % CONTAINER_ALIGN
+        parts.append(b'\0' * pad)
+        parts.append(blob.tobytes())
+        position += pad + blob.nbytes
+
+    return b''.join(parts)
+
+
+class CompressionMixin:
+    """
+    Compresses the rendered body with zstd or gzip when the client's
+    Accept-Encoding allows it and the body is large enough.
+    """
+
+    def compress(self, body, renderer_context):
+        renderer_context = renderer_context or {}
+        request = renderer_context.get('request')
+        response = renderer_context.get('response')
+        if request is None or response is None:
+            return body
+
+        response['Vary'] = 'Accept-Encoding'
+        if len(body) < COMPRESS_MIN_BYTES:
+            return body
+
+        accepted = {
+            token.split(';')[0].strip().lower()
+            for token in request.META.get('HTTP_ACCEPT_ENCODING', '').split(',')
+        }
+
+        if zstandard is not None and 'zstd' in accepted:
+            response['Content-Encoding'] = 'zstd'
+            return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+        if 'gzip' in accepted:
+            response['Content-Encoding'] = 'gzip'
+            return gzip.compress(body, compresslevel=GZIP_LEVEL)
+        return body
+
+
+class NumpyJSONRenderer(CompressionMixin, JSONRenderer):
+    """JSON renderer (ndarrays become lists) with optional compression"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        body = super().render(data, accepted_media_type, renderer_context)
+        return self.compress(body, renderer_context)
+
+
+class ArrayContainerRenderer(CompressionMixin, BaseRenderer):
+    """
+    All arrays of a response (e.g. every stem or voice) in one binary body.
+    See pack_container for the layout. Responses without arrays (errors)
+    fall back to JSON.
+    """
+    media_type = 'application/x-array-container'
+    format = 'arrays'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        skeleton, arrays = split_arrays(data)
+        if not arrays:
+            return _render_json_fallback(data, renderer_context)
+
+        return self.compress(pack_container(skeleton, arrays), renderer_context)
+
+
+class PCMRenderer(CompressionMixin, BaseRenderer):
+    """
+    Single-array responses (equalized or mixed audio) as raw little-endian PCM.
+
+    Headers describe the body: X-Sample-Format, X-Sample-Count, X-Channels,
+    X-Sample-Rate (when the payload has sampleRate) and X-Meta (the rest of the
+    payload as JSON, the array replaced by {"$array": 0}). Multichannel
+    (channels x samples) arrays are sent as interleaved frames. Responses with
+    several arrays are sent as an array container, and responses without
+    arrays (errors) as JSON; Content-Type says which.
+    """
+    charset = None
+    render_style = 'binary'
+    sample_format = None
+
+    def to_pcm(self, array):
+        raise NotImplementedError
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        skeleton, arrays = split_arrays(data)
+        if not arrays:
+            return _render_json_fallback(data, renderer_context)
+
+        response = (renderer_context or {}).get('response')
+
+        if len(arrays) > 1:
+            if response is not None:
+                response['Content-Type'] = ArrayContainerRenderer.media_type
+            return self.compress(pack_container(skeleton, arrays), renderer_context)
+
+        pcm = self.to_pcm(arrays[0])
+        if response is not None:
+            response['X-Sample-Format'] = self.sample_format
+            response['X-Sample-Count'] = str(pcm.shape[-1])
+            response['X-Channels'] = str(pcm.shape[0] if pcm.ndim > 1 else 1)
+            if isinstance(skeleton, dict) and 'sampleRate' in skeleton:
+                response['X-Sample-Rate'] = str(skeleton['sampleRate'])
+            response['X-Meta'] = json.dumps(skeleton, separators=(',', ':'))
+
+        if pcm.ndim == 2:
+            pcm = np.ascontiguousarray(pcm.T)  # interleave frames
+        return self.compress(pcm.tobytes(), renderer_context)
+
+
+class PCMFloat32Renderer(PCMRenderer):
+    media_type = 'application/x-pcm-float32'
+    format = 'f32'
+    sample_format = 'float32'
+
+    def to_pcm(self, array):
+        return _as_float32(array)
+
+
+class PCMInt16Renderer(PCMRenderer):
+    media_type = 'application/x-pcm-int16'
+    format = 'i16'
+    sample_format = 'int16'
+
+    def to_pcm(self, array):
+        return _as_int16(array)
+
+
+def _render_json_fallback(data, renderer_context):
+    """Render a payload without arrays (usually an error) as JSON"""
+    response = (renderer_context or {}).get('response')
+    if response is not None:
+        response['Content-Type'] = 'application/json'
+    return JSONRenderer().render(data, 'application/json', renderer_context)
+
+
+# Renderers for endpoints that return audio. JSON stays the default
+# (first entry) so existing clients see no change.
+AUDIO_RENDERER_CLASSES = [NumpyJSONRenderer, PCMFloat32Renderer, PCMInt16Renderer, ArrayContainerRenderer]
@@ -0,0 +1,341 @@
+import os
+import threading
+from itertools import permutations
+from multiprocessing import cpu_count
+
+import numpy as np
+import torch
+import torchaudio
+from speechbrain.inference.separation import SepformerSeparation
+
+try:
+    from demucs.apply import apply_model
+    from demucs.pretrained import get_model
+except ImportError:  # reported by the music separation endpoint
+    apply_model = get_model = None
+
+os.environ['HF_HUB_DISABLE_SYMLINKS_WARNING'] = '1'
+
+if not hasattr(torchaudio, 'list_audio_backends'):
+    torchaudio.list_audio_backends = lambda: []
+    torchaudio.get_audio_backend = lambda: "sox_io"
+    torchaudio.set_audio_backend = lambda x: None
+
+# Global voice separation model instance (load once)
+VOICE_SEPARATION_MODEL = "speechbrain/sepformer-wsj03mix"
+_voice_separation_model = None
+
+# Sepformer runs on segments of this length (seconds at the model rate) so its
+# attention memory does not grow with the clip; neighbouring segments overlap
+# by VOICE_OVERLAP_SECONDS for alignment and crossfading
+VOICE_SAMPLE_RATE = 8000
+VOICE_SEGMENT_SECONDS = float(os.environ.get('EQUALIZER_VOICE_SEGMENT_SECONDS', 30.0))
+VOICE_OVERLAP_SECONDS = float(os.environ.get('EQUALIZER_VOICE_OVERLAP_SECONDS', 2.0))
+
+def get_voice_separation_model():
+    """Lazy load the voice separation model with Windows symlink fix"""
+    global _voice_separation_model
+    if _voice_separation_model is None:
+        print("🔄 Loading SpeechBrain model without symlinks...")
+        try:
+            # Force LocalStrategy to avoid symlinks on Windows
+            _voice_separation_model = SepformerSeparation.from_hparams(
+                source=VOICE_SEPARATION_MODEL,
+                savedir='pretrained_models/sepformer-wsj03mix',
+                run_opts={"device": "cuda" if torch.cuda.is_available() else "cpu"},
+                use_auth_token=False,
+                local_strategy="copy"  # CRITICAL: Use copy instead of symlink
+            )
+            print("✅ Voice separation model loaded successfully!")
+        except Exception as e:
+            print(f"❌ Error loading voice separation model: {e}")
+            # Fallback: try without savedir (downloads to default cache)
+            try:
+                print("🔄 Trying fallback without custom savedir...")
+                _voice_separation_model = SepformerSeparation.from_hparams(
+                    source=VOICE_SEPARATION_MODEL,
+                    run_opts={"device": "cuda" if torch.cuda.is_available() else "cpu"},
+                    use_auth_token=False,
+                )
+                print("✅ Voice separation model loaded with fallback!")
+            except Exception as e2:
+                print(f"❌ Fallback also failed: {e2}")
+                raise
+    return _voice_separation_model
+
+
+# Long-lived Demucs engine: the model is loaded once per server process and
+# reused for every /separate-music request (no CLI subprocess, no temp WAVs)
+DEMUCS_MODEL = os.environ.get('EQUALIZER_DEMUCS_MODEL', 'htdemucs_6s')
+DEMUCS_THREADS = int(os.environ.get('EQUALIZER_DEMUCS_THREADS', cpu_count()))
+# Same defaults as the demucs CLI
+DEMUCS_SHIFTS = 1
+DEMUCS_OVERLAP = 0.25
+
+_demucs_engine = None
+_demucs_engine_lock = threading.Lock()
+
+
+class DemucsEngine:
+    """
+    A loaded Demucs model. separate() takes samples directly and returns
+    one (channels x samples) float32 array per source at self.sample_rate,
+    matching what the demucs CLI writes (mono input is duplicated to stereo,
+    input is resampled to the model rate). Inference is serialised: torch
+    already spreads one run over num_threads.
+    """
+
+    def __init__(self, model_name=DEMUCS_MODEL, num_threads=DEMUCS_THREADS, device=None):
+        if get_model is None:
+            raise ImportError('Demucs not found. Please install: pip install demucs')
+
+        self.model_name = model_name
+        self.device = device or ('cuda' if torch.cuda.is_available() else 'cpu')
+        torch.set_num_threads(max(1, num_threads))
+
+        print(f"🔄 Loading Demucs model {model_name} ({num_threads} threads, {self.device})...")
+        self.model = get_model(model_name)
+        self.model.to(self.device)
+        self.model.eval()
+
+        self.sample_rate = self.model.samplerate
+        self.channels = self.model.audio_channels
+        self.sources = list(self.model.sources)
+        self._lock = threading.Lock()
+        print(f"✅ Demucs model loaded: {', '.join(self.sources)}")
+
+    def _prepare(self, signal, sample_rate):
+        """(channels x samples) tensor at the model's rate and channel count"""
+        wav = torch.from_numpy(np.ascontiguousarray(np.atleast_2d(signal), dtype=np.float32))
+        if wav.shape[0] == 1:
+            wav = wav.expand(self.channels, -1)
+        elif wav.shape[0] > self.channels:
+            wav = wav[:self.channels]
+        elif wav.shape[0] < self.channels:
+            wav = wav.mean(dim=0, keepdim=True).expand(self.channels, -1)
+
+        if sample_rate != self.sample_rate:
+            wav = torchaudio.functional.resample(wav, sample_rate, self.sample_rate)
+        return wav.contiguous()
+
+    def separate(self, signal, sample_rate):
+        """Separate a 1-D or (channels x samples) signal into {source: array}"""
+        wav = self._prepare(signal, sample_rate)
+
+        # Normalise by the mix statistics like the CLI does
+        ref = wav.mean(dim=0)
+        mean = ref.mean()
+        std = ref.std()
+        if not torch.isfinite(std) or std < 1e-8:
+            std = torch.tensor(1.0)
+        wav = (wav - mean) / std
+
+        with self._lock, torch.inference_mode():
+            sources = apply_model(
+                self.model, wav[None].to(self.device),
+                shifts=DEMUCS_SHIFTS, split=True, overlap=DEMUCS_OVERLAP,
+                device=self.device, progress=False,
+            )[0]
+
+        sources = (sources * std + mean).cpu().numpy()
+
+        stems = {}
+        for name, source in zip(self.sources, sources):
+            # Rescale clipping stems like the CLI's WAV writer
+            peak = np.max(np.abs(source)) if source.size else 0.0
+            stems[name] = (source / max(1.01 * peak, 1.0)).astype(np.float32)
+        return stems
+
+
+def get_demucs_engine():
+    """Process-wide Demucs engine (loaded on first use)"""
+    global _demucs_engine
+    with _demucs_engine_lock:
+        if _demucs_engine is None:
+            _demucs_engine = DemucsEngine()
+        return _demucs_engine
+
+
+def separate_music(signal, sample_rate):
+    """
+    Separate a 1-D or (channels x samples) signal into Demucs stems.
+    Returns ({stem: array}, stems_sample_rate): multichannel input gets
+    (channels x samples) stems, mono input gets mono stems. Raises
+    ImportError when demucs is not installed.
+    """
+    # Normalize signal to prevent clipping
+    if np.max(np.abs(signal)) > 1.0:
+        signal = signal / np.max(np.abs(signal)) * 0.95
+
+    keep_channels = signal.ndim == 2
+    engine = get_demucs_engine()
+
+    # Separate in-process with the loaded model (drums, bass, vocals, guitar, piano, other)
+    separated = engine.separate(signal, sample_rate)
+
+    stems = {}
+    for stem_name, stem_audio in separated.items():
+        # (channels x samples) for multichannel input, mono otherwise
+        stems[stem_name] = stem_audio if keep_channels else np.mean(stem_audio, axis=0)
+    return stems, engine.sample_rate
+
+
+def _separate_segment(model, segment):
+    """Sepformer on one 1-D segment -> (samples x voices) float32 array"""
+    with torch.inference_mode():
+        est_sources = model.separate_batch(segment.unsqueeze(0))
+    separated_sources = est_sources[0].cpu()  # Get first batch item
+
+    # Handle different tensor shapes from SpeechBrain
+    if len(separated_sources.shape) == 3:
+        # Shape: [1, samples, num_voices]
+        separated_sources = separated_sources.squeeze(0)  # Remove batch dimension: [samples, num_voices]
+    elif len(separated_sources.shape) != 2:
+        raise ValueError(f"Unexpected tensor shape: {separated_sources.shape}")
+
+    return separated_sources.numpy().astype(np.float32)[:len(segment)]
+
+
+def _align_to_previous(previous, current):
+    """
+    Reorder and rescale the voices of current so they match previous over
+    the shared overlap: Sepformer's output order (and scale, sign) is
+    arbitrary per segment. The permutation maximises the summed absolute
+    correlation; each voice then gets the least-squares gain onto its match.
+    previous and current are (overlap x voices). Returns (order, gains).
+    """
+    num_voices = previous.shape[1]
+    norms = np.sqrt(np.sum(previous ** 2, axis=0))[:, None] * np.sqrt(np.sum(current ** 2, axis=0))[None, :]
+    correlation = np.abs(previous.T @ current) / np.maximum(norms, 1e-12)
+
+    order = max(permutations(range(num_voices)),
+                key=lambda perm: sum(correlation[i, j] for i, j in enumerate(perm)))
+    order = list(order)
+
+    matched = current[:, order]
+    energy = np.sum(matched ** 2, axis=0)
+    cross = np.sum(previous * matched, axis=0)
+    gains = np.where(energy > 1e-12, cross / np.maximum(energy, 1e-12), 1.0)
+    # Near-silent overlaps give meaningless gains; keep those voices as they are
+    gains = np.where(np.abs(gains) > 1e-3, np.clip(gains, -4.0, 4.0), 1.0)
+    return order, gains.astype(np.float32)
+
+
+def separate_voices_chunked(model, mixture, segment_length, overlap_length, progress=None):
+    """
+    Sepformer over a 1-D mixture tensor in overlapping segments.
+
+    Each segment is separated on its own, so model memory depends on
+    segment_length only. Voices of each segment are permutation/gain aligned
+    to the previous one by correlation over the overlap, then the overlap is
+    crossfaded (sin^2 fades, which sum to one). Returns (samples x voices).
+    progress(fraction, message) is called after every segment.
+    """
+    n = len(mixture)
+    if n <= segment_length:
+        return _separate_segment(model, mixture)
+
+    overlap_length = max(1, min(overlap_length, segment_length // 2))
+    hop = segment_length - overlap_length
+    num_segments = -(-(n - overlap_length) // hop)
+    fade_in = (np.sin(0.5 * np.pi * (np.arange(overlap_length) + 0.5) / overlap_length) ** 2).astype(np.float32)
+    fade_out = 1.0 - fade_in
+
+    output = None
+    previous_tail = None
+    start = 0
+    for index in range(num_segments):
+        end = min(start + segment_length, n)
+        current = _separate_segment(model, mixture[start:end])
+
+        if output is None:
+            output = np.zeros((n, current.shape[1]), dtype=np.float32)
+            output[:end] = current
+        else:
+            order, gains = _align_to_previous(previous_tail, current[:overlap_length])
+            current = current[:, order] * gains
+            output[start:start + overlap_length] = (previous_tail * fade_out[:, None]
+                                                    + current[:overlap_length] * fade_in[:, None])
+            output[start + overlap_length:end] = current[overlap_length:]
+
+        previous_tail = current[-overlap_length:]
+        if progress is not None:
+            progress((index + 1) / num_segments, f'Separated segment {index + 1}/{num_segments}')
+        if end == n:
+            break
+        start += hop
+
+    return output
+
+
+def separate_voices(signal, sample_rate, progress=None):
+    """
+    Separate voices with Sepformer. Returns {voice_i: float32 array} at
+    sample_rate, each voice peak-normalized to 0.95. Long clips are
+    processed in segments (see separate_voices_chunked).
+    """
+    # Sepformer is a single-channel model: separate the mix of multichannel input
+    if signal.ndim == 2:
+        signal = signal.mean(axis=0)
+
+    # Normalize signal to prevent clipping
+    if np.max(np.abs(signal)) > 1.0:
+        signal = signal / np.max(np.abs(signal)) * 0.95
+
+    # Convert to torch tensor (1D -> 2D: [1, samples])
+    mixed_tensor = torch.from_numpy(signal).unsqueeze(0)
+
+    # Downsample to 8kHz for separation (model requirement)
+    model_sample_rate = VOICE_SAMPLE_RATE
+    if sample_rate != model_sample_rate:
+        resampler = torchaudio.transforms.Resample(sample_rate, model_sample_rate)
+        mixed_tensor_8k = resampler(mixed_tensor)
+    else:
+        mixed_tensor_8k = mixed_tensor
+
+    # Separate voices segment by segment
+    model = get_voice_separation_model()
+    separated_sources = torch.from_numpy(separate_voices_chunked(
+        model, mixed_tensor_8k[0],
+        int(VOICE_SEGMENT_SECONDS * model_sample_rate),
+        int(VOICE_OVERLAP_SECONDS * model_sample_rate),
+        progress=progress,
+    ))
+
+    # Now separated_sources should be [samples, num_voices]
+    num_samples, num_voices = separated_sources.shape
+
+    # Upsample back to original sample rate
+    if sample_rate != model_sample_rate:
+        resampler_up = torchaudio.transforms.Resample(model_sample_rate, sample_rate)
+        # Resample first voice to get the output length
+        first_voice_8k = separated_sources[:, 0].unsqueeze(0)  # [1, samples]
+        first_voice_up = resampler_up(first_voice_8k)
+        upsampled_length = first_voice_up.shape[1]
+
+        # Create tensor for upsampled voices
+        separated_sources_up = torch.zeros(upsampled_length, num_voices)
+        separated_sources_up[:, 0] = first_voice_up.squeeze(0)
+
+        # Resample remaining voices
+        for i in range(1, num_voices):
+            voice_8k = separated_sources[:, i].unsqueeze(0)  # [1, samples]
+            voice_up = resampler_up(voice_8k)
+            separated_sources_up[:, i] = voice_up.squeeze(0)  # [samples]
+        separated_sources = separated_sources_up
+
+    # Convert to numpy and extract voices
+    voices = {}
+
+    for i in range(num_voices):
+        voice_tensor = separated_sources[:, i]  # [samples]
+        voice_array = voice_tensor.numpy().astype(np.float32)
+
+        # Normalize each voice
+        max_val = np.max(np.abs(voice_array))
+        if max_val > 0:
+            voice_array = voice_array / max_val * 0.95
+
+        voices[f"voice_{i}"] = voice_array
+
+    return voices
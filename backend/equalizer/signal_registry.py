@@ -0,0 +1,103 @@
+import os
+
+import numpy as np
+
+from .cache import ByteBudgetCache
+from .utils import get_signal_hash
+
+# Server-side store of uploaded signals, keyed by content digest.
+# Entries expire after EQUALIZER_SIGNAL_TTL_SECONDS without use, and the
+# least recently used ones are dropped past EQUALIZER_SIGNAL_REGISTRY_MB.
+SIGNAL_TTL_SECONDS = int(os.environ.get('EQUALIZER_SIGNAL_TTL_SECONDS', 3600))
+
+_signal_registry = ByteBudgetCache(
+    int(os.environ.get('EQUALIZER_SIGNAL_REGISTRY_MB', 1024)) * 1024 * 1024,
+    name='signals',
+    ttl=SIGNAL_TTL_SECONDS,
+)
+
+
+class SignalNotFound(KeyError):
+    """Raised when a signalId is unknown or has expired."""
+
+
+def register_signal(signal, sample_rate):
+    """
+    Store a decoded signal and return its ID (the get_signal_hash digest).
+    NaN/Inf are cleaned first; the stored array is float64 and read-only.
+    Multichannel signals are stored as (channels x samples).
+    Registering the same content twice returns the same ID.
+    """
+    signal = np.array(signal, dtype=float)
+
+    if signal.ndim not in (1, 2) or signal.shape[-1] == 0:
+        raise ValueError("Signal must be a non-empty 1-D or (channels x samples) array")
+
+    if not np.all(np.isfinite(signal)):
+        signal = np.nan_to_num(signal, nan=0.0, posinf=0.0, neginf=0.0)
+
+    signal.setflags(write=False)
+    signal_id = get_signal_hash(signal, sample_rate)
+
+    if _signal_registry.get(signal_id) is None:
+        _signal_registry.put(signal_id, (signal, float(sample_rate)))
+
+    return signal_id
+
+
+def get_registered_signal(signal_id):
+    """Return (signal, sample_rate) for a registered ID or raise SignalNotFound."""
+    entry = _signal_registry.get(signal_id)
+    if entry is None:
+        raise SignalNotFound(signal_id)
+    return entry
+
+
+def resolve_signal(data, dtype=float):
+    """
+    Read the input signal from a request payload.
+
+    Accepts either 'signalId' (from /signals/upload) or an inline 'signal'
+    (a JSON list, or an ndarray decoded by the binary audio parsers); nested
+    lists or 2-D arrays are (channels x samples). Returns
+    (signal, sample_rate, signal_hash); for inline signals the
+    hash is None and the caller computes it when needed. Returns
+    (None, sample_rate, None) when neither field is present.
+    """
+    signal_id = data.get('signalId')
+
+    if signal_id:
+        signal, registered_rate = get_registered_signal(signal_id)
+        sample_rate = float(data.get('sampleRate', registered_rate))
+        if sample_rate != registered_rate:
+            # Hash covers the sample rate, so a different rate is a different key
+            return signal.astype(dtype, copy=False), sample_rate, None
+        return signal.astype(dtype, copy=False), sample_rate, signal_id
+
+    sample_rate = float(data.get('sampleRate', 44100))
+    signal_data = data.get('signal', [])
+
+    if signal_data is None or len(signal_data) == 0:
+        return None, sample_rate, None
+
+    if isinstance(signal_data, np.ndarray):
+        # Binary bodies arrive as ndarray views; convert only if the dtype differs
+        signal = signal_data.astype(dtype, copy=False)
+    elif isinstance(signal_data, (list, tuple)):
+        signal = np.array(signal_data, dtype=dtype)
+    else:
+        raise ValueError("Signal must be an array")
+
+    if signal.ndim > 2:
+        raise ValueError("Signal must be 1-D or (channels x samples)")
+
+    # Handle NaN or Inf values
+    if np.any(np.isnan(signal)) or np.any(np.isinf(signal)):
+        signal = np.nan_to_num(signal, nan=0.0, posinf=0.0, neginf=0.0)
+
+    return signal, sample_rate, None
+
+
+def get_registry_stats():
+    """Size and hit/miss/eviction counters for the signal registry"""
+    return _signal_registry.stats()
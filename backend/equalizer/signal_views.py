@@ -0,0 +1,71 @@
+from rest_framework.decorators import api_view, parser_classes
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+
+from .signal_registry import register_signal, get_registered_signal, get_registry_stats, SIGNAL_TTL_SECONDS
+from .parsers import AUDIO_PARSER_CLASSES
+
+
+@api_view(['POST'])
+@parser_classes(AUDIO_PARSER_CLASSES)
+def upload_signal(request):
+    """
+    Store a signal server-side so processing endpoints can reference it by ID.
+    Payload: {
+        "signal": [...],
+        "sampleRate": 44100
+    }
+    or a binary body (raw float32/float64 or WAV, see parsers.py).
+    Returns: { "signalId": "...", "length": N, "channels": C, "sampleRate": sr, "ttlSeconds": T }
+    """
+    try:
+        signal_data = request.data.get('signal', [])
+        sample_rate = float(request.data.get('sampleRate', 44100))
+
+        if signal_data is None or len(signal_data) == 0:
+            return Response(
+                {'error': 'Signal data is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if sample_rate <= 0:
+            return Response(
+                {'error': 'Sample rate must be positive'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        signal_id = register_signal(signal_data, sample_rate)
+        signal, _ = get_registered_signal(signal_id)
+        channels = signal.shape[0] if signal.ndim == 2 else 1
+        print(f"📦 Registered signal {signal_id}: {signal.shape[-1]} samples x {channels} channel(s) @ {sample_rate}Hz")
+
+        return Response({
+            'signalId': signal_id,
+            'length': signal.shape[-1],
+            'channels': channels,
+            'sampleRate': sample_rate,
+            'ttlSeconds': SIGNAL_TTL_SECONDS,
+        }, status=status.HTTP_201_CREATED)
+
+    except ParseError as e:
+        return Response(
+            {'error': f'Invalid request body: {e.detail}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    except ValueError as e:
+        return Response(
+            {'error': f'Invalid input: {str(e)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    except Exception as e:
+        return Response(
+            {'error': f'Signal upload failed: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['GET'])
+def get_signal_registry_info(request):
+    """Registry size and hit/miss/eviction counters"""
+    return Response(get_registry_stats(), status=status.HTTP_200_OK)
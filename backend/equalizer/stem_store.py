@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+from django.conf import settings
+
+from .cache import ByteBudgetCache
+
+# On-disk store of separation results (stems / voices), content-addressed by
+# (signal digest, model name, sample rate). Each entry is a directory of
+# float32 .npy files plus meta.json; reads memory-map the arrays. Entries are
+# evicted least-recently-used (directory mtime, refreshed on read) once the
+# store exceeds its size cap.
+STEM_STORE_DIR = os.environ.get(
+    'EQUALIZER_STEM_STORE_DIR', os.path.join(settings.BASE_DIR, 'stem_store')
+)
+STEM_STORE_MAX_BYTES = int(os.environ.get('EQUALIZER_STEM_STORE_MB', 4096)) * 1024 * 1024
+
+_META_FILE = 'meta.json'
+_ENTRY_KEY_RE = re.compile(r'^[0-9a-f]{32}$')
+# Guards entry replacement / eviction and the _stats counters
+_store_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+
+# Stacked (stems x samples) float32 matrices of recently mixed separations
+_matrix_cache = ByteBudgetCache(
+    int(os.environ.get('EQUALIZER_MIX_CACHE_MB', 512)) * 1024 * 1024, name='stem_matrices'
+)
+
+
+def get_entry_key(signal_hash, model_name, sample_rate):
+    """Directory name of a (signal digest, model, sample rate) entry"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((signal_hash, model_name, int(sample_rate))).encode())
+    return digest.hexdigest()
+
+
+def _entry_size(path):
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+def get_stems(signal_hash, model_name, sample_rate):
+    """
+    Stored result as (arrays, meta): arrays maps names to read-only memory-mapped
+    float32 arrays in their original order, meta is the dict given to put_stems
+    (with 'sampleRate' defaulting to the key's sample rate).
+    Returns None on a miss (or an incomplete/corrupt entry).
+    """
+    return get_stems_by_id(get_entry_key(signal_hash, model_name, sample_rate))
+
+
+def get_stems_by_id(separation_id):
+    """get_stems for a separation ID (the entry key returned by put_stems)"""
+    if not isinstance(separation_id, str) or not _ENTRY_KEY_RE.match(separation_id):
+        return None
+
+    path = os.path.join(STEM_STORE_DIR, separation_id)
+    try:
+        with open(os.path.join(path, _META_FILE)) as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(path, f'{index}.npy'), mmap_mode='r')
+            for index, name in enumerate(meta['names'])
+        }
+        os.utime(path)  # mark as recently used
+    except (OSError, ValueError, KeyError):
+        with _store_lock:
+            _stats['misses'] += 1
+        return None
+
+    with _store_lock:
+        _stats['hits'] += 1
+    stored_meta = meta.get('meta', {})
+    stored_meta.setdefault('sampleRate', meta.get('sampleRate'))
+    return arrays, stored_meta
+
+
+def put_stems(signal_hash, model_name, sample_rate, arrays, meta=None):
+    """
+    Store a separation result (dict of name -> array, saved as float32) and
+    evict old entries past the size cap. The entry is written to a temporary
+    directory and renamed into place, so readers never see partial entries.
+    Returns the separation ID (see get_stems_by_id), or None if the store
+    cannot be written (the result is still valid).
+    """
+    key = get_entry_key(signal_hash, model_name, sample_rate)
+    path = os.path.join(STEM_STORE_DIR, key)
+
+    try:
+        os.makedirs(STEM_STORE_DIR, exist_ok=True)
+        temp_dir = tempfile.mkdtemp(prefix=f'.{key}-', dir=STEM_STORE_DIR)
+        try:
+            for index, array in enumerate(arrays.values()):
+                np.save(os.path.join(temp_dir, f'{index}.npy'), np.asarray(array, dtype=np.float32))
+            with open(os.path.join(temp_dir, _META_FILE), 'w') as f:
+                json.dump({
+                    'names': list(arrays.keys()),
+                    'model': model_name,
+                    'sampleRate': int(sample_rate),
+                    'meta': meta or {},
+                }, f)
+
+            with _store_lock:
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                os.replace(temp_dir, path)
+        finally:
+            if os.path.isdir(temp_dir):
+                shutil.rmtree(temp_dir, ignore_errors=True)
+    except OSError as e:
+        print(f"⚠️ Could not store separation result: {e}")
+        return None
+
+    _matrix_cache.pop(key)
+    with _store_lock:
+        _stats['writes'] += 1
+    print(f"💾 Stored separation result ({model_name}, {len(arrays)} arrays)")
+    evict_stems()
+    return key
+
+
+def get_stem_matrix(separation_id):
+    """
+    Stored separation as (names, matrix, meta): matrix is a read-only
+    (stems x samples) or (stems x channels x samples) float32 array, shorter
+    arrays zero-padded. Mono arrays are spread over the channels of
+    multichannel ones. Matrices are kept in memory (EQUALIZER_MIX_CACHE_MB) so
+    repeated mixes do not touch the disk. Returns None for unknown IDs.
+    """
+    cached = _matrix_cache.get(separation_id)
+    if cached is not None:
+        return cached
+
+    stored = get_stems_by_id(separation_id)
+    if stored is None:
+        return None
+    arrays, meta = stored
+
+    shapes = [np.atleast_2d(a).shape for a in arrays.values()]
+    channels = max((shape[0] for shape in shapes), default=1)
+    length = max((shape[1] for shape in shapes), default=0)
+
+    matrix = np.zeros((len(arrays), channels, length), dtype=np.float32)
+    for row, array in zip(matrix, arrays.values()):
+        array = np.atleast_2d(array)
+        row[:, :array.shape[1]] = array
+    if channels == 1:
+        matrix = matrix[:, 0]
+    matrix.setflags(write=False)
+
+    entry = (list(arrays.keys()), matrix, meta)
+    _matrix_cache.put(separation_id, entry)
+    return entry
+
+
+def evict_stems(max_bytes=None):
+    """Delete least-recently-used entries until the store fits max_bytes"""
+    max_bytes = STEM_STORE_MAX_BYTES if max_bytes is None else max_bytes
+
+    with _store_lock:
+        try:
+            entries = [e for e in os.scandir(STEM_STORE_DIR) if e.is_dir() and not e.name.startswith('.')]
+        except OSError:
+            return 0
+
+        sized = []
+        for entry in entries:
+            try:
+                sized.append((entry.stat().st_mtime, _entry_size(entry.path), entry.path))
+            except OSError:
+                continue
+
+        total = sum(size for _, size, _ in sized)
+        evicted = 0
+        for _, size, path in sorted(sized):
+            if total <= max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            _matrix_cache.pop(os.path.basename(path))
+            total -= size
+            evicted += 1
+        _stats['evictions'] += evicted
+
+    if evicted:
+        print(f"🧹 Evicted {evicted} stored separation(s)")
+    return evicted
+
+
+def clear_stem_store():
+    """Remove every stored separation"""
+    evict_stems(max_bytes=0)
+
+
+def get_stem_store_stats():
+    """Entry count, bytes on disk and hit/miss counters of the store and its matrix cache"""
+    entries = 0
+    total = 0
+    if os.path.isdir(STEM_STORE_DIR):
+        for entry in os.scandir(STEM_STORE_DIR):
+            if entry.is_dir() and not entry.name.startswith('.'):
+                entries += 1
+                total += _entry_size(entry.path)
+    with _store_lock:
+        counters = dict(_stats)
+    return {
+        'name': 'stems',
+        'entries': entries,
+        'bytes': total,
+        'maxBytes': STEM_STORE_MAX_BYTES,
+        'directory': str(STEM_STORE_DIR),
+        **counters,
+        'matrices': _matrix_cache.stats(),
+    }
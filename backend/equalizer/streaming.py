@@ -0,0 +1,127 @@
+import re
+import struct
+
+import numpy as np
+from django.http import HttpResponse, StreamingHttpResponse
+
+# Frames converted and sent per generator step
+STREAM_CHUNK_FRAMES = 64 * 1024
+
+WAV_HEADER_BYTES = 44
+BYTES_PER_SAMPLE = 2  # 16-bit PCM: smallest format every browser plays
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def wav_header(num_samples, sample_rate, channels=1):
+    """44-byte RIFF header for 16-bit PCM audio"""
+    sample_rate = int(round(sample_rate))
+    data_bytes = num_samples * channels * BYTES_PER_SAMPLE
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_bytes, b'WAVE',
+        b'fmt ', 16, 1, channels, sample_rate,
+        sample_rate * channels * BYTES_PER_SAMPLE, channels * BYTES_PER_SAMPLE, 8 * BYTES_PER_SAMPLE,
+        b'data', data_bytes,
+    )
+
+
+def parse_range(range_header, total_bytes):
+    """
+    Parse a single-range 'bytes=start-end' header.
+    Returns (start, end) inclusive, None for no/unsupported Range (send the
+    whole body), or raises ValueError if the range cannot be satisfied.
+    """
+    if not range_header:
+        return None
+
+    match = _RANGE_RE.match(range_header.strip())
+    if not match:
+        return None
+
+    start_text, end_text = match.groups()
+    if start_text == '' and end_text == '':
+        return None
+
+    if start_text == '':
+        # Suffix range: last N bytes
+        length = int(end_text)
+        if length == 0:
+            raise ValueError('Empty suffix range')
+        start = max(0, total_bytes - length)
+        end = total_bytes - 1
+    else:
+        start = int(start_text)
+        end = int(end_text) if end_text else total_bytes - 1
+        end = min(end, total_bytes - 1)
+
+    if start >= total_bytes or start > end:
+        raise ValueError('Range not satisfiable')
+    return start, end
+
+
+def _iter_wav_bytes(samples, header, start, end):
+    """
+    Yield bytes start..end (inclusive) of header + 16-bit PCM data, converting
+    per chunk. samples is (channels x frames); frames are interleaved on the fly.
+    """
+    if start < WAV_HEADER_BYTES:
+        yield header[start:min(end + 1, WAV_HEADER_BYTES)]
+        start = WAV_HEADER_BYTES
+    if start > end:
+        return
+
+    frame_bytes = samples.shape[0] * BYTES_PER_SAMPLE
+    data_start = start - WAV_HEADER_BYTES
+    data_end = end + 1 - WAV_HEADER_BYTES
+
+    # Whole frames covering the byte range, trimmed to the exact bytes
+    first = data_start // frame_bytes
+    last = -(-data_end // frame_bytes)
+
+    for chunk_start in range(first, last, STREAM_CHUNK_FRAMES):
+        chunk_end = min(chunk_start + STREAM_CHUNK_FRAMES, last)
+        chunk = np.clip(samples[:, chunk_start:chunk_end].T, -1.0, 1.0) * 32767.0
+        pcm = np.round(chunk).astype('<i2').tobytes()
+
+        chunk_byte_start = chunk_start * frame_bytes
+        lo = max(data_start - chunk_byte_start, 0)
+        hi = min(len(pcm), data_end - chunk_byte_start)
+        yield pcm[lo:hi] if (lo or hi != len(pcm)) else pcm
+
+
+def stream_wav_response(request, samples, sample_rate, filename='equalized.wav'):
+    """
+    Stream a float buffer (1-D mono or channels x samples) as a 16-bit WAV,
+    honouring single-range Range requests (206 Partial Content) so audio
+    elements can seek.
+    """
+    samples = np.atleast_2d(np.asarray(samples))
+    channels, n_frames = samples.shape
+    header = wav_header(n_frames, sample_rate, channels)
+    total_bytes = WAV_HEADER_BYTES + n_frames * channels * BYTES_PER_SAMPLE
+
+    try:
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), total_bytes)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{total_bytes}'
+        return response
+
+    if byte_range is None:
+        start, end, status_code = 0, total_bytes - 1, 200
+    else:
+        start, end = byte_range
+        status_code = 206
+
+    response = StreamingHttpResponse(
+        _iter_wav_bytes(samples, header, start, end),
+        status=status_code,
+        content_type='audio/wav',
+    )
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Length'] = str(end - start + 1)
+    response['Content-Disposition'] = f'inline; filename="{filename}"'
+    if status_code == 206:
+        response['Content-Range'] = f'bytes {start}-{end}/{total_bytes}'
+    return response
@@ -1,3 +1,955 @@
-from django.test import TestCase
+import json
+import os
+import struct
+import tempfile
+import time
+from concurrent.futures import Future
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.test import SimpleTestCase
+from rest_framework.test import APIClient
+from rest_framework.exceptions import ParseError
+
+from .cache import ByteBudgetCache, CountBoundedCache
+from .signal_registry import register_signal, get_registered_signal, SignalNotFound
+from .parsers import decode_wav, WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT, WAVE_FORMAT_EXTENSIBLE
+from .renderers import pack_container, split_arrays, CONTAINER_MAGIC, CONTAINER_VERSION, CONTAINER_ALIGN
+from .streaming import parse_range
+from . import jobs, progressive, separation, stem_store, utils
+from .utils import (
+    fft_custom, ifft_custom, rfft_custom, irfft_custom,
+    design_equalizer_fir, equalize_blocks_fir, get_result_key,
+    apply_equalization_direct, build_gain_mask, get_fft_plan,
+    apply_equalization, get_signal_hash, get_cache_stats, clear_fft_cache,
+    apply_equalization_incremental, build_band_components, get_band_layout,
+    apply_equalization_batch, quantize_sliders, get_cached_output, stft_custom,
+)
+
+SMOOTH_LENGTHS = [1, 2, 8, 12, 360, 1024, 44100]
+PRIME_LENGTHS = [7, 13, 97, 1009]
+ODD_LENGTHS = [9, 15, 225, 1001]
+ALL_LENGTHS = SMOOTH_LENGTHS + PRIME_LENGTHS + ODD_LENGTHS
+
+
+class FFTEngineTests(SimpleTestCase):
+    """fft/ifft/rfft/irfft against numpy at smooth, prime and odd lengths"""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def assertClose(self, actual, expected, n):
+        np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-9 * max(1, n), err_msg=f'n={n}')
+
+    def test_fft_and_ifft(self):
+        for n in ALL_LENGTHS:
+            x = self.rng.standard_normal(n) + 1j * self.rng.standard_normal(n)
+            self.assertClose(fft_custom(x), np.fft.fft(x), n)
+            if n > 1:
+                self.assertClose(ifft_custom(x), np.fft.ifft(x), n)
+
+    def test_fft_rows(self):
+        for n in [12, 97, 225]:
+            x = self.rng.standard_normal((3, n)) + 1j * self.rng.standard_normal((3, n))
+            self.assertClose(fft_custom(x), np.fft.fft(x, axis=-1), n)
+            self.assertClose(ifft_custom(x), np.fft.ifft(x, axis=-1), n)
+
+    def test_rfft(self):
+        for n in ALL_LENGTHS:
+            x = self.rng.standard_normal(n)
+            self.assertClose(rfft_custom(x), np.fft.rfft(x), n)
+
+    def test_irfft(self):
+        for n in ALL_LENGTHS:
+            spectrum = np.fft.rfft(self.rng.standard_normal(n))
+            self.assertClose(irfft_custom(spectrum, n), np.fft.irfft(spectrum, n), n)
+
+    def test_irfft_pads_and_truncates_spectrum(self):
+        spectrum = np.fft.rfft(self.rng.standard_normal(64))
+        self.assertClose(irfft_custom(spectrum, 100), np.fft.irfft(spectrum, 100), 100)
+        self.assertClose(irfft_custom(spectrum, 30), np.fft.irfft(spectrum, 30), 30)
+
+    def test_real_rows(self):
+        for n in [12, 97, 1024, 1001]:
+            x = self.rng.standard_normal((2, n))
+            spectrum = np.fft.rfft(x, axis=-1)
+            self.assertClose(rfft_custom(x), spectrum, n)
+            self.assertClose(irfft_custom(spectrum, n), x, n)
+
+    def test_bluestein_inner_size_is_2_3_smooth(self):
+        for n in [13, 97, 1009, 1001, 2646001]:
+            inner = get_fft_plan(n).inner_n
+            self.assertGreaterEqual(inner, 2 * n - 1)
+            while inner % 2 == 0:
+                inner //= 2
+            while inner % 3 == 0:
+                inner //= 3
+            self.assertEqual(inner, 1, f'n={n}')
+
+    def test_equalization_at_exact_length(self):
+        # Odd and prime lengths are equalized at their own length, not padded
+        sample_rate = 8000
+        sliders = [{'value': 0.0, 'freqRanges': [[300, 900]]}, {'value': 1.7, 'freqRanges': [[2000, 2500]]}]
+        for n in [8000, 8001, 7919, 44101]:
+            x = 0.1 * self.rng.standard_normal(n)
+            gain_mask = build_gain_mask(np.fft.rfftfreq(n, 1.0 / sample_rate), sliders, sample_rate)
+            expected = np.fft.irfft(np.fft.rfft(x) * gain_mask, n)
+            output = apply_equalization_direct(x, sample_rate, sliders, n, normalize=False)
+            self.assertEqual(output.shape, (n,))
+            self.assertClose(output, expected, n)
+
+
+class ByteBudgetCacheTests(SimpleTestCase):
+    """LRU eviction by bytes, oversize entries, TTL and counters"""
+
+    def test_evicts_least_recently_used(self):
+        cache = ByteBudgetCache(300)
+        for key in 'abc':
+            cache.put(key, np.zeros(100, dtype=np.uint8))
+        cache.get('a')
+        cache.put('d', np.zeros(100, dtype=np.uint8))
+        self.assertNotIn('b', cache)
+        self.assertEqual(sorted(cache._entries), ['a', 'c', 'd'])
+        stats = cache.stats()
+        self.assertEqual((stats['bytes'], stats['evictions'], stats['hits']), (300, 1, 1))
+
+    def test_replace_and_oversize(self):
+        cache = ByteBudgetCache(100)
+        self.assertTrue(cache.put('a', np.zeros(60, dtype=np.uint8)))
+        self.assertTrue(cache.put('a', np.zeros(80, dtype=np.uint8)))
+        self.assertEqual(cache.current_bytes, 80)
+        # An entry larger than the budget is dropped, including its old value
+        self.assertFalse(cache.put('a', np.zeros(101, dtype=np.uint8)))
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.current_bytes, 0)
+
+    def test_ttl(self):
+        cache = ByteBudgetCache(100, ttl=0.05)
+        cache.put('a', b'x')
+        self.assertEqual(cache.get('a'), b'x')
+        time.sleep(0.1)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['expirations'], 1)
+
+    def test_equalizer_reuses_cached_spectrum(self):
+        clear_fft_cache()
+        sample_rate = 8000
+        x = 0.1 * np.random.default_rng(1).standard_normal(8001)
+        sliders = [{'value': 0.5, 'freqRanges': [[100, 1000]]}]
+        signal_hash = get_signal_hash(x, sample_rate)
+        hits = get_cache_stats()['fft']['hits']
+
+        first = apply_equalization(x, sample_rate, sliders, signal_hash=signal_hash)
+        second = apply_equalization(x, sample_rate, [{'value': 1.5, 'freqRanges': [[100, 1000]]}],
+                                    signal_hash=signal_hash)
+        self.assertEqual(get_cache_stats()['fft']['hits'], hits + 1)
+        np.testing.assert_allclose(first, apply_equalization_direct(x, sample_rate, sliders, len(x)), atol=1e-12)
+        self.assertFalse(np.allclose(first, second))
+
+
+class SignalRegistryTests(SimpleTestCase):
+    """Upload-once signals referenced by signalId"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.sample_rate = 8000
+        self.signal = 0.1 * np.random.default_rng(2).standard_normal(4001)
+        self.sliders = [{'value': 0.3, 'freqRanges': [[500, 1500]]}]
+
+    def test_register_is_content_addressed(self):
+        signal_id = register_signal(self.signal.tolist(), self.sample_rate)
+        self.assertEqual(signal_id, register_signal(self.signal, self.sample_rate))
+        stored, sample_rate = get_registered_signal(signal_id)
+        np.testing.assert_array_equal(stored, self.signal)
+        self.assertEqual(sample_rate, self.sample_rate)
+        with self.assertRaises(SignalNotFound):
+            get_registered_signal('0' * 32)
+
+    def test_upload_then_equalize_by_id(self):
+        response = self.client.post('/api/signals/upload',
+                                    {'signal': self.signal.tolist(), 'sampleRate': self.sample_rate}, format='json')
+        self.assertEqual(response.status_code, 201)
+        signal_id = response.json()['signalId']
+
+        by_id = self.client.post('/api/equalize', {'signalId': signal_id, 'sliders': self.sliders}, format='json')
+        inline = self.client.post('/api/equalize', {'signal': self.signal.tolist(), 'sampleRate': self.sample_rate,
+                                                    'sliders': self.sliders}, format='json')
+        expected = apply_equalization_direct(self.signal, self.sample_rate, self.sliders, len(self.signal))
+        np.testing.assert_allclose(by_id.json()['outputSignal'], expected, atol=1e-6)
+        np.testing.assert_allclose(inline.json()['outputSignal'], expected, atol=1e-6)
+
+    def test_unknown_id(self):
+        response = self.client.post('/api/fft', {'signalId': 'f' * 32}, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()['code'], 'signal_not_found')
+
+    def test_registered_output(self):
+        signal_id = register_signal(self.signal, self.sample_rate)
+        response = self.client.post('/api/equalize', {'signalId': signal_id, 'sliders': self.sliders,
+                                                      'registerOutput': True}, format='json').json()
+        output, _ = get_registered_signal(response['outputSignalId'])
+        np.testing.assert_allclose(output, response['outputSignal'], atol=1e-7)
+
+        fft_by_id = self.client.post('/api/fft', {'signalId': response['outputSignalId']}, format='json').json()
+        fft_inline = self.client.post('/api/fft', {'signal': response['outputSignal'],
+                                                   'sampleRate': self.sample_rate}, format='json').json()
+        np.testing.assert_allclose(fft_by_id['magnitudes'], fft_inline['magnitudes'], atol=1e-6)
+
+
+class BandComponentTests(SimpleTestCase):
+    """Slider renders from cached per-band components against the direct render"""
+
+    sample_rate = 8000
+    # Overlapping ranges: regions covered by one or both sliders
+    layout_sliders = [{'freqRanges': [[100, 800], [2000, 2600]]}, {'freqRanges': [[600, 1200]]}]
+
+    def _sliders(self, *gains):
+        return [{**slider, 'value': gain} for slider, gain in zip(self.layout_sliders, gains)]
+
+    def _direct(self, x, sliders):
+        return apply_equalization_direct(x, self.sample_rate, sliders, x.shape[-1], normalize=False)
+
+    def test_renders_match_direct(self):
+        x = 0.1 * np.random.default_rng(4).standard_normal(6001)
+        stats = get_cache_stats()['components']
+        for gains in [(0.5, 1.5), (0.0, 2.0), (1.3, 0.2), (1.0, 1.0)]:
+            sliders = self._sliders(*gains)
+            output = apply_equalization_incremental(x, self.sample_rate, sliders, len(x), normalize=False)
+            np.testing.assert_allclose(output, self._direct(x, sliders), atol=1e-6, err_msg=str(gains))
+        # Built once on the second render, then served from the cache
+        after = get_cache_stats()['components']
+        self.assertEqual(after['entries'], stats['entries'] + 1)
+        self.assertEqual(after['hits'], stats['hits'] + 2)
+
+    def test_multichannel(self):
+        x = 0.1 * np.random.default_rng(5).standard_normal((2, 4000))
+        for gains in [(2.0, 0.5), (0.7, 1.1), (0.0, 0.0)]:
+            sliders = self._sliders(*gains)
+            output = apply_equalization_incremental(x, self.sample_rate, sliders, x.shape[-1], normalize=False)
+            self.assertEqual(output.shape, x.shape)
+            np.testing.assert_allclose(output, self._direct(x, sliders), atol=1e-6, err_msg=str(gains))
+
+    def test_budget(self):
+        x = 0.1 * np.random.default_rng(6).standard_normal(4000)
+        layout = get_band_layout(self._sliders(1.0, 1.0), self.sample_rate)
+        components, exponents = build_band_components(x, self.sample_rate, layout)
+        self.assertEqual(components.dtype, np.float32)
+        self.assertEqual(components.shape, (len(exponents), 4000))
+        self.assertIsNone(build_band_components(x, self.sample_rate, layout, max_bytes=components.nbytes - 1))
+
+    def test_count_bounded_cache(self):
+        cache = CountBoundedCache(2, name='flags')
+        for key in 'abc':
+            cache.put(key, True)
+        self.assertNotIn('a', cache)
+        stats = cache.stats()
+        self.assertEqual((stats['entries'], stats['maxEntries'], stats['evictions']), (2, 2, 1))
+        self.assertNotIn('bytes', stats)
+
+
+class OverlapSaveTests(SimpleTestCase):
+    """equalize_blocks_fir against direct convolution with its kernel"""
+
+    sample_rate = 8000
+    sliders = [
+        {'value': 0.0, 'freqRanges': [[300, 900]]},
+        {'value': 1.8, 'freqRanges': [[1500, 2500], [3000, 3500]]},
+    ]
+
+    def setUp(self):
+        self.signal = np.random.default_rng(1).standard_normal(5000)
+
+    def expected(self, num_taps):
+        kernel = design_equalizer_fir(self.sample_rate, self.sliders, num_taps)
+        delay = (len(kernel) - 1) // 2
+        return np.convolve(self.signal, kernel)[delay:delay + len(self.signal)]
+
+    def stream(self, block_size, num_taps, fft_size=None):
+        blocks = [self.signal[i:i + block_size] for i in range(0, len(self.signal), block_size)]
+        output = list(equalize_blocks_fir(blocks, self.sample_rate, self.sliders, num_taps, fft_size))
+        return np.concatenate(output)
+
+    def test_matches_convolution_across_block_sizes(self):
+        expected = self.expected(129)
+        for block_size in [1, 7, 100, 511, 512, 1000, 5000]:
+            output = self.stream(block_size, 129)
+            self.assertEqual(len(output), len(self.signal))
+            np.testing.assert_allclose(output, expected, atol=1e-10, err_msg=f'block_size={block_size}')
+
+    def test_matches_convolution_across_fft_sizes(self):
+        expected = self.expected(129)
+        for fft_size in [258, 300, 1024, 8192]:
+            np.testing.assert_allclose(self.stream(333, 129, fft_size), expected, atol=1e-10,
+                                       err_msg=f'fft_size={fft_size}')
+
+    def test_even_tap_count_and_short_signal(self):
+        self.signal = self.signal[:50]
+        np.testing.assert_allclose(self.stream(16, 64), self.expected(64), atol=1e-10)
+
+    def test_fft_size_too_small(self):
+        with self.assertRaises(ValueError):
+            list(equalize_blocks_fir([self.signal], self.sample_rate, self.sliders, 129, fft_size=200))
+
+    def test_empty_input(self):
+        self.assertEqual(list(equalize_blocks_fir([], self.sample_rate, self.sliders, 129)), [])
+
+
+def _wav(data, format_tag, channels, sample_rate, bits, extensible=False, extra_chunk=False):
+    """Minimal RIFF/WAVE body around raw sample bytes"""
+    block_align = channels * bits // 8
+    fmt = struct.pack('<HHIIHH', WAVE_FORMAT_EXTENSIBLE if extensible else format_tag, channels,
+                      sample_rate, sample_rate * block_align, block_align, bits)
+    if extensible:
+        fmt += struct.pack('<HHI', 22, bits, 0) + struct.pack('<H', format_tag) + b'\0' * 14
+    chunks = b'fmt ' + struct.pack('<I', len(fmt)) + fmt
+    if extra_chunk:
+        chunks += b'LIST' + struct.pack('<I', 3) + b'abc\0'  # odd size, word-aligned
+    chunks += b'data' + struct.pack('<I', len(data)) + data
+    return b'RIFF' + struct.pack('<I', 4 + len(chunks)) + b'WAVE' + chunks
+
+
+class ParallelEqualizationTests(SimpleTestCase):
+    """Four-step transforms over the worker pool against numpy and the direct render"""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(4)
+        patcher = mock.patch.object(utils, 'PARALLEL_WORKERS', 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(utils.shutdown_worker_pool)
+
+    def test_pool_transforms_match_numpy(self):
+        x = self.rng.standard_normal(2 * 3 * 5 * 7 * 16)
+        spectrum = utils._rfft_pool(x)
+        np.testing.assert_allclose(spectrum, np.fft.rfft(x), atol=1e-9 * len(x))
+        np.testing.assert_allclose(utils._irfft_pool(spectrum, len(x)), x, atol=1e-9)
+
+    def test_matches_direct_render(self):
+        sample_rate = 8000
+        sliders = [{'value': 0.3, 'freqRanges': [[200, 900]]}, {'value': 1.8, 'freqRanges': [[1500, 2500]]}]
+        for shape in [(6300,), (2, 6300)]:
+            signal = self.rng.standard_normal(shape)
+            clear_fft_cache()
+            expected = apply_equalization_direct(signal, sample_rate, sliders, shape[-1], normalize=False)
+            clear_fft_cache()
+            actual = utils.apply_equalization_chunked_parallel(signal, sample_rate, sliders, shape[-1], normalize=False)
+            self.assertEqual(actual.shape, signal.shape)
+            np.testing.assert_allclose(actual, expected, atol=1e-9)
+
+    def test_unsplittable_length_falls_back_to_direct(self):
+        signal = self.rng.standard_normal(2 * 1009)
+        sliders = [{'value': 0.5, 'freqRanges': [[100, 1000]]}]
+        with mock.patch.object(utils, '_fft_pool', side_effect=AssertionError('pool used')):
+            actual = utils.apply_equalization_chunked_parallel(signal, 8000, sliders, len(signal), normalize=False)
+        expected = apply_equalization_direct(signal, 8000, sliders, len(signal), normalize=False)
+        np.testing.assert_allclose(actual, expected, atol=1e-9)
+
+
+class BatchEqualizationTests(SimpleTestCase):
+    """Batch renders against single renders, and their sharing of the result cache"""
+
+    SLIDER_SETS = [
+        [{'value': 0.3, 'freqRanges': [[200, 900]]}],
+        [{'value': 1.7, 'freqRanges': [[1500, 2500]]}, {'value': 0.0, 'freqRanges': [[3000, 3500]]}],
+        [{'value': 1.0, 'freqRanges': [[200, 900]]}],
+    ]
+
+    def setUp(self):
+        self.rng = np.random.default_rng(5)
+
+    def test_matches_single_renders(self):
+        for shape in [(4000,), (2, 4001)]:
+            signal = 0.5 * self.rng.standard_normal(shape)
+            outputs = apply_equalization_batch(signal, 8000, self.SLIDER_SETS)
+            self.assertEqual(outputs.shape, (len(self.SLIDER_SETS),) + shape)
+            for sliders, output in zip(self.SLIDER_SETS, outputs):
+                expected = apply_equalization(signal, 8000, quantize_sliders(sliders))
+                np.testing.assert_allclose(output, expected, atol=1e-5)
+
+    def test_gains_are_quantised(self):
+        signal = self.rng.standard_normal(4000)
+        nudged = [{'value': 0.3004, 'freqRanges': [[200, 900]]}]
+        np.testing.assert_array_equal(
+            apply_equalization_batch(signal, 8000, [nudged])[0],
+            apply_equalization_batch(signal, 8000, [self.SLIDER_SETS[0]])[0],
+        )
+
+    def test_shares_the_result_cache(self):
+        signal = self.rng.standard_normal(4000)
+        signal_hash = get_signal_hash(signal, 8000)
+        outputs = apply_equalization_batch(signal, 8000, self.SLIDER_SETS, signal_hash=signal_hash, mode='musical')
+
+        for sliders, output in zip(self.SLIDER_SETS, outputs):
+            cached, _ = get_cached_output(get_result_key(signal_hash, quantize_sliders(sliders), 'musical'))
+            np.testing.assert_array_equal(cached, output)
+
+        # Every configuration cached: nothing is rendered again
+        with mock.patch.object(utils, '_get_cached_spectrum', side_effect=AssertionError('rendered')):
+            again = apply_equalization_batch(signal, 8000, self.SLIDER_SETS, signal_hash=signal_hash, mode='musical')
+        np.testing.assert_array_equal(again, outputs)
+
+    def test_endpoint_reuses_equalize_output(self):
+        client = APIClient()
+        signal = self.rng.standard_normal(2000).tolist()
+        sliders = self.SLIDER_SETS[1]
+        single = client.post('/api/equalize', {
+            'signal': signal, 'sampleRate': 8000, 'sliders': sliders, 'mode': 'musical',
+        }, format='json')
+        self.assertEqual(single.status_code, 200)
+
+        with mock.patch.object(utils, '_get_cached_spectrum', side_effect=AssertionError('rendered')):
+            batch = client.post('/api/equalize/batch', {
+                'signal': signal, 'sampleRate': 8000, 'sliderSets': [sliders], 'mode': 'musical',
+            }, format='json')
+        self.assertEqual(batch.status_code, 200)
+        np.testing.assert_allclose(batch.json()['outputSignals'][0], single.json()['outputSignal'], atol=1e-6)
+
+
+class MultichannelTests(SimpleTestCase):
+    """(channels x samples) signals against channel-by-channel processing"""
+
+    SLIDERS = [{'value': 0.2, 'freqRanges': [[300, 1200]]}, {'value': 1.6, 'freqRanges': [[2000, 3000]]}]
+
+    def setUp(self):
+        self.rng = np.random.default_rng(6)
+
+    def test_transforms_match_per_channel(self):
+        x = self.rng.standard_normal((3, 1001))
+        np.testing.assert_allclose(fft_custom(x), np.fft.fft(x), atol=1e-8)
+        np.testing.assert_allclose(rfft_custom(x), np.fft.rfft(x), atol=1e-8)
+
+        spectrogram = stft_custom(x, n_fft=256, hop_length=64)
+        for channel, row in zip(spectrogram, x):
+            np.testing.assert_allclose(channel, stft_custom(row, n_fft=256, hop_length=64), atol=1e-9)
+
+    def test_equalization_matches_per_channel(self):
+        signal = self.rng.standard_normal((2, 6000))
+        output = apply_equalization(signal, 8000, self.SLIDERS, normalize=False)
+        self.assertEqual(output.shape, signal.shape)
+        for channel, row in zip(output, signal):
+            np.testing.assert_allclose(channel, apply_equalization(row, 8000, self.SLIDERS, normalize=False), atol=1e-9)
+
+    def test_equalize_endpoint_keeps_channels(self):
+        signal = 0.1 * self.rng.standard_normal((2, 3000))
+        response = APIClient().post('/api/equalize', {
+            'signal': signal.tolist(), 'sampleRate': 8000, 'sliders': self.SLIDERS,
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        output = np.array(response.json()['outputSignal'])
+        self.assertEqual(output.shape, signal.shape)
+        np.testing.assert_allclose(output, apply_equalization(signal, 8000, quantize_sliders(self.SLIDERS)), atol=1e-6)
+
+    def test_mono_stems_spread_over_stereo_mix(self):
+        stereo = 0.2 * self.rng.standard_normal((2, 500))
+        mono = 0.2 * self.rng.standard_normal(400)
+        response = APIClient().post('/api/mix-stems', {
+            'stems': {'vocals': {'data': stereo.tolist(), 'gain': 0.5}, 'bass': {'data': mono.tolist(), 'gain': 1.5}},
+            'sampleRate': 8000,
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        expected = 0.5 * stereo
+        expected[:, :400] += 1.5 * mono
+        np.testing.assert_allclose(response.json()['mixedSignal'], expected, atol=1e-6)
+
+
+class ProgressiveEqualizationTests(SimpleTestCase):
+    """Playhead window and background render against the direct full render"""
+
+    SLIDERS = [{'value': 0.2, 'freqRanges': [[300, 1200]]}, {'value': 1.8, 'freqRanges': [[2000, 3000]]}]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.signal = 0.8 * np.random.default_rng(7).standard_normal(16000)
+
+    def _equalize(self):
+        response = self.client.post('/api/equalize', {
+            'signal': self.signal.tolist(), 'sampleRate': 8000, 'sliders': self.SLIDERS,
+            'progressive': True, 'playhead': 0.5, 'windowSeconds': 0.25,
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_window_then_full_output(self):
+        window = self._equalize()
+        self.assertTrue(window['isPartial'])
+        self.assertEqual((window['windowStart'], window['windowEnd']), (4000, 6000))
+
+        result = self.client.get(f"/api/equalize/result/{window['resultKey']}", {'wait': 30, 'registerOutput': 'true'})
+        self.assertEqual(result.status_code, 200)
+        result = result.json()
+        expected = apply_equalization(self.signal, 8000, quantize_sliders(self.SLIDERS))
+        np.testing.assert_allclose(result['outputSignal'], expected, atol=1e-6)
+        registered, _ = get_registered_signal(result['outputSignalId'])
+        np.testing.assert_allclose(registered, expected, atol=1e-6)
+
+        # Window (block FIR) rescaled to the full output's level, within the FIR's approximation
+        rescaled = np.array(window['outputSignal']) * result['scale'] / window['scale']
+        error = np.max(np.abs(rescaled - expected[4000:6000]))
+        self.assertLess(error, 0.05 * np.max(np.abs(expected[4000:6000])))
+
+        # Now cached: complete at once
+        again = self._equalize()
+        self.assertFalse(again['isPartial'])
+        np.testing.assert_allclose(again['outputSignal'], result['outputSignal'], atol=1e-6)
+
+    def test_unknown_result(self):
+        response = self.client.get('/api/equalize/result/' + '0' * 32)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()['code'], 'result_not_found')
+
+    def test_render_scales_are_count_bounded(self):
+        self.assertEqual(progressive._render_scales.stats()['maxEntries'], 4096)
+
+
+class MultirateTests(SimpleTestCase):
+    """Low-band multirate equalization against the full-rate direct render"""
+
+    SLIDERS = [{'value': 0.3, 'freqRanges': [[100, 400]]}, {'value': 1.5, 'freqRanges': [[500, 900]]}]
+
+    def setUp(self):
+        self.rng = np.random.default_rng(8)
+
+    def test_band_plan(self):
+        plan = utils.get_band_plan(self.SLIDERS, 44100)
+        self.assertEqual((plan.factor, plan.top_freq), (12, 900.0))
+        self.assertIs(utils.get_band_plan(self.SLIDERS, 44100), plan)
+        # Sliders at unity do not count; wide bands are not worth decimating
+        self.assertIs(utils.get_band_plan(self.SLIDERS + [{'value': 1.0, 'freqRanges': [[5000, 9000]]}], 44100), plan)
+        self.assertIsNone(utils.get_band_plan([{'value': 0.5, 'freqRanges': [[100, 8000]]}], 44100))
+
+    def test_matches_direct_render(self):
+        for shape in [(1 << 16,), (2, 70001)]:
+            signal = 0.3 * self.rng.standard_normal(shape)
+            plan = utils.get_band_plan(self.SLIDERS, 44100)
+            actual = utils.apply_equalization_multirate(signal, 44100, self.SLIDERS, shape[-1], plan, normalize=False)
+            expected = apply_equalization_direct(signal, 44100, self.SLIDERS, shape[-1], normalize=False)
+            self.assertEqual(actual.shape, signal.shape)
+
+            # The direct render is circular, so compare away from the ends
+            error = (actual - expected)[..., 2000:-2000]
+            self.assertLess(np.sqrt(np.mean(error ** 2)), 1e-2 * np.sqrt(np.mean(expected ** 2)))
+            self.assertLess(np.max(np.abs(error)), 1e-2 * np.max(np.abs(expected)))
+
+    def test_used_for_long_low_band_renders(self):
+        signal = 0.3 * self.rng.standard_normal(1 << 16)
+        with mock.patch.object(utils, 'apply_equalization_multirate', wraps=utils.apply_equalization_multirate) as multirate:
+            apply_equalization(signal, 44100, self.SLIDERS)
+        multirate.assert_called_once()
+
+
+class StemStoreTests(SimpleTestCase):
+    """On-disk separation store in a temporary directory"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patcher = mock.patch.object(stem_store, 'STEM_STORE_DIR', directory.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.rng = np.random.default_rng(9)
+
+    def _stems(self, length=1000):
+        return {name: self.rng.standard_normal(length).astype(np.float32) for name in ('vocals', 'drums', 'bass')}
+
+    def test_round_trip(self):
+        stems = self._stems()
+        separation_id = stem_store.put_stems('a' * 32, 'demucs', 44100, stems, {'model': 'htdemucs'})
+        self.assertEqual(separation_id, stem_store.get_entry_key('a' * 32, 'demucs', 44100))
+
+        arrays, meta = stem_store.get_stems('a' * 32, 'demucs', 44100)
+        self.assertEqual(list(arrays), list(stems))
+        for name, array in stems.items():
+            np.testing.assert_array_equal(arrays[name], array)
+        self.assertEqual(meta, {'model': 'htdemucs', 'sampleRate': 44100})
+
+        self.assertIsNone(stem_store.get_stems('a' * 32, 'demucs', 48000))
+        self.assertIsNone(stem_store.get_stems_by_id('../etc'))
+
+    def test_stats_and_clear(self):
+        before = stem_store.get_stem_store_stats()
+        separation_id = stem_store.put_stems('b' * 32, 'demucs', 44100, self._stems())
+        stem_store.get_stems_by_id(separation_id)
+        stem_store.get_stems_by_id('0' * 32)
+
+        stats = stem_store.get_stem_store_stats()
+        self.assertEqual(stats['entries'], 1)
+        self.assertGreater(stats['bytes'], 3 * 1000 * 4)
+        for counter in ('writes', 'hits', 'misses'):
+            self.assertEqual(stats[counter], before[counter] + 1)
+
+        info = APIClient().post('/api/cache/clear', {'stems': True}, format='json').json()
+        self.assertEqual(info['stems']['entries'], 0)
+        self.assertIsNone(stem_store.get_stems_by_id(separation_id))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        ids = [stem_store.put_stems(c * 32, 'demucs', 44100, self._stems()) for c in 'cde']
+        for age, separation_id in enumerate(ids):
+            os.utime(os.path.join(stem_store.STEM_STORE_DIR, separation_id), (1000 + age, 1000 + age))
+        stem_store.get_stems_by_id(ids[0])  # refreshed: now the most recent
+
+        entry_size = stem_store.get_stem_store_stats()['bytes'] // 3
+        self.assertEqual(stem_store.evict_stems(max_bytes=2 * entry_size), 1)
+        self.assertIsNone(stem_store.get_stems_by_id(ids[1]))
+        self.assertIsNotNone(stem_store.get_stems_by_id(ids[0]))
+        self.assertIsNotNone(stem_store.get_stems_by_id(ids[2]))
+
+
+class RemixTests(SimpleTestCase):
+    """Mixing stored separations by separationId against the weighted sum of the stems"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patcher = mock.patch.object(stem_store, 'STEM_STORE_DIR', directory.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        rng = np.random.default_rng(10)
+        self.stems = {
+            'vocals': 0.1 * rng.standard_normal((2, 800)).astype(np.float32),
+            'drums': 0.1 * rng.standard_normal((2, 800)).astype(np.float32),
+            'bass': 0.1 * rng.standard_normal(600).astype(np.float32),
+        }
+        self.separation_id = stem_store.put_stems('f' * 32, 'demucs', 22050, self.stems)
+        self.client = APIClient()
+
+    def _mix(self, url='/api/mix-stems', **body):
+        return self.client.post(url, {'separationId': self.separation_id, **body}, format='json')
+
+    def _expected(self, gains):
+        expected = np.zeros((2, 800), dtype=np.float32)
+        for name, stem in self.stems.items():
+            expected[:, :stem.shape[-1]] += gains.get(name, 1.0) * stem
+        return expected
+
+    def test_matches_weighted_sum(self):
+        response = self._mix(gains={'vocals': 0.0, 'bass': 2.5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['sampleRate'], 22050)
+        np.testing.assert_allclose(response.json()['mixedSignal'], self._expected({'vocals': 0.0, 'bass': 2.5}),
+                                   atol=1e-6)
+
+    def test_window(self):
+        response = self._mix(gains={'drums': 0.5}, windowStart=500, windowEnd=700).json()
+        self.assertEqual((response['windowStart'], response['windowEnd'], response['length']), (500, 700, 800))
+        np.testing.assert_allclose(response['mixedSignal'], self._expected({'drums': 0.5})[:, 500:700], atol=1e-6)
+
+    def test_repeated_mixes_skip_the_disk(self):
+        self._mix(gains={})
+        with mock.patch.object(stem_store, 'get_stems_by_id', side_effect=AssertionError('disk read')):
+            response = self._mix(gains={'vocals': 0.5})
+        self.assertEqual(response.status_code, 200)
+
+    def test_voice_gains_are_clipped(self):
+        response = self._mix(url='/api/mix-voices', gains={'bass': 5.0})
+        self.assertEqual(response.status_code, 200)
+        np.testing.assert_allclose(response.json()['mixedSignal'], self._expected({'bass': 2.0}), atol=1e-6)
+
+    def test_invalid_requests(self):
+        response = self._mix(gains={'guitar': 1.0})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('guitar', response.json()['error'])
+
+        response = self.client.post('/api/mix-stems', {'separationId': '0' * 32, 'gains': {}}, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()['code'], 'separation_not_found')
+
+
+class SeparationJobTests(SimpleTestCase):
+    """Job table and endpoints with a stand-in executor (no separation models)"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        for target, name, value in [
+            (stem_store, 'STEM_STORE_DIR', directory.name),
+            (jobs, 'JOB_DB_PATH', os.path.join(directory.name, 'jobs.sqlite3')),
+            (jobs, '_db_ready', False),
+            (jobs, '_get_executor', lambda job_type: self.executor),
+        ]:
+            patcher = mock.patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.executor = mock.Mock()
+        self.executor.submit.side_effect = lambda *args: Future()
+        self.addCleanup(jobs._futures.clear)
+        self.client = APIClient()
+        self.signal = np.random.default_rng(11).standard_normal(500).astype(np.float32)
+
+    def _submit(self, job_type='separate-music'):
+        return self.client.post('/api/jobs/submit', {
+            'type': job_type, 'signal': self.signal.tolist(), 'sampleRate': 8000,
+        }, format='json')
+
+    def test_stored_separation_completes_immediately(self):
+        stems = {'vocals': self.signal * 0.5, 'drums': self.signal * 0.25}
+        signal_hash = get_signal_hash(self.signal, 8000)
+        separation_id = stem_store.put_stems(signal_hash, jobs.DEMUCS_MODEL, 8000, stems, meta={'sampleRate': 8000})
+
+        job = self._submit().json()
+        self.assertEqual((job['status'], job['progress'], job['separationId']), ('done', 1.0, separation_id))
+        self.executor.submit.assert_not_called()
+
+        result = self.client.get(f"/api/jobs/{job['jobId']}/result").json()
+        self.assertEqual(result['separationId'], separation_id)
+        for name, stem in stems.items():
+            np.testing.assert_allclose(result['stems'][name]['data'], stem, atol=1e-6)
+
+    def test_queued_job_can_be_cancelled(self):
+        response = self._submit()
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()['jobId']
+        self.assertEqual(self.client.get(f'/api/jobs/{job_id}').json()['status'], 'queued')
+        self.assertEqual(self.client.get(f'/api/jobs/{job_id}/result').status_code, 202)
+
+        self.assertEqual(self.client.post(f'/api/jobs/{job_id}/cancel').json()['status'], 'cancelled')
+        self.assertNotIn(job_id, jobs._futures)
+        self.assertEqual(self.client.get(f'/api/jobs/{job_id}/result').status_code, 409)
+
+    def test_failed_job(self):
+        job_id = self._submit().json()['jobId']
+        jobs._futures[job_id].set_exception(RuntimeError('model crashed'))
+
+        response = self.client.get(f'/api/jobs/{job_id}/result')
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json()['code'], 'job_failed')
+        self.assertIn('model crashed', response.json()['error'])
+
+    def test_queue_limit_and_invalid_requests(self):
+        with mock.patch.object(jobs, 'JOB_QUEUE_LIMIT', 1):
+            self.assertEqual(self._submit().status_code, 202)
+            response = self._submit('separate-voices')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.json()['code'], 'queue_full')
+
+        self.assertEqual(self._submit('transcribe').status_code, 400)
+        self.assertEqual(self.client.get('/api/jobs/' + '0' * 32).status_code, 404)
+
+    def test_run_separation_stores_the_result(self):
+        stems = {'vocals': self.signal, 'other': -self.signal}
+        progress = mock.Mock()
+        with mock.patch.object(jobs, 'separate_music', return_value=(stems, 8000)) as separate:
+            signal_hash = get_signal_hash(self.signal, 8000)
+            separation_id = jobs.run_separation('separate-music', self.signal, 8000, signal_hash, progress)
+            # Second run is served from the stem store
+            self.assertEqual(jobs.run_separation('separate-music', self.signal, 8000, signal_hash), separation_id)
+        separate.assert_called_once()
+        self.assertEqual([call.args[0] for call in progress.call_args_list], [0.1, 0.9])
+
+        arrays, meta = stem_store.get_stems_by_id(separation_id)
+        np.testing.assert_array_equal(arrays['other'], -self.signal)
+        self.assertEqual(meta['sampleRate'], 8000)
+
+
+class VoiceChunkingTests(SimpleTestCase):
+    """Segmented Sepformer separation with a stand-in model that knows the true voices"""
+
+    def setUp(self):
+        rng = np.random.default_rng(12)
+        self.voices = rng.standard_normal((10000, 3)).astype(np.float32)
+        self.segments = []
+
+        # The "mixture" holds sample indices, so the stand-in can look up its
+        # segment; each segment comes back in its own voice order and scale
+        def separate_segment(model, segment):
+            start, end = int(segment[0]), int(segment[-1]) + 1
+            order = rng.permutation(3)
+            gains = rng.choice([-2.0, -0.5, 0.5, 3.0], size=3).astype(np.float32)
+            if not self.segments:
+                order, gains = np.arange(3), np.ones(3, dtype=np.float32)
+            self.segments.append((start, end))
+            return self.voices[start:end, order] * gains
+
+        patcher = mock.patch.object(separation, '_separate_segment', separate_segment)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_short_clip_is_one_segment(self):
+        output = separation.separate_voices_chunked(None, np.arange(2000.0), 3000, 500)
+        self.assertEqual(self.segments, [(0, 2000)])
+        np.testing.assert_array_equal(output, self.voices[:2000])
+
+    def test_segments_are_aligned_and_crossfaded(self):
+        progress = mock.Mock()
+        output = separation.separate_voices_chunked(None, np.arange(10000.0), 3000, 500, progress=progress)
+
+        self.assertEqual(self.segments, [(0, 3000), (2500, 5500), (5000, 8000), (7500, 10000)])
+        self.assertEqual([call.args[0] for call in progress.call_args_list], [0.25, 0.5, 0.75, 1.0])
+        self.assertEqual(output.shape, self.voices.shape)
+        np.testing.assert_allclose(output, self.voices, atol=1e-5)
+
+    def test_align_to_previous(self):
+        previous = self.voices[:500]
+        order, gains = separation._align_to_previous(previous, previous[:, [2, 0, 1]] * [0.5, -2.0, 4.0])
+        self.assertEqual(order, [1, 2, 0])
+        np.testing.assert_allclose(gains, [-0.5, 0.25, 2.0], rtol=1e-5)
+
+
+class DecodeWavTests(SimpleTestCase):
+
+    def test_pcm16_mono(self):
+        ints = np.array([0, 16384, -32768, 32767], dtype='<i2')
+        samples, sample_rate = decode_wav(_wav(ints.tobytes(), WAVE_FORMAT_PCM, 1, 44100, 16))
+        self.assertEqual(sample_rate, 44100.0)
+        np.testing.assert_allclose(samples, ints / 32768.0)
+
+    def test_pcm16_stereo_is_channels_by_samples(self):
+        frames = np.array([[1, -1], [2, -2], [3, -3]], dtype='<i2')
+        samples, _ = decode_wav(_wav(frames.tobytes(), WAVE_FORMAT_PCM, 2, 8000, 16))
+        self.assertEqual(samples.shape, (2, 3))
+        np.testing.assert_allclose(samples, frames.T / 32768.0)
+
+    def test_pcm8_and_pcm24(self):
+        samples, _ = decode_wav(_wav(bytes([0, 128, 255]), WAVE_FORMAT_PCM, 1, 8000, 8))
+        np.testing.assert_allclose(samples, [-1.0, 0.0, 127 / 128])
+
+        ints = [0, 1, -1, 8388607, -8388608]
+        raw = b''.join(struct.pack('<i', v)[:3] for v in ints)
+        samples, _ = decode_wav(_wav(raw, WAVE_FORMAT_PCM, 1, 8000, 24))
+        np.testing.assert_allclose(samples, np.array(ints) / 8388608.0)
+
+    def test_pcm32(self):
+        ints = np.array([0, 2 ** 30, -2 ** 31], dtype='<i4')
+        samples, _ = decode_wav(_wav(ints.tobytes(), WAVE_FORMAT_PCM, 1, 8000, 32))
+        np.testing.assert_allclose(samples, ints / 2147483648.0)
+
+    def test_float_and_extensible(self):
+        values = np.array([0.5, -0.25, 1.0], dtype='<f4')
+        samples, _ = decode_wav(_wav(values.tobytes(), WAVE_FORMAT_IEEE_FLOAT, 1, 48000, 32))
+        self.assertEqual(samples.dtype, np.float32)
+        np.testing.assert_array_equal(samples, values)
+
+        samples, sample_rate = decode_wav(
+            _wav(values.tobytes(), WAVE_FORMAT_IEEE_FLOAT, 1, 48000, 32, extensible=True, extra_chunk=True)
+        )
+        self.assertEqual(sample_rate, 48000.0)
+        np.testing.assert_array_equal(samples, values)
+
+    def test_truncated_data_keeps_whole_frames(self):
+        body = _wav(np.arange(4, dtype='<i2').tobytes(), WAVE_FORMAT_PCM, 2, 8000, 16)
+        samples, _ = decode_wav(body[:-1])
+        self.assertEqual(samples.shape, (2, 1))
+
+    def test_invalid_bodies(self):
+        with self.assertRaises(ParseError):
+            decode_wav(b'not a wav file')
+        with self.assertRaises(ParseError):
+            decode_wav(b'RIFF' + struct.pack('<I', 4) + b'WAVE')
+        with self.assertRaises(ParseError):
+            decode_wav(_wav(b'\0' * 8, WAVE_FORMAT_PCM, 1, 8000, 12))
+
+
+class ResultKeyTests(SimpleTestCase):
+
+    def test_non_ascii_mode_name(self):
+        sliders = [{'value': 1.5, 'freqRanges': [[20, 200]]}]
+        key = get_result_key('0' * 32, sliders, mode='Müzik 🎵')
+        self.assertEqual(len(key), 32)
+        self.assertNotEqual(key, get_result_key('0' * 32, sliders, mode='Muzik'))
+
+    def test_quantised_gains_share_a_key(self):
+        key = get_result_key('0' * 32, [{'value': 1.501}], mode='musical')
+        self.assertEqual(key, get_result_key('0' * 32, [{'value': 1.499}], mode='musical'))
+
+
+class StreamEqualizedTests(SimpleTestCase):
+    """/equalize with stream: true, served as a seekable 16-bit WAV"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.sample_rate = 8000
+        self.signal = 0.2 * np.random.default_rng(3).standard_normal(3000)
+        self.sliders = [{'value': 1.8, 'freqRanges': [[200, 700]]}]
+
+    def _stream_path(self):
+        response = self.client.post('/api/equalize', {'signal': self.signal.tolist(), 'sampleRate': self.sample_rate,
+                                                      'sliders': self.sliders, 'stream': True}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['streamUrl'].split('testserver', 1)[1]
+
+    def test_stream_matches_render(self):
+        response = self.client.get(self._stream_path())
+        self.assertEqual(response.status_code, 200)
+        samples, sample_rate = decode_wav(b''.join(response.streaming_content))
+        self.assertEqual(sample_rate, self.sample_rate)
+        expected = apply_equalization_direct(self.signal, self.sample_rate, self.sliders, len(self.signal))
+        np.testing.assert_allclose(samples, expected, atol=2.0 / 32768)
+
+    def test_range_request(self):
+        path = self._stream_path()
+        whole = b''.join(self.client.get(path).streaming_content)
+        response = self.client.get(path, HTTP_RANGE='bytes=44-143')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 44-143/{len(whole)}')
+        self.assertEqual(b''.join(response.streaming_content), whole[44:144])
+
+
+class ParseRangeTests(SimpleTestCase):
+
+    def test_no_or_unsupported_range(self):
+        self.assertIsNone(parse_range(None, 100))
+        self.assertIsNone(parse_range('', 100))
+        self.assertIsNone(parse_range('bytes=-', 100))
+        self.assertIsNone(parse_range('bytes=0-10,20-30', 100))
+        self.assertIsNone(parse_range('items=0-10', 100))
+
+    def test_ranges(self):
+        self.assertEqual(parse_range('bytes=0-99', 100), (0, 99))
+        self.assertEqual(parse_range('bytes=10-', 100), (10, 99))
+        self.assertEqual(parse_range('bytes=10-500', 100), (10, 99))
+        self.assertEqual(parse_range(' bytes=5-5 ', 100), (5, 5))
+
+    def test_suffix_ranges(self):
+        self.assertEqual(parse_range('bytes=-10', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=-500', 100), (0, 99))
+
+    def test_unsatisfiable(self):
+        for header in ['bytes=100-', 'bytes=150-200', 'bytes=20-10', 'bytes=-0']:
+            with self.assertRaises(ValueError, msg=header):
+                parse_range(header, 100)
+
+
+class PackContainerTests(SimpleTestCase):
+
+    def unpack(self, body):
+        self.assertEqual(body[:4], CONTAINER_MAGIC)
+        version, header_len = struct.unpack_from('<II', body, 4)
+        self.assertEqual(version, CONTAINER_VERSION)
+        header = json.loads(body[12:12 + header_len])
+        arrays = []
+        for entry in header['arrays']:
+            self.assertEqual(entry['offset'] % CONTAINER_ALIGN, 0)
+            self.assertGreaterEqual(entry['offset'], 12 + header_len)
+            blob = np.frombuffer(body, dtype=entry['dtype'], count=entry['nbytes'] // 4, offset=entry['offset'])
+            arrays.append(blob.reshape(entry['shape']))
+        return header['data'], arrays
+
+    def test_round_trip(self):
+        payload = {
+            'sampleRate': np.float64(44100.0),
+            'stems': {'drums': np.arange(5, dtype=np.float64), 'bass': np.ones((2, 3), dtype=np.float32)},
+            'names': ['drums', 'bass'],
+        }
+        skeleton, arrays = split_arrays(payload)
+        data, unpacked = self.unpack(pack_container(skeleton, arrays))
+
+        self.assertEqual(data['sampleRate'], 44100.0)
+        self.assertEqual(data['names'], ['drums', 'bass'])
+        self.assertEqual(data['stems']['drums'], {'$array': 0})
+        self.assertEqual(unpacked[0].dtype, np.dtype('<f4'))
+        np.testing.assert_array_equal(unpacked[0], np.arange(5))
+        self.assertEqual(unpacked[1].shape, (2, 3))
+        np.testing.assert_array_equal(unpacked[1], 1.0)
+
+    def test_alignment_for_odd_sizes(self):
+        arrays = [np.arange(n, dtype=np.float32) for n in (1, 3, 7, 0, 5)]
+        _, unpacked = self.unpack(pack_container({'x': 'y' * 13}, arrays))
+        for original, blob in zip(arrays, unpacked):
+            np.testing.assert_array_equal(blob, original)
+
+    def test_no_arrays(self):
+        data, arrays = self.unpack(pack_container({'a': 1}, []))
+        self.assertEqual(data, {'a': 1})
+        self.assertEqual(arrays, [])
@@ -1,10 +1,10 @@
 from django.urls import path
 from .views import (
-    compute_fft, compute_spectrogram_view, equalize_signal, 
+    compute_fft, compute_spectrogram_view, equalize_signal, stream_equalized_signal, equalize_batch, get_equalized_result,
     separate_music_ai, apply_stem_mixing,
     separate_voices_ai, mix_voices_with_gains
 )
-from . import config_views, settings_views
+from . import config_views, settings_views, signal_views, job_views, cache_views
 
 
 urlpatterns = [
@@ -12,10 +12,26 @@ urlpatterns = [
     path('fft', compute_fft, name='compute_fft'),
     path('spectrogram', compute_spectrogram_view, name='compute_spectrogram'),
     path('equalize', equalize_signal, name='equalize_signal'),
+    path('equalize/batch', equalize_batch, name='equalize_batch'),
+    path('equalize/result/<str:result_key>', get_equalized_result, name='get_equalized_result'),
+    path('equalize/stream/<str:result_key>', stream_equalized_signal, name='stream_equalized_signal'),
     path('separate-music', separate_music_ai, name='separate_music_ai'),
     path('mix-stems', apply_stem_mixing, name='apply_stem_mixing'),
     path('separate-voices', separate_voices_ai, name='separate_voices'),
     path('mix-voices', mix_voices_with_gains, name='mix_voices'),
+
+    # Signal registry endpoints (upload once, reference by signalId)
+    path('signals/upload', signal_views.upload_signal, name='upload_signal'),
+    path('signals/info', signal_views.get_signal_registry_info, name='get_signal_registry_info'),
+    # Processing cache statistics and reset
+    path('cache/info', cache_views.get_cache_info, name='get_cache_info'),
+    path('cache/clear', cache_views.clear_caches, name='clear_caches'),
+    # Asynchronous separation jobs (submit, poll, fetch result, cancel)
+    path('jobs/submit', job_views.submit_separation_job, name='submit_separation_job'),
+    path('jobs/info', job_views.get_job_queue_info, name='get_job_queue_info'),
+    path('jobs/<str:job_id>', job_views.get_job_status, name='get_job_status'),
+    path('jobs/<str:job_id>/result', job_views.get_job_result, name='get_job_result'),
+    path('jobs/<str:job_id>/cancel', job_views.cancel_separation_job, name='cancel_separation_job'),
     # Mode configuration endpoints
     path('modes/all', config_views.get_all_modes, name='get_all_modes'),
     path('modes/config', config_views.get_mode_config, name='get_mode_config'),
@@ -1,127 +1,522 @@
+import os
+import hashlib
 import numpy as np
 import cmath
-from numba import jit, prange, complex128, float64, int32
-from multiprocessing import Pool, cpu_count
-
-# FFT cache for performance optimization
-_fft_cache = {}
-_stft_cache = {}  # NEW: Cache for STFT magnitudes (Spectrograms)
+import threading
+from functools import lru_cache
+from numba import jit, prange, complex128, float64, int32, int64
+import atexit
+from multiprocessing import cpu_count, get_context, shared_memory
+
+from .cache import ByteBudgetCache, CountBoundedCache
+
+# FFT cache for performance optimization (byte budgets configurable via env, in MB)
+_fft_cache = ByteBudgetCache(
+    int(os.environ.get('EQUALIZER_FFT_CACHE_MB', 512)) * 1024 * 1024, name='fft'
+)
+_stft_cache = ByteBudgetCache(  # Cache for STFT magnitudes (Spectrograms)
+    int(os.environ.get('EQUALIZER_STFT_CACHE_MB', 256)) * 1024 * 1024, name='stft'
+)
+_output_cache = ByteBudgetCache(  # Equalized output buffers (float32) by result key
+    int(os.environ.get('EQUALIZER_OUTPUT_CACHE_MB', 256)) * 1024 * 1024, name='output'
+)
+# Slider gains are snapped to this step for rendering and result keys, so
+# nearby positions (presets, undo, reset) share one cached output
+GAIN_QUANT_STEP = float(os.environ.get('EQUALIZER_GAIN_STEP', 0.01))
+_component_cache = ByteBudgetCache(  # Per-band time-domain components by (signal hash, band layout)
+    int(os.environ.get('EQUALIZER_COMPONENT_CACHE_MB', 1024)) * 1024 * 1024, name='components'
+)
+# (signal hash, band layout) pairs rendered once through the direct path;
+# their components are built on the next render (last 1024 pairs)
+_component_requests = CountBoundedCache(1024, name='component_requests')
 
 def clear_fft_cache():
-    """Clear the FFT and STFT cache. Useful for memory management or when signal changes."""
-    global _fft_cache, _stft_cache
+    """Clear the FFT, STFT, output and band component caches. Useful for memory management or when signal changes."""
     _fft_cache.clear()
     _stft_cache.clear()
-    print("🗑️ FFT and STFT caches cleared")
+    _output_cache.clear()
+    _component_cache.clear()
+    _component_requests.clear()
+    print("🗑️ FFT, STFT, output and band component caches cleared")
+
+
+def get_cache_stats():
+    """Size and hit/miss/eviction counters for the FFT, STFT, output, band component and FFT plan caches"""
+    return {'fft': _fft_cache.stats(), 'stft': _stft_cache.stats(), 'output': _output_cache.stats(),
+            'components': _component_cache.stats(), 'fftPlans': _fft_plans.stats()}
+
+
+def quantize_gain(value, step=None):
+    """Snap a slider gain to the quantisation step (GAIN_QUANT_STEP by default)"""
+    step = GAIN_QUANT_STEP if step is None else step
+    if step <= 0:
+        return float(value)
+    return round(round(float(value) / step) * step, 10)
+
+
+def quantize_sliders(sliders, step=None):
+    """Copies of the sliders with their gains snapped to the quantisation step"""
+    return [{**slider, 'value': quantize_gain(slider.get('value', 1.0), step)} for slider in sliders]
+
+
+def get_result_key(signal_hash, sliders, mode=None):
+    """
+    Key for an equalized output: signal digest, mode, the quantised gain
+    vector and the sliders' frequency ranges (modes can be edited, so the
+    name alone does not pin the bands). Slider positions that quantise to
+    the same gains share a key; render with quantize_sliders(sliders) so
+    the cached output matches it.
+    """
+    gains = [quantize_gain(slider.get('value', 1.0)) for slider in sliders]
+    ranges = [
+        [[float(f) for f in freq_range] for freq_range in slider.get('freqRanges', [])]
+        for slider in sliders
+    ]
+    h = hashlib.blake2b(digest_size=16)
+    h.update(signal_hash.encode('utf-8'))
+    h.update(repr((mode, gains, ranges)).encode('utf-8'))
+    return h.hexdigest()
+
+
+def get_cached_output(result_key):
+    """Return (output_signal, sample_rate) for a result key, or None"""
+    return _output_cache.get(result_key)
+
+
+def cache_output(result_key, output_signal, sample_rate):
+    """Store an equalized output as read-only float32 under its result key"""
+    output_signal = np.array(output_signal, dtype=np.float32)
+    output_signal.setflags(write=False)
+    _output_cache.put(result_key, (output_signal, float(sample_rate)))
+    return output_signal
+
+def normalize_output(output_signal):
+    """
+    Scale an equalized output down to a 0.95 peak if it exceeds full scale
+    (near-silent output is left alone). Returns (output_signal, scale).
+    """
+    max_val = np.max(np.abs(output_signal)) if output_signal.size else 0.0
+    if max_val > 1.0:
+        print(f"  🔊 Normalized by {max_val:.2f}x")
+        return output_signal / max_val * 0.95, 0.95 / max_val
+    if max_val < 0.001:
+        print(f"  ⚠️ Warning: Output signal very quiet (max={max_val:.6f})")
+    return output_signal, 1.0
 
 def get_signal_hash(signal, sample_rate):
     """
-    Generate a hash for the signal to detect changes.
-    Uses signal length, sample rate, and a sample of data points.
+    Content digest of the signal for cache keys.
+    BLAKE2b over the raw sample buffer (read through a memoryview, no copy for
+    contiguous arrays) plus dtype, shape and sample rate. Compute it once per
+    request and pass it along with the array.
     """
     # Convert to numpy array if needed
     if not isinstance(signal, np.ndarray):
         signal = np.array(signal, dtype=float)
-    
-    # Use a combination of length, sample rate, and sample points for hash
-    signal_len = len(signal)
-    sample_size = min(100, signal_len)  # Sample first 100 points for hash
-    
-    if signal_len == 0:
-        return hash((0, sample_rate))
-    
-    # Get sample points and convert to tuple for hashing
-    sample_points = tuple(signal[:sample_size].tolist())
-    first_val = float(signal[0])
-    last_val = float(signal[-1])
-    
-    return hash((signal_len, sample_rate, sample_points, first_val, last_val))
+    signal = np.ascontiguousarray(signal)
 
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{signal.dtype.str}|{signal.shape}|{float(sample_rate)}".encode())
+    digest.update(memoryview(signal).cast('B'))
+    return digest.hexdigest()
 
-@jit(complex128[:](complex128[:]), nopython=True, cache=True)
-def fft_custom_iterative(x):
-    n = len(x)
-    
+
+def _next_pow2(n):
+    """Smallest power of two >= n"""
+    return 1 if n <= 1 else 1 << (int(n) - 1).bit_length()
+
+
+# Radices handled natively by the mixed-radix engine
+_MIXED_RADICES = (7, 5, 3, 2)
+
+
+def _factorize_small(n):
+    """
+    Factor n over the radices 2/3/5/7 (pairs of 2s are merged into radix-4 stages).
+    Returns the list of factors, or None if n has a larger prime factor.
+    """
+    factors = []
+    for p in _MIXED_RADICES:
+        while n % p == 0:
+            factors.append(p)
+            n //= p
+    if n != 1:
+        return None
+
+    twos = factors.count(2)
+    factors = [p for p in factors if p != 2] + [4] * (twos // 2) + [2] * (twos % 2)
+    return factors
+
+
+def _next_smooth(n):
+    """Smallest 2/3/5/7-smooth integer >= n (a fast size for the mixed-radix engine)"""
     if n <= 1:
-        return x
+        return 1
+    best = _next_pow2(n)
+    p7 = 1
+    while p7 < best:
+        p5 = p7
+        while p5 < best:
+            p3 = p5
+            while p3 < best:
+                # Smallest power-of-2 multiple of p3 that reaches n
+                candidate = p3 * _next_pow2(-(-n // p3))
+                if candidate < best:
+                    best = candidate
+                p3 *= 3
+            p5 *= 5
+        p7 *= 7
+    return best
+
+
+def _next_fast_size(n):
+    """
+    Smallest 2/3-smooth integer >= n. Radix 2, 3 and 4 stages have unrolled
+    butterflies, so these sizes beat nearby 5/7-heavy smooth sizes (used for
+    the Bluestein inner transform, whose length is free).
+    """
+    if n <= 1:
+        return 1
+    best = _next_pow2(n)
+    p3 = 1
+    while p3 < best:
+        candidate = p3 * _next_pow2(-(-n // p3))
+        if candidate < best:
+            best = candidate
+        p3 *= 3
+    return best
+
+
+class FFTPlan:
+    """
+    Precomputed tables for an n-point FFT of any length.
 
-    # Pad to power of 2
-    log2n = np.log2(n)
-    if log2n != np.floor(log2n):
-        next_pow2 = 2 ** int(np.ceil(log2n))
-        new_x = np.zeros(next_pow2, dtype=np.complex128)
-        new_x[:n] = x
-        x = new_x
-        n = next_pow2
-
-    # Bit-reversal permutation
-    j = 0
-    for i in range(1, n):
-        bit = n >> 1
-        while j & bit:
-            j ^= bit
-            bit >>= 1
-        j ^= bit
-        if i < j:
-            temp = x[i]
-            x[i] = x[j]
-            x[j] = temp
-
-    # Iterative FFT
-    length = 2
-    while length <= n:
-        half_length = length // 2
-        angle = -2.0 * np.pi / length
-        wlen_real = np.cos(angle)
-        wlen_imag = np.sin(angle)
-        
-        for i in range(0, n, length):
-            w_real = 1.0
-            w_imag = 0.0
-            for j in range(half_length):
-                u_real = x[i + j].real
-                u_imag = x[i + j].imag
-                
-                v_real = x[i + j + half_length].real
-                v_imag = x[i + j + half_length].imag
-                
-                vw_real = v_real * w_real - v_imag * w_imag
-                vw_imag = v_real * w_imag + v_imag * w_real
-                
-                x[i + j] = complex(u_real + vw_real, u_imag + vw_imag)
-                x[i + j + half_length] = complex(u_real - vw_real, u_imag - vw_imag)
-                
-                w_temp_real = w_real * wlen_real - w_imag * wlen_imag
-                w_imag = w_real * wlen_imag + w_imag * wlen_real
-                w_real = w_temp_real
-        
-        length *= 2
+    The algorithm is picked from n:
+      - 'mixed'     : n factors over 2/3/5/7 (Stockham mixed-radix, no bit reversal)
+      - 'bluestein' : anything else (chirp-z on a 2/3-smooth plan of length >= 2n-1)
 
-    return x
+    All twiddle and chirp tables are built once so repeated transforms of the
+    same size skip all setup work.
+    """
+
+    def __init__(self, n):
+        if n < 1:
+            raise ValueError(f"FFT plan size must be positive, got {n}")
+
+        self.n = n
+        self.factors = None
+        self.twiddles = None
+        self.chirp = None
+        self.chirp_fft = None
+        self.inner_n = 0
+
+        factors = _factorize_small(n)
+
+        if factors is not None:
+            self.kind = 'mixed'
+            self.factors = np.array(factors, dtype=np.int64)
+            # Twiddles computed directly (no recurrence, no accumulated rounding)
+            self.twiddles = np.exp(-2j * np.pi * np.arange(n) / n)
+        else:
+            self.kind = 'bluestein'
+            m = _next_fast_size(2 * n - 1)
+            self.inner_n = m
+
+            # Chirp w[k] = exp(-i*pi*k^2/n); k^2 reduced mod 2n to keep the phase exact
+            k = np.arange(n, dtype=np.int64)
+            self.chirp = np.exp(-1j * np.pi * ((k * k) % (2 * n)) / n)
+
+            # FFT of the conjugate chirp, wrapped for circular convolution
+            b = np.zeros(m, dtype=np.complex128)
+            b[:n] = np.conj(self.chirp)
+            b[m - n + 1:] = np.conj(self.chirp[1:][::-1])
+            self.chirp_fft = get_fft_plan(m).forward(b)
+
+        # Post-processing twiddles for a 2n-point real transform built on this
+        # plan; only half plans of real transforms need them (see get_fft_plan)
+        self.rfft_twiddles = None
+
+    def build_rfft_twiddles(self):
+        """Add the twiddles for using this plan as the half plan of a 2n-point real FFT"""
+        if self.rfft_twiddles is None:
+            self.rfft_twiddles = np.exp(-2j * np.pi * np.arange(self.n + 1) / (2 * self.n))
+
+    def forward(self, x):
+        """Forward transform of a length-n complex array (input is not modified)"""
+        x = np.asarray(x, dtype=np.complex128)
+
+        if self.kind == 'mixed':
+            return _fft_mixed_radix_kernel(x, self.factors, self.twiddles)
+
+        inner = get_fft_plan(self.inner_n)
+        a = np.zeros(self.inner_n, dtype=np.complex128)
+        a[:self.n] = x * self.chirp
+        conv = inner.inverse(inner.forward(a) * self.chirp_fft)
+        return conv[:self.n] * self.chirp
+
+    def inverse(self, X):
+        """Inverse transform of a length-n complex array"""
+        X = np.asarray(X, dtype=np.complex128)
+        return np.conj(self.forward(np.conj(X))) / self.n
+
+    def forward_rows(self, x):
+        """Forward transform of every row of a (rows x n) complex array, as one batch"""
+        x = np.ascontiguousarray(x, dtype=np.complex128)
+
+        if self.kind == 'mixed':
+            out = np.empty_like(x)
+            _fft_rows_kernel(x, self.factors, self.twiddles, out)
+            return out
+
+        return np.stack([self.forward(row) for row in x])
+
+    def inverse_rows(self, X):
+        """Inverse transform of every row of a (rows x n) complex array"""
+        X = np.asarray(X, dtype=np.complex128)
+        return np.conj(self.forward_rows(np.conj(X))) / self.n
+
+    def nbytes(self):
+        """Memory held by the plan tables"""
+        tables = (self.factors, self.twiddles, self.chirp,
+                  self.chirp_fft, self.rfft_twiddles)
+        return sum(t.nbytes for t in tables if t is not None)
+
+
+# FFT plans keyed by size, LRU within a byte budget (measured with FFTPlan.nbytes)
+_fft_plans = ByteBudgetCache(
+    int(os.environ.get('EQUALIZER_FFT_PLAN_MB', 128)) * 1024 * 1024, name='fft_plans',
+    sizeof=lambda plan: plan.nbytes()
+)
+
+
+def get_fft_plan(n, real=False):
+    """
+    Return the cached FFTPlan for size n, building it on first use.
+    real=True marks it as the half plan of a 2n-point real FFT, which also
+    needs rfft_twiddles.
+    """
+    plan = _fft_plans.get(n)
+    if plan is None:
+        plan = FFTPlan(n)
+    elif not real or plan.rfft_twiddles is not None:
+        return plan
+
+    if real:
+        plan.build_rfft_twiddles()
+    # (Re-)insert so the registry accounts for the tables just built
+    _fft_plans.put(n, plan)
+    return plan
+
+
+def clear_fft_plans():
+    """Drop all cached FFT plans."""
+    _fft_plans.clear()
+
+
+@jit(complex128[:](complex128[:], complex128[:], int64[:], complex128[:]), nopython=True, cache=True)
+def _stockham_stages(src, dst, factors, twiddles):
+    """
+    Stockham autosort FFT for n = product of small radices.
+    twiddles[j] = exp(-2*pi*i*j/n); each stage uses a size-p DFT butterfly
+    followed by the inter-stage twiddle, ping-ponging between src and dst
+    (both are overwritten). Returns whichever buffer holds the result.
+    Radix 2, 3 and 4 have unrolled butterflies, 5/7 use the generic one.
+    """
+    N = len(src)
+    a = np.empty(8, dtype=np.complex128)
+    dft = np.empty(64, dtype=np.complex128)
+
+    n = N
+    s = 1
+    for f in range(len(factors)):
+        p = factors[f]
+        m = n // p
+        dft_step = N // p
+
+        if p == 2:
+            for k in range(m):
+                w1 = twiddles[k * s]
+                for q in range(s):
+                    a0 = src[q + s * k]
+                    a1 = src[q + s * (k + m)]
+                    dst[q + s * (2 * k)] = a0 + a1
+                    dst[q + s * (2 * k + 1)] = (a0 - a1) * w1
+        elif p == 4:
+            for k in range(m):
+                w1 = twiddles[k * s]
+                w2 = twiddles[2 * k * s]
+                w3 = twiddles[3 * k * s]
+                for q in range(s):
+                    a0 = src[q + s * k]
+                    a1 = src[q + s * (k + m)]
+                    a2 = src[q + s * (k + 2 * m)]
+                    a3 = src[q + s * (k + 3 * m)]
+                    t0 = a0 + a2
+                    t1 = a0 - a2
+                    t2 = a1 + a3
+                    # -i * (a1 - a3)
+                    d = a1 - a3
+                    t3 = complex(d.imag, -d.real)
+                    base = q + s * (4 * k)
+                    dst[base] = t0 + t2
+                    dst[base + s] = (t1 + t3) * w1
+                    dst[base + 2 * s] = (t0 - t2) * w2
+                    dst[base + 3 * s] = (t1 - t3) * w3
+        elif p == 3:
+            for k in range(m):
+                w1 = twiddles[k * s]
+                w2 = twiddles[2 * k * s]
+                for q in range(s):
+                    a0 = src[q + s * k]
+                    a1 = src[q + s * (k + m)]
+                    a2 = src[q + s * (k + 2 * m)]
+                    t0 = a1 + a2
+                    t1 = a0 - 0.5 * t0
+                    # -i * sin(2*pi/3) * (a1 - a2)
+                    d = (a1 - a2) * 0.8660254037844386
+                    t2 = complex(d.imag, -d.real)
+                    base = q + s * (3 * k)
+                    dst[base] = a0 + t0
+                    dst[base + s] = (t1 + t2) * w1
+                    dst[base + 2 * s] = (t1 - t2) * w2
+        else:
+            # Size-p DFT matrix for this stage
+            for u in range(p):
+                for t in range(p):
+                    dft[u * p + t] = twiddles[((t * u) % p) * dft_step]
+
+            for k in range(m):
+                for q in range(s):
+                    for t in range(p):
+                        a[t] = src[q + s * (k + t * m)]
+                    for u in range(p):
+                        acc = a[0]
+                        for t in range(1, p):
+                            acc += a[t] * dft[u * p + t]
+                        dst[q + s * (p * k + u)] = acc * twiddles[k * u * s]
+
+        tmp = src
+        src = dst
+        dst = tmp
+        n = m
+        s *= p
+
+    return src
+
+
+@jit(complex128[:](complex128[:], int64[:], complex128[:]), nopython=True, cache=True)
+def _fft_mixed_radix_kernel(x, factors, twiddles):
+    """Mixed-radix FFT of x (input is not modified)"""
+    return _stockham_stages(x.copy(), np.empty(len(x), dtype=np.complex128), factors, twiddles)
+
+
+@jit(nopython=True, parallel=True, cache=True)
+def _fft_rows_kernel(x, factors, twiddles, out):
+    """Mixed-radix FFT of every row of x into out, parallel over rows"""
+    for i in prange(x.shape[0]):
+        src = x[i].copy()
+        dst = np.empty(x.shape[1], dtype=np.complex128)
+        out[i] = _stockham_stages(src, dst, factors, twiddles)
+
+
+@jit(nopython=True, parallel=True, cache=True)
+def _stft_rfft_kernel(frames, window, factors, twiddles, rfft_twiddles, out):
+    """
+    Batched real-input FFT over all STFT frames, parallel over frames.
+    frames is an (n_frames x n_fft) strided view; each row is multiplied by
+    window while being packed into the half-length complex buffer.
+    factors/twiddles describe the n_fft/2 mixed-radix plan; the n_fft/2 + 1
+    bins of frame i are written to out[i, :].
+    """
+    n_frames = out.shape[0]
+    M = out.shape[1] - 1
+
+    for i in prange(n_frames):
+        src = np.empty(M, dtype=np.complex128)
+        dst = np.empty(M, dtype=np.complex128)
+
+        for m in range(M):
+            j = 2 * m
+            src[m] = complex(frames[i, j] * window[j],
+                             frames[i, j + 1] * window[j + 1])
+
+        Z = _stockham_stages(src, dst, factors, twiddles)
+
+        # Split into even/odd spectra (Z[M] wraps around to Z[0])
+        for k in range(M + 1):
+            zk = Z[k % M]
+            zr = np.conj(Z[(M - k) % M])
+            even = 0.5 * (zk + zr)
+            odd = -0.5j * (zk - zr)
+            out[i, k] = even + rfft_twiddles[k] * odd
+
+
+@jit(nopython=True, parallel=True, cache=True)
+def _irfft_rows_kernel(spectra, gains, factors, twiddles, rfft_twiddles, out):
+    """
+    Batched inverse real FFT of spectra * gains, one output row per
+    out[i, :], parallel over rows. spectra and gains are (rows x n/2 + 1)
+    or (1 x n/2 + 1), the single row being broadcast (one spectrum with
+    many gain masks, or many channels with one mask). factors/twiddles
+    describe the n/2 mixed-radix plan. The gained spectra are never
+    materialised: each row is packed straight into the half-length buffer.
+    """
+    rows = out.shape[0]
+    M = spectra.shape[1] - 1
+    spectra_step = 1 if spectra.shape[0] > 1 else 0
+    gains_step = 1 if gains.shape[0] > 1 else 0
+
+    for i in prange(rows):
+        si = i * spectra_step
+        gi = i * gains_step
+        src = np.empty(M, dtype=np.complex128)
+        dst = np.empty(M, dtype=np.complex128)
+
+        # Rebuild Z = E + i*O, conjugated so the forward stages compute the inverse
+        for m in range(M):
+            xa = spectra[si, m] * gains[gi, m]
+            xb = np.conj(spectra[si, M - m] * gains[gi, M - m])
+            even = 0.5 * (xa + xb)
+            odd = 0.5 * (xa - xb) * np.conj(rfft_twiddles[m])
+            src[m] = np.conj(even + 1j * odd)
+
+        Z = _stockham_stages(src, dst, factors, twiddles)
+
+        for m in range(M):
+            out[i, 2 * m] = Z[m].real / M
+            out[i, 2 * m + 1] = -Z[m].imag / M
 
 
 def fft_custom(x):
-    """Custom FFT with validation"""
+    """
+    Custom FFT with validation. Transforms at the exact input length (no padding).
+    2-D input (channels x samples) is transformed row by row in one batch.
+    """
     try:
         x = np.array(x, dtype=complex)
+
+        if x.ndim > 2:
+            raise ValueError("Input must be 1-D or (channels x samples)")
         
-        if len(x) == 0:
+        if x.shape[-1] == 0:
             raise ValueError("Input signal is empty")
         
         if np.any(np.isnan(x)) or np.any(np.isinf(x)):
             x = np.nan_to_num(x, nan=0.0, posinf=0.0, neginf=0.0)
         
-        return fft_custom_iterative(x)
+        if x.ndim == 2:
+            return get_fft_plan(x.shape[1]).forward_rows(x)
+        return get_fft_plan(len(x)).forward(x)
     except Exception as e:
         print(f"❌ FFT Error: {e}")
         raise
 
 
 def ifft_custom(x):
-    """Custom IFFT with error handling"""
+    """Custom IFFT with error handling (1-D or channels x samples)"""
     try:
         x = np.array(x, dtype=complex)
-        N = len(x)
+        N = x.shape[-1]
 
         if N <= 1:
             return x
@@ -129,13 +524,155 @@ def ifft_custom(x):
         if np.any(np.isnan(x)) or np.any(np.isinf(x)):
             x = np.nan_to_num(x, nan=0.0, posinf=0.0, neginf=0.0)
 
-        result = np.conj(fft_custom_iterative(np.conj(x))) / N
-        return result
+        if x.ndim == 2:
+            return get_fft_plan(N).inverse_rows(x)
+        return get_fft_plan(N).inverse(x)
     except Exception as e:
         print(f"❌ IFFT Error: {e}")
         raise
 
 
+def rfft_custom(x):
+    """
+    Real-input FFT at the exact input length, returning the n//2 + 1
+    non-negative frequency bins. For even n the even/odd samples are packed
+    into one half-length complex signal, transformed, then split back apart.
+    2-D input (channels x samples) gives (channels x bins), all rows in one batch.
+    """
+    try:
+        x = np.asarray(x, dtype=np.float64)
+        n = x.shape[-1]
+
+        if n == 0:
+            raise ValueError("Input signal is empty")
+
+        if not np.all(np.isfinite(x)):
+            x = np.nan_to_num(x, nan=0.0, posinf=0.0, neginf=0.0)
+
+        if x.ndim == 2:
+            return _rfft_rows(x)
+
+        if n % 2 == 1:
+            # Odd length: no half-length packing, use a full complex transform
+            return get_fft_plan(n).forward(x)[:n // 2 + 1]
+
+        M = n // 2
+
+        # Half-length complex transform of z[m] = x[2m] + i*x[2m+1]
+        plan = get_fft_plan(M, real=True)
+        z = np.empty(M, dtype=np.complex128)
+        z.real = x[0::2]
+        z.imag = x[1::2]
+        Z = plan.forward(z)
+
+        # Split into even/odd spectra (Z[M] wraps around to Z[0])
+        Z_ext = np.append(Z, Z[0])
+        Z_rev = np.conj(Z_ext[::-1])
+        even = 0.5 * (Z_ext + Z_rev)
+        odd = -0.5j * (Z_ext - Z_rev)
+
+        return even + plan.rfft_twiddles * odd
+    except Exception as e:
+        print(f"❌ RFFT Error: {e}")
+        raise
+
+
+def irfft_custom(X, n=None):
+    """
+    Inverse of rfft_custom. Takes the n//2 + 1 non-negative frequency bins
+    and returns the real signal of length n (default 2 * (len(X) - 1)).
+    The spectrum is truncated or zero-padded to n//2 + 1 bins if needed.
+    2-D input (channels x bins) gives (channels x n).
+    """
+    try:
+        X = np.asarray(X, dtype=np.complex128)
+
+        if n is None:
+            n = 2 * (X.shape[-1] - 1)
+        if n < 1:
+            raise ValueError("Output length must be positive")
+
+        n_bins = n // 2 + 1
+        if X.shape[-1] > n_bins:
+            X = X[..., :n_bins]
+        elif X.shape[-1] < n_bins:
+            pad = [(0, 0)] * (X.ndim - 1) + [(0, n_bins - X.shape[-1])]
+            X = np.pad(X, pad, mode='constant')
+
+        if not np.all(np.isfinite(X)):
+            X = np.nan_to_num(X, nan=0.0, posinf=0.0, neginf=0.0)
+
+        # DC (and Nyquist, for even n) of a real signal are real: drop any
+        # imaginary part, e.g. from a truncated spectrum
+        if np.any(X[..., 0].imag) or (n % 2 == 0 and np.any(X[..., -1].imag)):
+            X = X.copy()
+            X[..., 0] = X[..., 0].real
+            if n % 2 == 0:
+                X[..., -1] = X[..., -1].real
+
+        if X.ndim == 2:
+            return _irfft_rows(X, np.ones((1, n_bins)), n)
+
+        if n % 2 == 1:
+            # Odd length: rebuild the Hermitian spectrum and invert it in full
+            full = np.empty(n, dtype=np.complex128)
+            full[:n_bins] = X
+            full[n_bins:] = np.conj(X[1:][::-1])
+            return np.real(get_fft_plan(n).inverse(full))
+
+        M = n // 2
+        plan = get_fft_plan(M, real=True)
+
+        # Rebuild the half-length complex spectrum Z = E + i*O
+        X_rev = np.conj(X[::-1])
+        even = 0.5 * (X + X_rev)
+        odd = 0.5 * (X - X_rev) * np.conj(plan.rfft_twiddles)
+        Z = (even + 1j * odd)[:M]
+
+        z = plan.inverse(Z)
+
+        x = np.empty(n, dtype=np.float64)
+        x[0::2] = z.real
+        x[1::2] = z.imag
+        return x
+    except Exception as e:
+        print(f"❌ IRFFT Error: {e}")
+        raise
+
+
+def _rfft_rows(x):
+    """rfft_custom of every row of a (rows x n) real array"""
+    n = x.shape[1]
+    plan = get_fft_plan(n // 2, real=True) if n % 2 == 0 and n > 2 else None
+
+    if plan is not None and plan.kind == 'mixed':
+        out = np.empty((x.shape[0], n // 2 + 1), dtype=np.complex128)
+        _stft_rfft_kernel(x, np.ones(n), plan.factors, plan.twiddles, plan.rfft_twiddles, out)
+        return out
+
+    return np.stack([rfft_custom(row) for row in x])
+
+
+def _irfft_rows(spectra, gains, n, out=None):
+    """
+    Real signals of length n for spectra * gains, both (rows x n//2 + 1)
+    or (1 x n//2 + 1) broadcast against the other. Returns (rows x n)
+    float64, or writes into out (any float dtype) when given.
+    """
+    rows = max(spectra.shape[0], gains.shape[0])
+    plan = get_fft_plan(n // 2, real=True) if n % 2 == 0 and n > 2 else None
+    if out is None:
+        out = np.empty((rows, n), dtype=np.float64)
+
+    if plan is not None and plan.kind == 'mixed':
+        _irfft_rows_kernel(spectra, gains, plan.factors, plan.twiddles, plan.rfft_twiddles, out)
+        return out
+
+    for i in range(rows):
+        out[i] = irfft_custom(spectra[i if spectra.shape[0] > 1 else 0] * gains[i if gains.shape[0] > 1 else 0], n)
+    return out
+
+
 @jit(float64[:](int32, float64), nopython=True, cache=True)
 def fftfreq_custom(n, d=1.0):
     """Custom FFT frequency bins calculation"""
@@ -155,62 +692,116 @@ def fftfreq_custom(n, d=1.0):
     return frequencies
 
 
+def rfftfreq_custom(n, d=1.0):
+    """Frequency bins (non-negative only) matching rfft_custom for an n-point transform"""
+    if n <= 0:
+        return np.zeros(0, dtype=np.float64)
+    return np.arange(n // 2 + 1, dtype=np.float64) / (d * n)
+
+
+def _frame_view(y, frame_length, hop_length):
+    """
+    Read-only (n_frames x frame_length) view of y with rows hop_length apart.
+    No frame data is copied; rows share memory with y.
+    """
+    n_frames = 1 + (len(y) - frame_length) // hop_length
+    stride = y.strides[0]
+    return np.lib.stride_tricks.as_strided(
+        y, shape=(n_frames, frame_length), strides=(hop_length * stride, stride),
+        writeable=False
+    )
+
+
 def stft_custom(y, n_fft=2048, hop_length=512, win_length=None, window='hann'):
     """
     Custom Short-Time Fourier Transform using custom FFT implementation.
+    Frames are a strided view of the padded signal; the window is applied
+    inside the FFT input stage, so frames are never copied out.
+    2-D input (channels x samples) returns (channels x freq x time).
     """
     if win_length is None:
         win_length = n_fft
 
-    y = np.array(y, dtype=float)
-    signal_length = len(y)
+    y = np.asarray(y, dtype=float)
+    if y.ndim > 2:
+        raise ValueError("Input must be 1-D or (channels x samples)")
 
     # Create window function
-    if window == 'hann':
-        window_func = np.array([0.5 * (1 - np.cos(2 * np.pi * n / (win_length - 1)))
-                                if win_length > 1 else 1.0
-                                for n in range(win_length)])
+    n = np.arange(win_length)
+    if win_length <= 1:
+        window_func = np.ones(win_length)
+    elif window == 'hann':
+        window_func = 0.5 * (1 - np.cos(2 * np.pi * n / (win_length - 1)))
     elif window == 'hamming':
-        window_func = np.array([0.54 - 0.46 * np.cos(2 * np.pi * n / (win_length - 1))
-                                if win_length > 1 else 1.0
-                                for n in range(win_length)])
+        window_func = 0.54 - 0.46 * np.cos(2 * np.pi * n / (win_length - 1))
     else:
         window_func = np.ones(win_length)
 
-    # Pad the signal
+    # Window laid out over the full n_fft frame (zero beyond win_length)
+    frame_window = np.zeros(n_fft)
+    n_win = min(win_length, n_fft)
+    frame_window[:n_win] = window_func[:n_win]
+
     pad_length = n_fft // 2
-    y_padded = np.pad(y, (pad_length, pad_length), mode='constant')
 
-    # Calculate number of frames
-    n_frames = 1 + (len(y_padded) - n_fft) // hop_length
+    if y.ndim == 2:
+        return _stft_channels(y, n_fft, hop_length, frame_window, win_length, window)
+
+    # Pad the signal and frame it without copying
+    y_padded = np.pad(y, (pad_length, pad_length), mode='constant')
+    frames = _frame_view(y_padded, n_fft, hop_length)
+    n_frames = frames.shape[0]
+
+    # Batched kernel: even n_fft with a mixed-radix half-length plan
+    if n_fft % 2 == 0 and n_fft >= 2:
+        plan = get_fft_plan(n_fft // 2, real=True)
+        if plan.kind == 'mixed':
+            stft_frames = np.empty((n_frames, n_fft // 2 + 1), dtype=np.complex128)
+            _stft_rfft_kernel(frames, frame_window, plan.factors,
+                              plan.twiddles, plan.rfft_twiddles, stft_frames)
+            # (freq, time) view over the frame-major buffer
+            return stft_frames.T
 
     # Initialize STFT matrix
     stft_matrix = np.zeros((n_fft // 2 + 1, n_frames), dtype=complex)
 
-    # Process each frame
+    # Process each frame (only one windowed frame is alive at a time)
     for i in range(n_frames):
-        start_idx = i * hop_length
-        end_idx = start_idx + n_fft
+        fft_result = rfft_custom(frames[i] * frame_window)
+        stft_matrix[:, i] = fft_result[:n_fft // 2 + 1]
 
-        if end_idx > len(y_padded):
-            frame = np.zeros(n_fft)
-            available_length = len(y_padded) - start_idx
-            frame[:available_length] = y_padded[start_idx:]
-        else:
-            frame = y_padded[start_idx:end_idx]
+    return stft_matrix
 
-        # Apply window
-        if win_length <= n_fft:
-            frame_windowed = np.zeros(n_fft)
-            frame_windowed[:win_length] = frame[:win_length] * window_func
-        else:
-            frame_windowed = frame * window_func[:n_fft]
 
-        # Compute FFT
-        fft_result = fft_custom(frame_windowed)
-        stft_matrix[:, i] = fft_result[:n_fft // 2 + 1]
+def _stft_channels(y, n_fft, hop_length, frame_window, win_length, window):
+    """
+    STFT of every channel of a (channels x samples) signal in one kernel call.
+    Each padded channel is laid out in a row rounded up to a multiple of
+    hop_length, so a single strided view over the flat buffer frames all
+    channels at once; the few frames straddling two rows are dropped.
+    """
+    channels, n = y.shape
+    pad_length = n_fft // 2
+    padded = n + 2 * pad_length
+    n_frames = 1 + (padded - n_fft) // hop_length
 
-    return stft_matrix
+    plan = get_fft_plan(n_fft // 2, real=True) if n_fft % 2 == 0 and n_fft >= 2 else None
+    if plan is None or plan.kind != 'mixed' or n_frames < 1:
+        return np.stack([stft_custom(row, n_fft, hop_length, win_length, window) for row in y])
+
+    row_length = -(-padded // hop_length) * hop_length
+    rows_per_channel = row_length // hop_length
+
+    # Extra n_fft of zeros so the last channel's frames stay in bounds
+    flat = np.zeros(channels * row_length + n_fft, dtype=np.float64)
+    flat[:channels * row_length].reshape(channels, row_length)[:, pad_length:pad_length + n] = y
+
+    frames = _frame_view(flat, n_fft, hop_length)[:channels * rows_per_channel]
+    stft_frames = np.empty((frames.shape[0], n_fft // 2 + 1), dtype=np.complex128)
+    _stft_rfft_kernel(frames, frame_window, plan.factors, plan.twiddles, plan.rfft_twiddles, stft_frames)
+
+    # (channels, time, freq) -> (channels, freq, time) view
+    return stft_frames.reshape(channels, rows_per_channel, -1)[:, :n_frames].transpose(0, 2, 1)
 
 
 @jit(float64(float64), nopython=True, cache=True)
@@ -240,35 +831,103 @@ def mel_frequencies_custom(n_mels=128, fmin=0.0, fmax=8000.0):
     return freqs[1:-1]
 
 
-def mel_filter_bank_custom(sr, n_fft, n_mels=128, fmin=0.0, fmax=8000.0):
+class MelFilterBank:
     """
-    Create a mel filter bank matrix.
+    Mel filter bank stored in CSR form (each triangular filter is a short
+    contiguous run of FFT bins). Arrays are read-only because banks are shared
+    through the cache.
     """
+
+    def __init__(self, indptr, indices, data, n_mels, n_bins):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.n_mels = n_mels
+        self.n_bins = n_bins
+        for arr in (indptr, indices, data):
+            arr.setflags(write=False)
+
+    def to_dense(self):
+        """Dense (n_mels x n_bins) matrix"""
+        dense = np.zeros((self.n_mels, self.n_bins))
+        rows = np.repeat(np.arange(self.n_mels), np.diff(self.indptr))
+        dense[rows, self.indices] = self.data
+        return dense
+
+
+@lru_cache(maxsize=32)
+def _build_mel_filter_bank(sr, n_fft, n_mels, fmin, fmax):
+    """Vectorised mel filter bank builder (cached by its arguments)"""
     mel_min = hz_to_mel(fmin)
     mel_max = hz_to_mel(fmax)
 
     mels = np.linspace(mel_min, mel_max, n_mels + 2)
-    mel_freqs = np.array([mel_to_hz(m) for m in mels])
+    mel_freqs = 700.0 * (10.0 ** (mels / 2595.0) - 1.0)
 
     d = 1.0 / sr
     fft_freqs = fftfreq_custom(n_fft, d)
     fft_freqs = fft_freqs[:n_fft // 2 + 1]
 
-    filter_bank = np.zeros((n_mels, len(fft_freqs)))
+    lower = mel_freqs[:-2, np.newaxis]
+    center = mel_freqs[1:-1, np.newaxis]
+    upper = mel_freqs[2:, np.newaxis]
+    freq = fft_freqs[np.newaxis, :]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rising = np.where(center != lower, (freq - lower) / (center - lower), 0.0)
+        falling = np.where(upper != center, (upper - freq) / (upper - center), 0.0)
+
+    filter_bank = np.where((lower <= freq) & (freq <= center), rising,
+                           np.where((center < freq) & (freq <= upper), falling, 0.0))
+
+    rows, cols = np.nonzero(filter_bank)
+    indptr = np.zeros(n_mels + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_mels), out=indptr[1:])
 
-    for i in range(n_mels):
-        lower = mel_freqs[i]
-        center = mel_freqs[i + 1]
-        upper = mel_freqs[i + 2]
+    return MelFilterBank(indptr, cols.astype(np.int64), filter_bank[rows, cols],
+                         n_mels, len(fft_freqs))
 
-        for j in range(len(fft_freqs)):
-            freq = fft_freqs[j]
-            if lower <= freq <= center:
-                filter_bank[i, j] = (freq - lower) / (center - lower) if center != lower else 0.0
-            elif center < freq <= upper:
-                filter_bank[i, j] = (upper - freq) / (upper - center) if upper != center else 0.0
 
-    return filter_bank
+def get_mel_filter_bank(sr, n_fft, n_mels=128, fmin=0.0, fmax=8000.0):
+    """Cached sparse mel filter bank for (sr, n_fft, n_mels, fmin, fmax)"""
+    return _build_mel_filter_bank(float(sr), int(n_fft), int(n_mels), float(fmin), float(fmax))
+
+
+def mel_filter_bank_custom(sr, n_fft, n_mels=128, fmin=0.0, fmax=8000.0):
+    """
+    Create a mel filter bank matrix (dense copy of the cached sparse bank).
+    """
+    return get_mel_filter_bank(sr, n_fft, n_mels=n_mels, fmin=fmin, fmax=fmax).to_dense()
+
+
+@jit(nopython=True, parallel=True, cache=True)
+def _mel_project_kernel(indptr, indices, data, power, out):
+    """out[t, i] = sum of filter i weights times power[t, bins of filter i], parallel over frames"""
+    n_frames = power.shape[0]
+    n_mels = len(indptr) - 1
+
+    for t in prange(n_frames):
+        for i in range(n_mels):
+            acc = 0.0
+            for j in range(indptr[i], indptr[i + 1]):
+                acc += data[j] * power[t, indices[j]]
+            out[t, i] = acc
+
+
+def mel_project(mel_bank, power):
+    """
+    Project a (bins x frames) power spectrogram onto a MelFilterBank.
+    Only the nonzero filter weights are touched. Returns (n_mels x frames).
+    """
+    power = np.asarray(power, dtype=np.float64)
+    if power.shape[0] != mel_bank.n_bins:
+        raise ValueError(f"Power has {power.shape[0]} bins, filter bank expects {mel_bank.n_bins}")
+
+    # Work frame-major: stft_custom hands back a (freq, time) view of a frame-major buffer
+    power_frames = power.T
+    out = np.empty((power_frames.shape[0], mel_bank.n_mels))
+    _mel_project_kernel(mel_bank.indptr, mel_bank.indices, mel_bank.data, power_frames, out)
+    return out.T
 
 
 def power_to_db_custom(S, ref=1.0, amin=1e-10, top_db=80.0):
@@ -302,6 +961,9 @@ def compute_spectrogram(samples, sr, n_fft=2048, hop_length=512, n_mels=128, fma
             raise ValueError(f"Invalid sample rate: {sr}")
         
         samples = np.array(samples, dtype=float)
+        if samples.ndim == 2:
+            # One display spectrogram: multichannel input is shown as its mix
+            samples = samples.mean(axis=0)
         if np.any(np.isnan(samples)) or np.any(np.isinf(samples)):
             print("⚠️ Warning: Cleaning NaN/Inf from samples")
             samples = np.nan_to_num(samples, nan=0.0, posinf=0.0, neginf=0.0)
@@ -318,8 +980,8 @@ def compute_spectrogram(samples, sr, n_fft=2048, hop_length=512, n_mels=128, fma
             magnitude = np.abs(stft)
             power = magnitude ** 2
 
-            mel_bank = mel_filter_bank_custom(sr, n_fft, n_mels=n_mels, fmin=0.0, fmax=fmax)
-            mel_spectrogram = np.dot(mel_bank, power)
+            mel_bank = get_mel_filter_bank(sr, n_fft, n_mels=n_mels, fmin=0.0, fmax=fmax)
+            mel_spectrogram = mel_project(mel_bank, power)
 
             epsilon = 1e-10
             mel_spectrogram = np.maximum(mel_spectrogram, epsilon)
@@ -380,7 +1042,11 @@ def compute_spectrogram(samples, sr, n_fft=2048, hop_length=512, n_mels=128, fma
 
 
 def fft_magnitude_phase(signal_data):
-    """Compute FFT and return magnitude and phase"""
+    """
+    Compute FFT and return magnitude and phase.
+    Returns only the non-negative frequency bins (real-input transform)
+    of a transform taken at the exact signal length.
+    """
     try:
         signal_data = np.array(signal_data, dtype=float)
         
@@ -390,7 +1056,7 @@ def fft_magnitude_phase(signal_data):
         if np.any(np.isnan(signal_data)) or np.any(np.isinf(signal_data)):
             signal_data = np.nan_to_num(signal_data, nan=0.0, posinf=0.0, neginf=0.0)
         
-        fft_result = fft_custom(signal_data)
+        fft_result = rfft_custom(signal_data)
         magnitude = np.abs(fft_result)
         phase = np.angle(fft_result)
 
@@ -402,27 +1068,33 @@ def fft_magnitude_phase(signal_data):
 # ==========================================
 # NEW OPTIMIZED FUNCTION FOR INSTANT PREVIEW
 # ==========================================
-def apply_filter_to_spectrogram(original_signal, sample_rate, sliders, n_fft=2048, hop_length=512, n_mels=128, fmax=8000):
+def apply_filter_to_spectrogram(original_signal, sample_rate, sliders, n_fft=2048, hop_length=512, n_mels=128, fmax=8000,
+                                signal_hash=None):
     """
     Applies EQ gains directly to the cached Spectrogram magnitudes.
     Bypasses IFFT and Re-STFT. Extremely fast (~50ms response).
+    signal_hash: precomputed get_signal_hash digest (computed here if omitted).
     """
     try:
         if not isinstance(original_signal, np.ndarray):
             original_signal = np.array(original_signal, dtype=float)
 
-        signal_hash = get_signal_hash(original_signal, sample_rate)
+        if signal_hash is None:
+            signal_hash = get_signal_hash(original_signal, sample_rate)
+
+        # The graph shows one spectrogram: multichannel input is previewed as its mix
+        if original_signal.ndim == 2:
+            original_signal = original_signal.mean(axis=0)
+        stft_key = (signal_hash, n_fft, hop_length)
         
         # 1. Get or Compute Base STFT (Cached)
-        if signal_hash in _stft_cache:
-            # Retrieve magnitude from cache
-            stft_magnitude = _stft_cache[signal_hash]
-        else:
+        stft_magnitude = _stft_cache.get(stft_key)
+        if stft_magnitude is None:
             # Compute from scratch
             stft_complex = stft_custom(original_signal, n_fft=n_fft, hop_length=hop_length)
             stft_magnitude = np.abs(stft_complex)
             # Cache the magnitude (we don't need phase for visualization)
-            _stft_cache[signal_hash] = stft_magnitude
+            _stft_cache.put(stft_key, stft_magnitude)
 
         # 2. Build Frequency Gain Vector
         # The STFT has rows corresponding to frequency bins. We need a gain value for each row.
@@ -453,8 +1125,8 @@ def apply_filter_to_spectrogram(original_signal, sample_rate, sliders, n_fft=204
         power = modified_magnitude ** 2
         
         # Use Mel Filter Bank
-        mel_bank = mel_filter_bank_custom(sample_rate, n_fft, n_mels=n_mels, fmin=0.0, fmax=fmax)
-        mel_spectrogram = np.dot(mel_bank, power)
+        mel_bank = get_mel_filter_bank(sample_rate, n_fft, n_mels=n_mels, fmin=0.0, fmax=fmax)
+        mel_spectrogram = mel_project(mel_bank, power)
         
         epsilon = 1e-10
         mel_spectrogram = np.maximum(mel_spectrogram, epsilon)
@@ -492,9 +1164,13 @@ def apply_filter_to_spectrogram(original_signal, sample_rate, sliders, n_fft=204
         return {'z': [], 'x': [], 'y': []}
 
 
-def apply_equalization(signal, sample_rate, sliders):
+def apply_equalization(signal, sample_rate, sliders, signal_hash=None, normalize=True):
     """
     Apply equalization with proper frequency removal and identity preservation
+    signal_hash: precomputed get_signal_hash digest (computed here if omitted).
+    signal is 1-D or (channels x samples); all channels share one gain mask,
+    one batched transform and one cache entry.
+    normalize=False skips the peak normalization (see normalize_output).
     """
     try:
         if not sliders or len(sliders) == 0:
@@ -503,7 +1179,10 @@ def apply_equalization(signal, sample_rate, sliders):
 
         signal = np.array(signal, dtype=float)
 
-        if len(signal) == 0:
+        if signal.ndim > 2:
+            raise ValueError("Signal must be 1-D or (channels x samples)")
+
+        if signal.size == 0:
             return signal
 
         # Clean data
@@ -523,13 +1202,24 @@ def apply_equalization(signal, sample_rate, sliders):
             print("✅ All sliders at unity gain - returning original signal (identity)")
             return signal
 
-        original_length = len(signal)
+        original_length = signal.shape[-1]
         
         # Generate signal hash for caching
-        signal_hash = get_signal_hash(signal, sample_rate)
+        if signal_hash is None:
+            signal_hash = get_signal_hash(signal, sample_rate)
         
-        print(f"\n🎚️ Starting equalization: {original_length} samples @ {sample_rate}Hz")
-        result = apply_equalization_direct(signal, sample_rate, sliders, original_length, signal_hash)
+        channels = signal.shape[0] if signal.ndim == 2 else 1
+        print(f"\n🎚️ Starting equalization: {original_length} samples x {channels} channel(s) @ {sample_rate}Hz")
+        plan = get_band_plan(sliders, sample_rate) if original_length >= MULTIRATE_MIN_SAMPLES else None
+        if plan is not None:
+            result = apply_equalization_multirate(signal, sample_rate, sliders, original_length, plan, signal_hash,
+                                                  normalize)
+        elif original_length >= PARALLEL_MIN_SAMPLES and PARALLEL_WORKERS > 1:
+            result = apply_equalization_chunked_parallel(signal, sample_rate, sliders, original_length, signal_hash,
+                                                         normalize)
+        else:
+            result = apply_equalization_incremental(signal, sample_rate, sliders, original_length, signal_hash,
+                                                    normalize)
         print(f"✅ Equalization complete\n")
         
         return result
@@ -541,32 +1231,44 @@ def apply_equalization(signal, sample_rate, sliders):
         raise
 
 
-def apply_equalization_direct(signal, sample_rate, sliders, original_length, signal_hash=None):
+def _get_cached_spectrum(signal, sample_rate, signal_hash=None, rfft=None):
+    """
+    Half spectrum and its frequencies for a signal, through the FFT cache.
+    Multichannel signals give a (channels x bins) spectrum under one entry.
+    rfft replaces rfft_custom for the transform.
+    """
+    cache_key = signal_hash if signal_hash is not None else get_signal_hash(signal, sample_rate)
+
+    cached = _fft_cache.get(cache_key)
+    if cached is not None:
+        print(f"✅ Using cached FFT (cache hit)")
+        return cached
+
+    # Compute FFT and cache it
+    print(f"💾 Computing FFT (cache miss)")
+    fft_result = (rfft or rfft_custom)(signal)
+    frequencies = rfftfreq_custom(signal.shape[-1], 1.0 / sample_rate)
+    _fft_cache.put(cache_key, (fft_result, frequencies))
+    print(f"💾 FFT cached for future use")
+    return fft_result, frequencies
+
+
+def apply_equalization_direct(signal, sample_rate, sliders, original_length, signal_hash=None, normalize=True):
     """
     Direct FFT processing with PROPER frequency removal/boosting
     SUPPORTS ALL GAIN VALUES: 0.0 (mute) to 2.0 (2x boost)
     Uses FFT caching for performance optimization.
+    The signal is real, so only the non-negative half of the spectrum is
+    computed, cached and inverted (rfft_custom / irfft_custom). The transform
+    runs at the exact signal length, so no power-of-2 padding leaks into the
+    equalized spectrum.
     """
     print(f"🎛️ Applying equalization: {len(sliders)} sliders, signal length: {original_length}")
     
-    # Check FFT cache
-    cache_key = signal_hash if signal_hash is not None else get_signal_hash(signal, sample_rate)
+    fft_result, frequencies = _get_cached_spectrum(signal, sample_rate, signal_hash)
     
-    if cache_key in _fft_cache:
-        fft_result, frequencies = _fft_cache[cache_key]
-        print(f"✅ Using cached FFT (cache hit)")
-    else:
-        # Compute FFT and cache it
-        print(f"💾 Computing FFT (cache miss)")
-        fft_result = fft_custom(signal)
-        N = len(fft_result)
-        d = 1.0 / sample_rate
-        frequencies = fftfreq_custom(N, d)
-        # Cache the FFT result and frequencies
-        _fft_cache[cache_key] = (fft_result, frequencies)
-        print(f"💾 FFT cached for future use")
-    
-    N = len(fft_result)
+    N = fft_result.shape[-1]
+    n_fft = signal.shape[-1]
     
     # Start with unity gain everywhere (1.0 = no change)
     gain_mask = np.ones(N, dtype=np.float64)  # Use float64 for better precision
@@ -599,9 +1301,8 @@ def apply_equalization_direct(signal, sample_rate, sliders, original_length, sig
             if max_freq > sample_rate / 2:
                 max_freq = sample_rate / 2
 
-            # Apply to BOTH positive AND negative frequencies
-            abs_frequencies = np.abs(frequencies)
-            freq_mask = (abs_frequencies >= min_freq) & (abs_frequencies <= max_freq)
+            # Half spectrum: negative frequencies are implied by symmetry
+            freq_mask = (frequencies >= min_freq) & (frequencies <= max_freq)
             
             affected_bins = np.sum(freq_mask)
             if affected_bins > 0:
@@ -615,7 +1316,7 @@ def apply_equalization_direct(signal, sample_rate, sliders, original_length, sig
     
     if modified_bins == 0:
         print("✅ No frequency bins modified - returning original signal")
-        return signal[:original_length]
+        return signal[..., :original_length]
 
     zeroed_bins = np.sum(np.abs(gain_mask) < 1e-9)
     print(f"  📊 Modified {modified_bins}/{N} bins, zeroed {zeroed_bins} bins")
@@ -630,63 +1331,755 @@ def apply_equalization_direct(signal, sample_rate, sliders, original_length, sig
     print(f"  ⚡ Energy ratio: {energy_ratio:.4f}")
 
     # Convert back to time domain
-    output_signal = ifft_custom(fft_result_equalized)
-    output_signal = np.real(output_signal)
+    output_signal = irfft_custom(fft_result_equalized, n_fft)
 
     # Truncate to original length
-    if len(output_signal) > original_length:
-        output_signal = output_signal[:original_length]
-    elif len(output_signal) < original_length:
-        output_signal = np.pad(output_signal, (0, original_length - len(output_signal)), mode='constant')
+    if output_signal.shape[-1] > original_length:
+        output_signal = output_signal[..., :original_length]
+    elif output_signal.shape[-1] < original_length:
+        pad = [(0, 0)] * (output_signal.ndim - 1) + [(0, original_length - output_signal.shape[-1])]
+        output_signal = np.pad(output_signal, pad, mode='constant')
 
-    # Normalize to prevent clipping (but don't if signal is near-zero)
-    max_val = np.max(np.abs(output_signal))
-    if max_val > 1.0:
-        output_signal = output_signal / max_val * 0.95
-        print(f"  🔊 Normalized by {max_val:.2f}x")
-    elif max_val < 0.001:
-        print(f"  ⚠️ Warning: Output signal very quiet (max={max_val:.6f})")
+    if normalize:
+        output_signal, _ = normalize_output(output_signal)
 
     return output_signal
     
-def apply_equalization_chunked(signal, sample_rate, sliders, original_length, chunk_size=16384, overlap=4096):
-    """Chunked processing with overlap-add"""
-    if chunk_size & (chunk_size - 1) != 0:
-        chunk_size = 2 ** int(np.ceil(np.log2(chunk_size)))
-    
-    hop_size = chunk_size - overlap
-    num_chunks = int(np.ceil((len(signal) - overlap) / hop_size))
-    padded_length = (num_chunks - 1) * hop_size + chunk_size
-    
-    signal_padded = np.pad(signal, (0, max(0, padded_length - len(signal))), mode='constant')
-    window = np.hanning(chunk_size)
-    
-    output_signal = np.zeros(padded_length, dtype=float)
-    window_sum = np.zeros(padded_length, dtype=float)
-    
-    for i in range(num_chunks):
-        start_idx = i * hop_size
-        end_idx = start_idx + chunk_size
-        
-        chunk = signal_padded[start_idx:end_idx] * window
-        processed_chunk = apply_equalization_direct(chunk, sample_rate, sliders, chunk_size)
-        processed_chunk = processed_chunk[:chunk_size] * window
-        
-        output_signal[start_idx:end_idx] += processed_chunk
-        window_sum[start_idx:end_idx] += window ** 2
-    
-    window_sum[window_sum < 1e-8] = 1.0
-    output_signal = output_signal / window_sum
-    output_signal = output_signal[:original_length]
-    
-    max_val = np.max(np.abs(output_signal))
-    if max_val > 1.0:
-        output_signal = output_signal / max_val * 0.95
-    
+def get_band_layout(sliders, sample_rate):
+    """
+    Validated frequency ranges of every slider as a hashable tuple.
+    Only the ranges count (not the gains), so all renders of one mode on a
+    signal share a layout.
+    """
+    layout = []
+    for slider in sliders:
+        ranges = []
+        for freq_range in slider.get('freqRanges', []) or []:
+            if len(freq_range) != 2:
+                continue
+            min_freq = float(freq_range[0])
+            max_freq = float(freq_range[1])
+            if min_freq >= max_freq or min_freq < 0:
+                continue
+            ranges.append((min_freq, min(max_freq, sample_rate / 2)))
+        layout.append(tuple(ranges))
+    return tuple(layout)
+
+
+def get_band_regions(frequencies, layout):
+    """
+    Group spectrum bins into regions covered by the same slider ranges.
+    Returns (region_of_bin, exponents): exponents[r, i] counts slider i's
+    ranges covering region r, so region r is scaled by
+    prod_i g_i ** exponents[r, i]. Returns None when the layout has too many
+    overlapping ranges to encode.
+    """
+    # Per-bin coverage count of every slider
+    coverage = np.zeros((len(layout), len(frequencies)), dtype=np.int64)
+    for i, ranges in enumerate(layout):
+        for min_freq, max_freq in ranges:
+            coverage[i] += (frequencies >= min_freq) & (frequencies <= max_freq)
+
+    # One integer code per distinct coverage pattern (mixed radix over sliders)
+    base = int(coverage.max()) + 1 if coverage.size else 1
+    if len(layout) * np.log2(base) >= 62:
+        return None
+    weights = base ** np.arange(len(layout), dtype=np.int64)
+    codes, region_of_bin = np.unique(weights @ coverage, return_inverse=True)
+    exponents = (codes[:, None] // weights[None, :]) % base
+    return region_of_bin, exponents.astype(np.float64)
+
+
+def build_band_components(signal, sample_rate, layout, signal_hash=None, max_bytes=None):
+    """
+    Split a signal into time-domain components, one per region of the
+    spectrum covered by the same slider ranges (see get_band_regions). Bins
+    outside every range (the residual) always keep unity gain, so they get no
+    component: the output for gains g is
+    signal + sum_r (prod_i g_i ** exponents[r, i] - 1) * components[r] (see
+    render_band_components), matching apply_equalization_direct.
+
+    Returns (components, exponents): components is (regions x samples), or
+    (regions x channels x samples) for multichannel signals, in float32. All
+    components come out of one batched inverse transform.
+    Returns None when the layout cannot be encoded or the components would
+    take more than max_bytes.
+    """
+    fft_result, frequencies = _get_cached_spectrum(signal, sample_rate, signal_hash)
+    n_fft = signal.shape[-1]
+
+    regions = get_band_regions(frequencies, layout)
+    if regions is None:
+        return None
+    region_of_bin, exponents = regions
+    kept = np.flatnonzero(exponents.any(axis=1))
+
+    channels = signal.shape[:-1]
+    if max_bytes is not None and len(kept) * int(np.prod(channels)) * n_fft * 4 > max_bytes:
+        print(f"⚠️ {len(kept)} band components do not fit the component cache")
+        return None
+
+    print(f"🧩 Building {len(kept)} band components ({len(layout)} sliders)")
+    # Region indicator matrix as the gains of one batched inverse transform
+    indicator = (region_of_bin[None, :] == kept[:, None]).view(np.uint8)
+    components = np.empty((len(kept),) + channels + (n_fft,), dtype=np.float32)
+    spectra = np.atleast_2d(fft_result)
+    channel_components = components[:, None] if signal.ndim == 1 else components
+    for c in range(spectra.shape[0]):
+        _irfft_rows(spectra[c:c + 1], indicator, n_fft, out=channel_components[:, c])
+
+    components.setflags(write=False)
+    return components, exponents[kept]
+
+
+def render_band_components(signal, components, exponents, sliders):
+    """Signal plus the gain-weighted cached band components for the current slider gains"""
+    gains = np.array([float(slider.get('value', 1.0)) for slider in sliders], dtype=np.float64)
+    region_gains = np.prod(gains[None, :] ** exponents, axis=1) - 1.0
+    delta = np.tensordot(region_gains.astype(np.float32), components[..., :signal.shape[-1]], axes=1)
+    return signal + delta
+
+
+def apply_equalization_incremental(signal, sample_rate, sliders, original_length, signal_hash=None, normalize=True):
+    """
+    Equalize through cached band components: the first render of a
+    (signal, band layout) pair goes through apply_equalization_direct, the
+    second builds the components, and later slider changes are a weighted
+    sum (O(N*k)) instead of a full inverse FFT.
+    Falls back to apply_equalization_direct when the components do not fit
+    the component cache budget.
+    """
+    if signal_hash is None:
+        signal_hash = get_signal_hash(signal, sample_rate)
+
+    layout = get_band_layout(sliders, sample_rate)
+    key = (signal_hash, layout)
+
+    cached = _component_cache.get(key)
+    if cached is None:
+        # A single render of a layout is cheapest direct; build on the next one
+        if _component_requests.get(key) is None:
+            _component_requests.put(key, True)
+            return apply_equalization_direct(signal, sample_rate, sliders, original_length, signal_hash, normalize)
+
+        cached = build_band_components(signal, sample_rate, layout, signal_hash,
+                                       max_bytes=_component_cache.max_bytes)
+        if cached is None or not _component_cache.put(key, cached):
+            return apply_equalization_direct(signal, sample_rate, sliders, original_length, signal_hash, normalize)
+        _component_requests.pop(key)
+    else:
+        print("✅ Using cached band components (cache hit)")
+
+    components, exponents = cached
+    output_signal = render_band_components(signal, components, exponents, sliders)
+
+    if normalize:
+        output_signal, _ = normalize_output(output_signal)
+
     return output_signal
 
 
-def apply_equalization_chunked_parallel(signal, sample_rate, sliders, original_length, chunk_size=32768, overlap=8192):
-    """Parallel chunked processing for long signals"""
-    # Simplified version - falls back to sequential if needed
-    return apply_equalization_chunked(signal, sample_rate, sliders, original_length, chunk_size, overlap)
\ No newline at end of file
+# Parallel engine for long signals (see apply_equalization_chunked_parallel)
+PARALLEL_MIN_SAMPLES = int(os.environ.get('EQUALIZER_PARALLEL_MIN_SAMPLES', 2 ** 22))
+PARALLEL_WORKERS = int(os.environ.get('EQUALIZER_WORKERS', cpu_count()))
+# forkserver: workers do not inherit the server's threads and locks
+PARALLEL_START_METHOD = os.environ.get('EQUALIZER_POOL_START_METHOD', 'forkserver')
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool():
+    """Persistent process pool for parallel equalization (created on first use)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = get_context(PARALLEL_START_METHOD).Pool(processes=PARALLEL_WORKERS)
+            print(f"🧵 Started equalization worker pool ({PARALLEL_WORKERS} processes)")
+        return _pool
+
+
+@atexit.register
+def shutdown_worker_pool():
+    """Stop the worker pool (it is recreated on next use)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.terminate()
+            _pool.join()
+            _pool = None
+
+
+def build_gain_mask(frequencies, sliders, sample_rate):
+    """Per-bin gain for the given frequencies, same rules as apply_equalization_direct"""
+    gain_mask = np.ones(len(frequencies), dtype=np.float64)
+    for slider, ranges in zip(sliders, get_band_layout(sliders, sample_rate)):
+        gain_factor = float(slider.get('value', 1.0))
+        if abs(gain_factor - 1.0) < 1e-9:
+            continue
+        for min_freq, max_freq in ranges:
+            gain_mask[(frequencies >= min_freq) & (frequencies <= max_freq)] *= gain_factor
+    return gain_mask
+
+
+def _split_fft_size(n):
+    """
+    Split a 2/3/5/7-smooth n into n = rows * cols with both close to sqrt(n),
+    for the four-step transform in _fft_pool. Returns None for other sizes.
+    """
+    factors = _factorize_small(n)
+    if factors is None:
+        return None
+    rows = cols = 1
+    for p in sorted(factors, reverse=True):
+        if rows <= cols:
+            rows *= p
+        else:
+            cols *= p
+    return rows, cols
+
+
+def _fft_rows_range(args):
+    """
+    Worker: in-place FFT of rows [first, last) of a (rows x cols) complex
+    matrix in shared memory. With twiddle_size set, row r is then scaled by
+    exp(-2*pi*i * r * k / twiddle_size) (the four-step inter-pass twiddle).
+    Rows of different tasks never overlap, so no two workers write the same data.
+    """
+    name, rows, cols, first, last, twiddle_size = args
+
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        matrix = np.ndarray((rows, cols), dtype=np.complex128, buffer=shm.buf)
+        plan = get_fft_plan(cols)
+        k = np.arange(cols)
+        for r in range(first, last):
+            matrix[r] = plan.forward(matrix[r])
+            if twiddle_size:
+                matrix[r] *= np.exp(-2j * np.pi * ((r * k) % twiddle_size) / twiddle_size)
+    finally:
+        matrix = None
+        shm.close()
+    return last - first
+
+
+def _fft_pool(z):
+    """
+    Forward FFT of a complex array with a smooth length, computed as a
+    four-step transform over the worker pool: z viewed as an (a x b) matrix
+    (z[i + a*j] at [i, j]) gets length-b FFTs along its rows, twiddles, a
+    transpose and length-a FFTs along the other axis. Both matrices live in
+    shared memory; workers receive row ranges only. Same result as
+    fft_custom up to rounding.
+    """
+    n = len(z)
+    a, b = _split_fft_size(n)
+
+    shm = [shared_memory.SharedMemory(create=True, size=n * 16) for _ in range(2)]
+    try:
+        first_pass = np.ndarray((a, b), dtype=np.complex128, buffer=shm[0].buf)
+        second_pass = np.ndarray((b, a), dtype=np.complex128, buffer=shm[1].buf)
+        first_pass[:] = z.reshape(b, a).T
+
+        pool = get_worker_pool()
+        for matrix, name, twiddle_size in ((first_pass, shm[0].name, n), (second_pass, shm[1].name, 0)):
+            rows, cols = matrix.shape
+            # A few tasks per worker for load balancing
+            bounds = np.linspace(0, rows, min(rows, PARALLEL_WORKERS * 4) + 1).astype(int)
+            pool.map(_fft_rows_range, [
+                (name, rows, cols, int(lo), int(hi), twiddle_size)
+                for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo
+            ])
+            if matrix is first_pass:
+                second_pass[:] = first_pass.T
+
+        # second_pass[j, i] holds bin j + b*i; copied out before the segments go
+        result = np.empty(n, dtype=np.complex128)
+        result.reshape(a, b)[:] = second_pass.T
+        return result
+    finally:
+        first_pass = second_pass = None
+        for segment in shm:
+            segment.close()
+            segment.unlink()
+
+
+def _rfft_pool(x):
+    """rfft_custom of a real signal whose length n is even with a smooth n/2, over the worker pool"""
+    M = len(x) // 2
+    z = np.empty(M, dtype=np.complex128)
+    z.real = x[0::2]
+    z.imag = x[1::2]
+    Z = np.append(_fft_pool(z), 0)
+    Z[M] = Z[0]
+
+    # Split into even/odd spectra, as in rfft_custom
+    Z_rev = np.conj(Z[::-1])
+    rfft_twiddles = np.exp(-2j * np.pi * np.arange(M + 1) / (2 * M))
+    return 0.5 * (Z + Z_rev) + rfft_twiddles * (-0.5j * (Z - Z_rev))
+
+
+def _irfft_pool(X, n):
+    """irfft_custom(X, n) for an even n with a smooth n/2, over the worker pool"""
+    M = n // 2
+    rfft_twiddles = np.exp(-2j * np.pi * np.arange(M + 1) / (2 * M))
+    X_rev = np.conj(X[::-1])
+    Z = (0.5 * (X + X_rev) + 1j * (0.5 * (X - X_rev) * np.conj(rfft_twiddles)))[:M]
+
+    # Inverse through the forward transform: conj(F(conj(Z))) / M
+    z = np.conj(_fft_pool(np.conj(Z))) / M
+    x = np.empty(n, dtype=np.float64)
+    x[0::2] = z.real
+    x[1::2] = z.imag
+    return x
+
+
+def apply_equalization_chunked_parallel(signal, sample_rate, sliders, original_length, signal_hash=None, normalize=True):
+    """
+    Parallel equalization for long signals: the same spectrum, gain mask and
+    inverse transform as apply_equalization_direct (so the same output, up
+    to rounding), with the forward (on an FFT cache miss) and inverse
+    transforms split into row blocks over the persistent worker pool (see
+    _fft_pool). Multichannel signals are transformed one channel at a time.
+    Falls back to apply_equalization_direct with a single worker or a
+    transform length the four-step split does not handle.
+    """
+    n_fft = signal.shape[-1]
+    if PARALLEL_WORKERS <= 1 or n_fft % 2 or _split_fft_size(n_fft // 2) is None:
+        return apply_equalization_direct(signal, sample_rate, sliders, original_length, signal_hash, normalize)
+
+    def rfft_rows(x):
+        return np.stack([_rfft_pool(row) for row in x]) if x.ndim == 2 else _rfft_pool(x)
+
+    print(f"🧵 Parallel equalization: {n_fft}-point transform over {PARALLEL_WORKERS} workers")
+    fft_result, frequencies = _get_cached_spectrum(signal, sample_rate, signal_hash, rfft=rfft_rows)
+
+    gain_mask = build_gain_mask(frequencies, sliders, sample_rate)
+    if np.all(np.abs(gain_mask - 1.0) < 1e-9):
+        print("✅ No frequency bins modified - returning original signal")
+        return signal[..., :original_length]
+
+    spectra = np.atleast_2d(fft_result) * gain_mask
+    output_signal = np.stack([_irfft_pool(row, n_fft)[:original_length] for row in spectra])
+    if signal.ndim == 1:
+        output_signal = output_signal[0]
+
+    if normalize:
+        output_signal, _ = normalize_output(output_signal)
+
+    return output_signal
+
+def apply_equalization_batch(signal, sample_rate, slider_sets, signal_hash=None, mode=None):
+    """
+    Equalize one signal with several slider configurations at once.
+    Gains are quantised and each configuration goes through the result
+    cache (same keys as apply_equalization's full renders, see
+    get_result_key); only the misses are rendered. For those the forward
+    FFT is computed (or fetched from the cache) once, the gain masks form a
+    (k x bins) matrix and the k inverse transforms run as one parallel
+    batch. Returns a (k x samples) float32 array, or
+    (k x channels x samples) for multichannel signals; each configuration
+    follows apply_equalization's rules (identity at unity gain, peak
+    normalization).
+    """
+    signal = np.array(signal, dtype=float)
+    if not np.all(np.isfinite(signal)):
+        signal = np.nan_to_num(signal, nan=0.0, posinf=0.0, neginf=0.0)
+
+    if signal.ndim > 2:
+        raise ValueError("Signal must be 1-D or (channels x samples)")
+
+    n = signal.shape[-1]
+    if n == 0:
+        raise ValueError("Signal data is empty")
+
+    if signal_hash is None:
+        signal_hash = get_signal_hash(signal, sample_rate)
+
+    slider_sets = [quantize_sliders(sliders or []) for sliders in slider_sets]
+    result_keys = [get_result_key(signal_hash, sliders, mode) for sliders in slider_sets]
+
+    out = np.empty((len(slider_sets),) + signal.shape, dtype=np.float32)
+    misses = []
+    for i, result_key in enumerate(result_keys):
+        cached = get_cached_output(result_key)
+        if cached is not None:
+            out[i] = cached[0]
+        else:
+            misses.append(i)
+
+    print(f"🎛️ Batch equalization: {len(slider_sets)} configurations "
+          f"({len(slider_sets) - len(misses)} cached), signal length: {n}")
+    if not misses:
+        return out
+
+    spectrum, frequencies = _get_cached_spectrum(signal, sample_rate, signal_hash)
+    gains = np.stack([build_gain_mask(frequencies, slider_sets[i], sample_rate) for i in misses])
+
+    rendered = np.empty((len(misses),) + signal.shape, dtype=np.float32)
+    plan = get_fft_plan(n // 2, real=True) if n % 2 == 0 and n > 2 else None
+
+    # One batch over configurations per channel
+    spectra = np.atleast_2d(spectrum)
+    channel_out = rendered[:, None, :] if signal.ndim == 1 else rendered
+    for c in range(spectra.shape[0]):
+        if plan is not None and plan.kind == 'mixed':
+            _irfft_rows_kernel(spectra[c:c + 1], gains, plan.factors, plan.twiddles, plan.rfft_twiddles,
+                               channel_out[:, c])
+        else:
+            for j in range(len(misses)):
+                channel_out[j, c] = irfft_custom(spectra[c] * gains[j], n)
+
+    for j, i in enumerate(misses):
+        if np.all(np.abs(gains[j] - 1.0) < 1e-9):
+            rendered[j] = signal
+        else:
+            # Normalize to prevent clipping
+            max_val = np.max(np.abs(rendered[j]))
+            if max_val > 1.0:
+                rendered[j] *= 0.95 / max_val
+
+        out[i] = cache_output(result_keys[i], rendered[j], sample_rate)
+
+    return out
+
+
+def mix_signals(signals, gains):
+    """
+    Weighted sum of signals of any lengths, shorter ones zero-padded.
+    Each signal is 1-D (mono) or (channels x samples); mono signals are
+    spread over every channel. Returns 1-D when the mix is mono, otherwise
+    (channels x samples), peak-normalized to 0.95 if it would clip.
+    """
+    arrays = [np.atleast_2d(np.asarray(signal, dtype=np.float32)) for signal in signals]
+    if not arrays:
+        raise ValueError("No signals to mix")
+
+    channels = max(a.shape[0] for a in arrays)
+    length = max(a.shape[1] for a in arrays)
+    for a in arrays:
+        if a.shape[0] not in (1, channels):
+            raise ValueError(f"Cannot mix {a.shape[0]}-channel audio into {channels} channels")
+
+    mixed = np.zeros((channels, length), dtype=np.float32)
+    for a, gain in zip(arrays, gains):
+        mixed[:, :a.shape[1]] += a * np.float32(gain)
+
+    # Normalize to prevent clipping
+    max_val = np.max(np.abs(mixed)) if mixed.size else 0.0
+    if max_val > 1.0:
+        mixed *= 0.95 / max_val
+
+    return mixed[0] if channels == 1 else mixed
+
+
+def mix_stem_matrix(matrix, gains, start=None, end=None):
+    """
+    Weighted sum over the first axis of a (stems x samples) or
+    (stems x channels x samples) float32 matrix, optionally only samples
+    [start, end). Peak-normalized to 0.95 if it would clip, like mix_signals.
+    """
+    length = matrix.shape[-1]
+    start = 0 if start is None else max(0, min(int(start), length))
+    end = length if end is None else max(start, min(int(end), length))
+
+    mixed = np.tensordot(np.asarray(gains, dtype=np.float32), matrix[..., start:end], axes=1)
+
+    # Normalize to prevent clipping
+    max_val = np.max(np.abs(mixed)) if mixed.size else 0.0
+    if max_val > 1.0:
+        mixed *= 0.95 / max_val
+
+    return mixed
+
+
+# Streaming FIR equalizer (overlap-save)
+FIR_DEFAULT_TAPS = 4097
+
+
+def design_equalizer_fir(sample_rate, sliders, num_taps=FIR_DEFAULT_TAPS):
+    """
+    Linear-phase (odd length, symmetric) FIR kernel approximating the slider
+    gains: the gain mask is sampled on a dense frequency grid, inverted to a
+    zero-phase impulse response, truncated to num_taps around zero and
+    Blackman windowed. Band edges get a transition of about 5.5 * sr / num_taps Hz.
+    """
+    if num_taps % 2 == 0:
+        num_taps += 1
+
+    n_grid = _next_pow2(8 * num_taps)
+    frequencies = rfftfreq_custom(n_grid, 1.0 / sample_rate)
+    gains = build_gain_mask(frequencies, sliders, sample_rate)
+    impulse = irfft_custom(gains.astype(np.complex128), n_grid)
+
+    half = num_taps // 2
+    kernel = np.concatenate([impulse[-half:], impulse[:half + 1]])
+    return kernel * np.blackman(num_taps)
+
+
+def equalize_blocks_fir(blocks, sample_rate, sliders, num_taps=FIR_DEFAULT_TAPS, fft_size=None):
+    """
+    Streaming equalizer: yields equalized output blocks for an iterable of
+    input blocks (any sizes), using overlap-save convolution with
+    design_equalizer_fir's kernel.
+
+    Memory is constant (one FFT frame plus kernel spectrum) regardless of
+    signal length, and every FFT frame costs the same. The filter's delay is
+    compensated, so the concatenated output is aligned with and exactly as
+    long as the input. Output is not normalized (blocks are produced before
+    the peak of the whole signal is known).
+    """
+    kernel = design_equalizer_fir(sample_rate, sliders, num_taps)
+    num_taps = len(kernel)
+    delay = (num_taps - 1) // 2
+
+    if fft_size is None:
+        fft_size = _next_pow2(4 * num_taps)
+    if fft_size < 2 * num_taps:
+        raise ValueError("fft_size must be at least twice the kernel length")
+
+    hop = fft_size - num_taps + 1
+    kernel_fft = rfft_custom(np.pad(kernel, (0, fft_size - num_taps)))
+
+    # Frame = [num_taps - 1 previous samples | hop new samples]
+    frame = np.zeros(fft_size, dtype=np.float64)
+    fill = num_taps - 1
+    to_skip = delay  # leading output samples that only cover the filter delay
+    to_emit = 0      # input samples whose output is still owed
+
+    def convolve_frame():
+        # Circular convolution is valid past the first num_taps - 1 samples
+        return irfft_custom(rfft_custom(frame) * kernel_fft, fft_size)[num_taps - 1:]
+
+    def feed(samples):
+        nonlocal fill, to_skip, to_emit
+        pos = 0
+        while pos < len(samples):
+            take = min(fft_size - fill, len(samples) - pos)
+            frame[fill:fill + take] = samples[pos:pos + take]
+            fill += take
+            pos += take
+
+            if fill == fft_size:
+                output = convolve_frame()
+                frame[:num_taps - 1] = frame[hop:]
+                fill = num_taps - 1
+
+                if to_skip:
+                    skipped = min(to_skip, len(output))
+                    output = output[skipped:]
+                    to_skip -= skipped
+                output = output[:to_emit]
+                to_emit -= len(output)
+                if len(output):
+                    yield output
+
+    for block in blocks:
+        block = np.asarray(block, dtype=np.float64).reshape(-1)
+        if len(block) == 0:
+            continue
+        to_emit += len(block)
+        yield from feed(block)
+
+    if to_emit == 0:
+        return
+
+    # Flush: zeros push the delayed tail through, then one zero-padded frame
+    yield from feed(np.zeros(delay))
+    if to_emit:
+        frame[fill:] = 0.0
+        fill_valid = fill - (num_taps - 1)
+        output = convolve_frame()[:fill_valid]
+        if to_skip:
+            output = output[to_skip:]
+        yield output[:to_emit]
+
+
+def render_window_fir(signal, sample_rate, sliders, start, end, num_taps=FIR_DEFAULT_TAPS):
+    """
+    Equalize only samples [start, end) of a signal (1-D or channels x samples)
+    with the streaming FIR engine. The window is widened by the filter delay
+    on both sides, so the cost depends on the window length, not the track.
+    Output is not normalized.
+    """
+    signal = np.asarray(signal, dtype=float)
+    n = signal.shape[-1]
+    start = max(0, min(int(start), n))
+    end = max(start, min(int(end), n))
+
+    delay = num_taps // 2
+    lo = max(0, start - delay)
+    hi = min(n, end + delay)
+
+    rows = np.atleast_2d(signal)
+    window = np.empty((rows.shape[0], end - start), dtype=np.float64)
+    for c, row in enumerate(rows):
+        filtered = np.concatenate(list(equalize_blocks_fir([row[lo:hi]], sample_rate, sliders, num_taps)))
+        window[c] = filtered[start - lo:end - lo]
+
+    return window[0] if signal.ndim == 1 else window
+
+
+# Multirate engine for modes whose sliders all sit in the low band
+# (see apply_equalization_multirate)
+MULTIRATE_MIN_FACTOR = int(os.environ.get('EQUALIZER_MULTIRATE_MIN_FACTOR', 4))
+MULTIRATE_MAX_FACTOR = 64
+MULTIRATE_MIN_SAMPLES = 1 << 16
+
+
+class BandPlan:
+    """
+    Compiled two-band split for a set of slider ranges: everything up to
+    top_freq is handled at sample_rate / factor, the rest passes through.
+    The anti-aliasing / interpolation lowpass (cutoff sample_rate / 2 / factor)
+    is also kept in polyphase form: phases[p, m] = factor * h[p + m * factor].
+    """
+
+    def __init__(self, sample_rate, factor, top_freq, lowpass):
+        self.sample_rate = sample_rate
+        self.factor = factor
+        self.top_freq = top_freq
+        self.lowpass = lowpass
+        self.num_taps = len(lowpass)
+
+        taps_per_phase = -(-self.num_taps // factor)
+        padded = np.zeros(taps_per_phase * factor)
+        padded[:self.num_taps] = lowpass
+        self.phases = np.ascontiguousarray(padded.reshape(taps_per_phase, factor).T) * factor
+        for arr in (self.lowpass, self.phases):
+            arr.setflags(write=False)
+
+    def decimated_length(self, n):
+        return -(-n // self.factor)
+
+
+@lru_cache(maxsize=32)
+def _build_band_plan(layout, sample_rate):
+    """Multirate plan for a band layout (cached by its arguments); None if not worth it"""
+    edges = [max_freq for ranges in layout for _, max_freq in ranges]
+    if not edges:
+        return None
+    top_freq = max(edges)
+
+    # Low band Nyquist at least twice the top edge: the lowpass transition
+    # (top_freq .. sample_rate / factor - top_freq) then stays at least half
+    # a low-band Nyquist wide, so the filter costs ~12 taps per input sample
+    factor = int(sample_rate // (4 * top_freq)) if top_freq > 0 else MULTIRATE_MAX_FACTOR
+    factor = min(factor, MULTIRATE_MAX_FACTOR)
+    if factor < MULTIRATE_MIN_FACTOR:
+        return None
+
+    # Blackman windowed sinc; transition width is about 5.5 * sr / num_taps
+    transition = sample_rate / factor - 2 * top_freq
+    num_taps = int(np.ceil(6.0 * sample_rate / transition)) | 1
+    half = num_taps // 2
+    t = np.arange(num_taps) - half
+    lowpass = np.sinc(t / factor) * np.blackman(num_taps)
+    lowpass /= lowpass.sum()
+
+    print(f"🧮 Compiled band plan: 1/{factor} rate below {top_freq:.0f}Hz, {num_taps} taps")
+    return BandPlan(sample_rate, factor, top_freq, lowpass)
+
+
+def get_band_plan(sliders, sample_rate):
+    """
+    Cached multirate plan for the sliders that change the signal (gain != 1),
+    or None when their ranges reach too close to Nyquist for decimation by
+    at least MULTIRATE_MIN_FACTOR.
+    """
+    active = [slider for slider in sliders if abs(float(slider.get('value', 1.0)) - 1.0) >= 1e-9]
+    return _build_band_plan(get_band_layout(active, sample_rate), float(sample_rate))
+
+
+@jit(nopython=True, parallel=True, cache=True)
+def _decimate_rows_kernel(x, lowpass, factor, out):
+    """
+    Polyphase decimator: the linear-phase lowpass evaluated only at every
+    factor-th sample of each row of x (zero outside x), parallel over
+    output samples. out[c, k] = sum_j lowpass[j] * x[c, k * factor + half - j].
+    """
+    rows, n = x.shape
+    num_taps = len(lowpass)
+    half = num_taps // 2
+
+    for k in prange(out.shape[1]):
+        center = k * factor + half
+        j_lo = max(0, center - (n - 1))
+        j_hi = min(num_taps - 1, center)
+        for c in range(rows):
+            acc = 0.0
+            for j in range(j_lo, j_hi + 1):
+                acc += lowpass[j] * x[c, center - j]
+            out[c, k] = acc
+
+
+@jit(nopython=True, parallel=True, cache=True)
+def _interpolate_add_rows_kernel(u, phases, factor, delay, out):
+    """
+    Polyphase interpolator: upsample each row of u by factor through the
+    lowpass (one phase of taps per output sample) and add it to out,
+    parallel over output samples. delay (the lowpass's half length) is
+    compensated, so u[c, k] lines up with out[c, k * factor].
+    """
+    rows, n_low = u.shape
+    taps_per_phase = phases.shape[1]
+
+    for i in prange(out.shape[1]):
+        t = i + delay
+        p = t % factor
+        k0 = t // factor
+        m_lo = max(0, k0 - (n_low - 1))
+        m_hi = min(taps_per_phase - 1, k0)
+        for c in range(rows):
+            acc = 0.0
+            for m in range(m_lo, m_hi + 1):
+                acc += phases[p, m] * u[c, k0 - m]
+            out[c, i] += acc
+
+
+def apply_equalization_multirate(signal, sample_rate, sliders, original_length, plan, signal_hash=None,
+                                 normalize=True):
+    """
+    Multirate equalization for sliders that only act below plan.top_freq.
+    The signal is split into a low band, decimated by plan.factor with the
+    polyphase lowpass, and the untouched rest. Only the low band is
+    transformed (its spectrum is cached per signal and decimation factor),
+    and only the change (gain - 1) is applied there, so the output is the
+    input plus the interpolated correction: no full-rate transform at all.
+    """
+    if signal_hash is None:
+        signal_hash = get_signal_hash(signal, sample_rate)
+
+    rows = np.ascontiguousarray(np.atleast_2d(signal), dtype=np.float64)
+    n_low = plan.decimated_length(original_length)
+    n_fft = 2 * _next_smooth(-(-n_low // 2))  # zero-padded to a fast even size
+    low_rate = sample_rate / plan.factor
+
+    key = (signal_hash, 'lowband', plan.factor, plan.num_taps)
+    cached = _fft_cache.get(key)
+    if cached is None:
+        print(f"💾 Decimating by {plan.factor} ({original_length} -> {n_low} samples)")
+        low_band = np.zeros((rows.shape[0], n_fft), dtype=np.float64)
+        _decimate_rows_kernel(rows, plan.lowpass, plan.factor, low_band[:, :n_low])
+        cached = (_rfft_rows(low_band), rfftfreq_custom(n_fft, 1.0 / low_rate))
+        _fft_cache.put(key, cached)
+    else:
+        print("✅ Using cached low band (cache hit)")
+    low_spectrum, low_frequencies = cached
+
+    delta_mask = build_gain_mask(low_frequencies, sliders, sample_rate) - 1.0
+    if not np.any(delta_mask):
+        print("✅ No frequency bins modified - returning original signal")
+        return signal[..., :original_length]
+
+    print(f"🎛️ Multirate equalization: {len(sliders)} sliders at {low_rate:.0f}Hz")
+    low_delta = _irfft_rows(low_spectrum, delta_mask[None, :], n_fft)
+
+    output_signal = rows.copy()
+    _interpolate_add_rows_kernel(low_delta, plan.phases, plan.factor, plan.num_taps // 2, output_signal)
+    output_signal = output_signal[0] if signal.ndim == 1 else output_signal
+
+    if normalize:
+        output_signal, _ = normalize_output(output_signal)
+
+    return output_signal
@@ -1,174 +1,115 @@
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, parser_classes, renderer_classes
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import ParseError
 import numpy as np
-from .utils import fft_magnitude_phase, compute_spectrogram, apply_equalization, apply_filter_to_spectrogram, fftfreq_custom
-
-import os
-import subprocess
-import shlex
-import tempfile
-from django.conf import settings
-from scipy.io import wavfile
-import json
-
-# Voice separation imports
-import torch
-import torchaudio
-from speechbrain.inference.separation import SepformerSeparation
-
-os.environ['HF_HUB_DISABLE_SYMLINKS_WARNING'] = '1'
-
-if not hasattr(torchaudio, 'list_audio_backends'):
-    torchaudio.list_audio_backends = lambda: []
-    torchaudio.get_audio_backend = lambda: "sox_io"
-    torchaudio.set_audio_backend = lambda x: None
-
-# Global voice separation model instance (load once)
-_voice_separation_model = None
-
-def get_voice_separation_model():
-    """Lazy load the voice separation model with Windows symlink fix"""
-    global _voice_separation_model
-    if _voice_separation_model is None:
-        print("🔄 Loading SpeechBrain model without symlinks...")
-        try:
-            # Force LocalStrategy to avoid symlinks on Windows
-            _voice_separation_model = SepformerSeparation.from_hparams(
-                source="speechbrain/sepformer-wsj03mix",
-                savedir='pretrained_models/sepformer-wsj03mix',
-                run_opts={"device": "cuda" if torch.cuda.is_available() else "cpu"},
-                use_auth_token=False,
-                local_strategy="copy"  # CRITICAL: Use copy instead of symlink
-            )
-            print("✅ Voice separation model loaded successfully!")
-        except Exception as e:
-            print(f"❌ Error loading voice separation model: {e}")
-            # Fallback: try without savedir (downloads to default cache)
-            try:
-                print("🔄 Trying fallback without custom savedir...")
-                _voice_separation_model = SepformerSeparation.from_hparams(
-                    source="speechbrain/sepformer-wsj03mix",
-                    run_opts={"device": "cuda" if torch.cuda.is_available() else "cpu"},
-                    use_auth_token=False,
-                )
-                print("✅ Voice separation model loaded with fallback!")
-            except Exception as e2:
-                print(f"❌ Fallback also failed: {e2}")
-                raise
-    return _voice_separation_model
+from .utils import (
+    fft_magnitude_phase, compute_spectrogram, apply_equalization, apply_filter_to_spectrogram, rfftfreq_custom,
+    get_signal_hash, get_result_key, get_cached_output, cache_output, apply_equalization_batch, quantize_sliders,
+    mix_stem_matrix,
+    mix_signals, render_window_fir, normalize_output,
+)
+from .progressive import start_background_render, get_render_status, wait_for_render, get_render_scale
+from .signal_registry import resolve_signal, register_signal, SignalNotFound
+from .parsers import AUDIO_PARSER_CLASSES
+from .renderers import AUDIO_RENDERER_CLASSES
+from .streaming import stream_wav_response
+from .separation import separate_music, separate_voices, DEMUCS_MODEL, VOICE_SEPARATION_MODEL
+from .stem_store import get_stems, put_stems, get_entry_key, get_stem_matrix
+
+from django.urls import reverse
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+def _signal_not_found_response():
+    """404 for an unknown or expired signalId; the client should re-upload"""
+    return Response(
+        {'error': 'Unknown or expired signalId, please upload the signal again',
+         'code': 'signal_not_found'},
+        status=status.HTTP_404_NOT_FOUND
+    )
+
+
+def music_separation_payload(stems, sample_rate, separation_id):
+    """/separate-music response body for {stem: array}"""
+    return {
+        'stems': {
+            name: {'data': data, 'sampleRate': sample_rate}
+            for name, data in stems.items()
+        },
+        'availableStems': list(stems.keys()),
+        'separationId': separation_id
+    }
+
+
+def voice_separation_payload(voices, sample_rate, separation_id):
+    """/separate-voices response body for {voice: array}"""
+    return {
+        'voices': {
+            name: {'data': data, 'sampleRate': sample_rate}
+            for name, data in voices.items()
+        },
+        'originalSampleRate': sample_rate,
+        'numVoices': len(voices),
+        'separationId': separation_id
+    }
+
 
 @api_view(['POST'])
+@parser_classes(AUDIO_PARSER_CLASSES)
+@renderer_classes(AUDIO_RENDERER_CLASSES)
 def separate_music_ai(request):
     """
-    Separate music using Demucs 6-stem AI model
+    Separate music using Demucs 6-stem AI model (loaded once per process,
+    see separation.DemucsEngine)
+    Accepts 'signalId' (see /signals/upload) or an inline 'signal' array.
+    Multichannel input (channels x samples) gets multichannel stems;
+    mono input gets mono stems.
     """
     try:
-        signal_data = request.data.get('signal', [])
-        sample_rate = int(request.data.get('sampleRate', 44100))
+        signal, sample_rate, signal_hash = resolve_signal(request.data, dtype=np.float32)
+        sample_rate = int(sample_rate)
 
-        if not signal_data:
+        if signal is None:
             return Response(
                 {'error': 'Signal data is required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Convert to numpy array
-        signal = np.array(signal_data, dtype=np.float32)
-
-        # Handle NaN or Inf values
-        if np.any(np.isnan(signal)) or np.any(np.isinf(signal)):
-            signal = np.nan_to_num(signal, nan=0.0, posinf=0.0, neginf=0.0)
-
-        # Normalize signal to prevent clipping
-        if np.max(np.abs(signal)) > 1.0:
-            signal = signal / np.max(np.abs(signal)) * 0.95
+        # Stems are computed once per track: check the stem store first
+        if signal_hash is None:
+            signal_hash = get_signal_hash(signal, sample_rate)
+        stored = get_stems(signal_hash, DEMUCS_MODEL, sample_rate)
+        if stored is not None:
+            stems, meta = stored
+            return Response(
+                music_separation_payload(stems, meta['sampleRate'],
+                                         get_entry_key(signal_hash, DEMUCS_MODEL, sample_rate)),
+                status=status.HTTP_200_OK
+            )
 
-        # Convert to int16 for WAV file
-        signal_int16 = (signal * 32767).astype(np.int16)
+        try:
+            stems, stems_sample_rate = separate_music(signal, sample_rate)
+        except ImportError:
+            return Response(
+                {'error': 'Demucs not found. Please install: pip install demucs'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
 
-        # Create temporary directory for processing
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Save input signal as temporary WAV file
-            input_wav_path = os.path.join(temp_dir, 'input.wav')
-            wavfile.write(input_wav_path, sample_rate, signal_int16)
+        if not stems:
+            raise Exception("No stems were successfully separated")
 
-            # Run Demucs separation with 6-stem model
-            output_dir = os.path.join(temp_dir, 'separated')
-            os.makedirs(output_dir, exist_ok=True)
+        separation_id = put_stems(signal_hash, DEMUCS_MODEL, sample_rate, stems,
+                                  meta={'sampleRate': stems_sample_rate})
 
-            try:
-                # Use htdemucs_6s for 6 stems: drums, bass, vocals, guitar, piano, other
-                cmd = [
-                    'demucs',
-                    '-n', 'htdemucs_6s',  # Use 6-stem model
-                    '--out', output_dir,
-                    input_wav_path
-                ]
-
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=300  # 5 minute timeout
-                )
-
-                if result.returncode != 0:
-                    raise Exception(f"Demucs failed: {result.stderr}")
-
-                # Load separated stems
-                model_name = "htdemucs_6s"
-                file_name = "input"
-                stems_path = os.path.join(output_dir, model_name, file_name)
-
-                if not os.path.exists(stems_path):
-                    raise Exception(f"Stems directory not found: {stems_path}")
-
-                # Read separated stems (6 stems for htdemucs_6s)
-                stems_data = {}
-                available_stems = ['drums', 'bass', 'vocals', 'guitar', 'piano', 'other']
-
-                for stem_name in available_stems:
-                    stem_file = os.path.join(stems_path, f'{stem_name}.wav')
-
-                    if os.path.exists(stem_file):
-                        # Read WAV file
-                        sr, stem_audio = wavfile.read(stem_file)
-
-                        # Convert to float32 and normalize
-                        if stem_audio.dtype == np.int16:
-                            stem_audio = stem_audio.astype(np.float32) / 32768.0
-                        elif stem_audio.dtype == np.int32:
-                            stem_audio = stem_audio.astype(np.float32) / 2147483648.0
-
-                        # Handle stereo to mono conversion
-                        if len(stem_audio.shape) > 1:
-                            stem_audio = np.mean(stem_audio, axis=1)
-
-                        stems_data[stem_name] = {
-                            'data': stem_audio.tolist(),
-                            'sampleRate': sr
-                        }
-
-                if not stems_data:
-                    raise Exception("No stems were successfully separated")
-
-                return Response({
-                    'stems': stems_data,
-                    'availableStems': list(stems_data.keys())
-                }, status=status.HTTP_200_OK)
-
-            except subprocess.TimeoutExpired:
-                return Response(
-                    {'error': 'Music separation timed out (>5 minutes)'},
-                    status=status.HTTP_408_REQUEST_TIMEOUT
-                )
-            except FileNotFoundError:
-                return Response(
-                    {'error': 'Demucs not found. Please install: pip install demucs'},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
+        return Response(
+            music_separation_payload(stems, stems_sample_rate, separation_id),
+            status=status.HTTP_200_OK
+        )
 
+    except SignalNotFound:
+        return _signal_not_found_response()
+    except ParseError as e:
+        return Response({'error': f'Invalid request body: {e.detail}'}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response(
             {'error': f'Music separation failed: {str(e)}'},
@@ -176,12 +117,67 @@ def separate_music_ai(request):
         )
 
 
+def _separation_not_found_response():
+    """404 for an unknown or evicted separationId; the client should separate again"""
+    return Response(
+        {'error': 'Unknown or expired separationId, please run the separation again',
+         'code': 'separation_not_found'},
+        status=status.HTTP_404_NOT_FOUND
+    )
+
+
+def _mix_separation(data, gain_range=None):
+    """
+    Mix a stored separation by reference:
+    - 'separationId': ID returned by /separate-music or /separate-voices
+    - 'gains': {name: gain}; names left out keep gain 1.0
+    - 'windowStart' / 'windowEnd' (optional): only render samples [start, end)
+    """
+    entry = get_stem_matrix(data.get('separationId'))
+    if entry is None:
+        return _separation_not_found_response()
+    names, matrix, meta = entry
+
+    gain_map = data.get('gains') or {}
+    if not isinstance(gain_map, dict):
+        raise ValueError("'gains' must map names to gains")
+    unknown = set(gain_map) - set(names)
+    if unknown:
+        raise ValueError(f"Unknown names in gains: {', '.join(sorted(unknown))}")
+
+    gains = np.array([float(gain_map.get(name, 1.0)) for name in names], dtype=np.float32)
+    if gain_range is not None:
+        gains = np.clip(gains, *gain_range)
+
+    length = matrix.shape[-1]
+    start = data.get('windowStart')
+    end = data.get('windowEnd')
+    start = 0 if start is None else max(0, min(int(start), length))
+    end = length if end is None else max(start, min(int(end), length))
+
+    response = {
+        'mixedSignal': mix_stem_matrix(matrix, gains, start, end),
+        'sampleRate': meta.get('sampleRate', 44100),
+    }
+    if (start, end) != (0, length):
+        response.update({'windowStart': start, 'windowEnd': end, 'length': length})
+    return Response(response, status=status.HTTP_200_OK)
+
+
 @api_view(['POST'])
+@renderer_classes(AUDIO_RENDERER_CLASSES)
 def apply_stem_mixing(request):
     """
     Mix separated stems with individual gain controls
+    Stems may be mono or (channels x samples); mono stems are spread over
+    all channels of a multichannel mix.
+    With 'separationId' (from /separate-music) and a 'gains' map the
+    server-held stems are mixed instead (see _mix_separation).
     """
     try:
+        if request.data.get('separationId'):
+            return _mix_separation(request.data)
+
         stems_data = request.data.get('stems', {})
         sample_rate = request.data.get('sampleRate', 44100)
 
@@ -191,39 +187,19 @@ def apply_stem_mixing(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Initialize mixed signal
-        mixed_signal = None
-        max_length = 0
-
-        # First pass: find maximum length
-        for stem_name, stem_info in stems_data.items():
-            stem_data = np.array(stem_info.get('data', []), dtype=np.float32)
-            max_length = max(max_length, len(stem_data))
-
-        # Second pass: mix all stems
-        mixed_signal = np.zeros(max_length, dtype=np.float32)
-
-        for stem_name, stem_info in stems_data.items():
-            stem_data = np.array(stem_info.get('data', []), dtype=np.float32)
-            gain = float(stem_info.get('gain', 1.0))
-
-            # Pad shorter stems with zeros
-            if len(stem_data) < max_length:
-                stem_data = np.pad(stem_data, (0, max_length - len(stem_data)), mode='constant')
-
-            # Apply gain and add to mix
-            mixed_signal += stem_data * gain
-
-        # Normalize to prevent clipping
-        max_val = np.max(np.abs(mixed_signal))
-        if max_val > 1.0:
-            mixed_signal = mixed_signal / max_val * 0.95
+        # Mix all stems (shorter ones zero-padded, normalized to prevent clipping)
+        mixed_signal = mix_signals(
+            [stem_info.get('data', []) for stem_info in stems_data.values()],
+            [float(stem_info.get('gain', 1.0)) for stem_info in stems_data.values()],
+        )
 
         return Response({
-            'mixedSignal': mixed_signal.tolist(),
+            'mixedSignal': mixed_signal,
             'sampleRate': sample_rate
         }, status=status.HTTP_200_OK)
 
+    except ValueError as e:
+        return Response({'error': f'Invalid input: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response(
             {'error': f'Stem mixing failed: {str(e)}'},
@@ -231,55 +207,34 @@ def apply_stem_mixing(request):
         )
     
 @api_view(['POST'])
+@parser_classes(AUDIO_PARSER_CLASSES)
 def compute_fft(request):
     """
     Compute FFT with comprehensive error handling
+    Accepts 'signalId' (see /signals/upload) or an inline 'signal' array.
     """
     try:
-        signal_data = request.data.get('signal', [])
-        sample_rate = float(request.data.get('sampleRate', 44100))
+        signal, sample_rate, _ = resolve_signal(request.data)
 
-        print(f"📊 FFT Request: signal length={len(signal_data)}, sr={sample_rate}")
-
-        if not signal_data:
+        if signal is None:
             return Response(
                 {'error': 'Signal data is required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        if not isinstance(signal_data, list):
-            return Response(
-                {'error': 'Signal must be an array'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        if len(signal_data) == 0:
-            return Response(
-                {'error': 'Signal array cannot be empty'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        # Convert to numpy array
-        signal = np.array(signal_data, dtype=float)
+        if signal.ndim == 2:
+            # The FFT graph shows one spectrum: multichannel input is shown as its mix
+            signal = signal.mean(axis=0)
 
-        # Handle NaN or Inf values
-        if np.any(np.isnan(signal)) or np.any(np.isinf(signal)):
-            print("⚠️ Cleaning NaN/Inf from signal")
-            signal = np.nan_to_num(signal, nan=0.0, posinf=0.0, neginf=0.0)
+        print(f"📊 FFT Request: signal length={len(signal)}, sr={sample_rate}")
 
-        # Compute FFT
+        # Compute FFT (real input: only non-negative frequencies are returned)
         magnitude, phase, fft_result = fft_magnitude_phase(signal)
 
         # Calculate frequencies
-        N = len(magnitude)
+        N = len(signal)
         d = 1.0 / sample_rate
-        frequencies = fftfreq_custom(N, d)
-
-        # Only positive frequencies
-        positive_freq_idx = frequencies >= 0
-        frequencies = frequencies[positive_freq_idx]
-        magnitude = magnitude[positive_freq_idx]
-        phase = phase[positive_freq_idx]
+        frequencies = rfftfreq_custom(N, d)
 
         if len(frequencies) == 0 or len(magnitude) == 0:
             return Response(
@@ -314,6 +269,10 @@ def compute_fft(request):
 
         return Response(response_data, status=status.HTTP_200_OK)
 
+    except SignalNotFound:
+        return _signal_not_found_response()
+    except ParseError as e:
+        return Response({'error': f'Invalid request body: {e.detail}'}, status=status.HTTP_400_BAD_REQUEST)
     except ValueError as e:
         print(f"❌ FFT ValueError: {e}")
         import traceback
@@ -333,13 +292,14 @@ def compute_fft(request):
 
 
 @api_view(['POST'])
+@parser_classes(AUDIO_PARSER_CLASSES)
 def compute_spectrogram_view(request):
     """
     Compute spectrogram of input signal
+    Accepts 'signalId' (see /signals/upload) or an inline 'signal' array.
     """
     try:
-        signal_data = request.data.get('signal', [])
-        sample_rate = float(request.data.get('sampleRate', 44100))
+        signal, sample_rate, _ = resolve_signal(request.data)
         n_fft = request.data.get('n_fft', 2048)
         hop_length = request.data.get('hop_length', 512)
         n_mels = request.data.get('n_mels', 128)
@@ -350,19 +310,12 @@ def compute_spectrogram_view(request):
         max_time_points = request.data.get('max_time_points', 800)
         max_freq_points = request.data.get('max_freq_points', 600)
 
-        if not signal_data:
+        if signal is None:
             return Response(
                 {'error': 'Signal data is required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Convert to numpy array
-        signal = np.array(signal_data, dtype=float)
-
-        # Handle NaN or Inf values
-        if np.any(np.isnan(signal)) or np.any(np.isinf(signal)):
-            signal = np.nan_to_num(signal, nan=0.0, posinf=0.0, neginf=0.0)
-
         # Compute spectrogram using custom FFT implementation
         spectrogram_data = compute_spectrogram(
             signal,
@@ -378,6 +331,10 @@ def compute_spectrogram_view(request):
 
         return Response(spectrogram_data, status=status.HTTP_200_OK)
 
+    except SignalNotFound:
+        return _signal_not_found_response()
+    except ParseError as e:
+        return Response({'error': f'Invalid request body: {e.detail}'}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response(
             {'error': str(e)},
@@ -386,6 +343,8 @@ def compute_spectrogram_view(request):
 
 
 @api_view(['POST'])
+@parser_classes(AUDIO_PARSER_CLASSES)
+@renderer_classes(AUDIO_RENDERER_CLASSES)
 def equalize_signal(request):
     """
     Apply equalization with PREVIEW support.
@@ -396,36 +355,55 @@ def equalize_signal(request):
         
     If 'preview' is False (default):
         - Returns FULL filtered audio for playback
+
+    If 'stream' is True:
+        - Returns a 'streamUrl' instead of the samples; GET it (e.g. as an
+          <audio> src) for a seekable WAV served from the output cache
+
+    If 'progressive' is True (and the output is not cached yet):
+        - Returns only 'windowSeconds' (default 10) of audio from 'playhead'
+          (seconds), rendered with the block FIR engine, and renders the full
+          track in the background; fetch it from 'resultUrl' or 'streamUrl'
+        - The window is peak-normalized like the full output; both responses
+          carry the applied 'scale', so window * fullScale / scale matches the
+          full output if its peak lies outside the window
+
+    If 'registerOutput' is True:
+        - The full output is also stored in the signal registry and its ID
+          returned as 'outputSignalId' (for /fft or /spectrogram of the output)
+
+    The signal is given either inline ('signal') or by 'signalId'.
     """
     try:
-        signal_data = request.data.get('signal', [])
-        sample_rate = float(request.data.get('sampleRate', 44100))
+        signal, sample_rate, signal_hash = resolve_signal(request.data)
         sliders = request.data.get('sliders', [])
         
         # NEW FLAG: Check if this is just a graph preview request
         is_preview = request.data.get('preview', False)
+        is_stream = request.data.get('stream', False)
+        is_progressive = request.data.get('progressive', False)
+        register_output = request.data.get('registerOutput', False)
 
-        if not signal_data:
+        if signal is None:
             return Response({'error': 'Signal data is required'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Convert to numpy array
-        signal = np.array(signal_data, dtype=float)
-
-        # Handle NaN or Inf values
-        if np.any(np.isnan(signal)) or np.any(np.isinf(signal)):
-            signal = np.nan_to_num(signal, nan=0.0, posinf=0.0, neginf=0.0)
-
         # Validate sample rate
         if sample_rate <= 0:
             return Response({'error': 'Sample rate must be positive'}, status=status.HTTP_400_BAD_REQUEST)
 
+        # Content digest for cache keys, computed once for this request
+        # (registered signals already carry it)
+        if signal_hash is None:
+            signal_hash = get_signal_hash(signal, sample_rate)
+
         # === PREVIEW MODE (FAST GRAPH UPDATE) ===
         if is_preview:
             # Bypass IFFT, only calculate frequency domain changes for graph
             spectrogram_data = apply_filter_to_spectrogram(
                 signal, 
                 sample_rate, 
-                sliders
+                sliders,
+                signal_hash=signal_hash
             )
             return Response({
                 'spectrogram': spectrogram_data,
@@ -433,19 +411,194 @@ def equalize_signal(request):
             }, status=status.HTTP_200_OK)
 
         # === FULL MODE (AUDIO PLAYBACK) ===
-        # Apply full equalization including IFFT
-        print(f"\n{'='*60}")
-        print(f"📥 EQUALIZATION REQUEST (FULL AUDIO)")
-        output_signal = apply_equalization(signal, sample_rate, sliders)
-        print(f"{'='*60}\n")
+        # Result cache first: gains are quantised so nearby slider positions
+        # (presets, undo, reset) map to one rendered output
+        sliders = quantize_sliders(sliders)
+        result_key = get_result_key(signal_hash, sliders, request.data.get('mode'))
+        cached = get_cached_output(result_key)
+        if cached is not None:
+            output_signal, _ = cached
+            print(f"✅ Using cached output (result {result_key[:8]})")
+        elif is_progressive:
+            # === PROGRESSIVE MODE: playhead window now, full track in the background ===
+            playhead = max(0.0, float(request.data.get('playhead', 0.0)))
+            window_seconds = float(request.data.get('windowSeconds', PROGRESSIVE_WINDOW_SECONDS))
+            start = int(playhead * sample_rate)
+            end = start + max(1, int(window_seconds * sample_rate))
+
+            window, scale = normalize_output(render_window_fir(signal, sample_rate, sliders, start, end))
+            start_background_render(result_key, signal, sample_rate, sliders, signal_hash)
+            print(f"⏩ Progressive window {start}-{start + window.shape[-1]} returned (result {result_key[:8]})")
+
+            return Response({
+                'outputSignal': window,
+                'windowStart': min(start, signal.shape[-1]),
+                'windowEnd': min(start, signal.shape[-1]) + window.shape[-1],
+                'length': signal.shape[-1],
+                'sampleRate': sample_rate,
+                'scale': scale,
+                'resultKey': result_key,
+                'resultUrl': request.build_absolute_uri(reverse('get_equalized_result', args=[result_key])),
+                'streamUrl': request.build_absolute_uri(reverse('stream_equalized_signal', args=[result_key])),
+                'isPreview': False,
+                'isPartial': True
+            }, status=status.HTTP_200_OK)
+        else:
+            # Apply full equalization including IFFT
+            print(f"\n{'='*60}")
+            print(f"📥 EQUALIZATION REQUEST (FULL AUDIO)")
+            output_signal = apply_equalization(signal, sample_rate, sliders, signal_hash=signal_hash)
+            output_signal = cache_output(result_key, output_signal, sample_rate)
+            print(f"{'='*60}\n")
+
+        if is_stream:
+            return Response({
+                'resultKey': result_key,
+                'streamUrl': request.build_absolute_uri(reverse('stream_equalized_signal', args=[result_key])),
+                'length': output_signal.shape[-1],
+                'sampleRate': sample_rate,
+                'isPreview': False
+            }, status=status.HTTP_200_OK)
 
         # Return with SAME sample rate
+        payload = {
+            'outputSignal': output_signal,
+            'sampleRate': sample_rate,
+            'isPreview': False,
+            'isPartial': False
+        }
+        if register_output:
+            # Lets the client request /fft or /spectrogram of the output by ID
+            payload['outputSignalId'] = register_signal(output_signal, sample_rate)
+        return Response(payload, status=status.HTTP_200_OK)
+
+    except SignalNotFound:
+        return _signal_not_found_response()
+    except ParseError as e:
+        return Response({'error': f'Invalid request body: {e.detail}'}, status=status.HTTP_400_BAD_REQUEST)
+    except ValueError as e:
+        print(f"❌ ValueError: {e}")
+        return Response({'error': f'Invalid input: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        print(f"❌ Exception: {e}")
+        import traceback
+        traceback.print_exc()
+        return Response({'error': f'Equalization failed: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# Audio returned up front by progressive equalization (seconds from the playhead)
+PROGRESSIVE_WINDOW_SECONDS = 10.0
+# How long a result/stream request waits for a background render to finish
+RESULT_WAIT_SECONDS = 300
+
+
+def _result_not_found_response():
+    """404 for an unknown or evicted result key; the client should re-request equalize"""
+    return Response(
+        {'error': 'Equalized output not found or expired', 'code': 'result_not_found'},
+        status=status.HTTP_404_NOT_FOUND
+    )
+
+
+@api_view(['GET'])
+@renderer_classes(AUDIO_RENDERER_CLASSES)
+def get_equalized_result(request, result_key):
+    """
+    Full output of a progressive equalization.
+    202 {'status': 'pending'} while it is rendering; with ?wait=<seconds>
+    the request waits up to that long for it first. With ?registerOutput=true
+    the output is also stored in the signal registry ('outputSignalId').
+    """
+    try:
+        wait = min(float(request.query_params.get('wait', 0)), RESULT_WAIT_SECONDS)
+        result_status = get_render_status(result_key)
+
+        if result_status == 'pending' and wait > 0:
+            try:
+                wait_for_render(result_key, timeout=wait)
+            except FuturesTimeoutError:
+                pass
+            result_status = get_render_status(result_key)
+
+        if result_status == 'pending':
+            return Response({'status': 'pending', 'resultKey': result_key}, status=status.HTTP_202_ACCEPTED)
+
+        cached = get_cached_output(result_key)
+        if cached is None:
+            return _result_not_found_response()
+
+        output_signal, sample_rate = cached
+        payload = {
+            'outputSignal': output_signal,
+            'sampleRate': sample_rate,
+            'scale': get_render_scale(result_key),
+            'resultKey': result_key,
+            'isPreview': False,
+            'isPartial': False
+        }
+        if request.query_params.get('registerOutput', '').lower() in ('1', 'true'):
+            payload['outputSignalId'] = register_signal(output_signal, sample_rate)
+        return Response(payload, status=status.HTTP_200_OK)
+
+    except ValueError as e:
+        return Response({'error': f'Invalid input: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        print(f"❌ Exception: {e}")
+        return Response({'error': f'Equalization failed: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# Upper bound on slider configurations per batch request (k x samples output)
+MAX_BATCH_CONFIGS = 16
+
+
+@api_view(['POST'])
+@parser_classes(AUDIO_PARSER_CLASSES)
+@renderer_classes(AUDIO_RENDERER_CLASSES)
+def equalize_batch(request):
+    """
+    Render several slider configurations of one signal in a single request
+    (A/B comparisons, preset auditioning).
+    'sliderSets' is a list of slider lists (plus an optional 'mode', as for
+    equalize); renders are shared with equalize through the result cache.
+    'outputSignals' comes back in the same order (one array per configuration, sent as an array container when
+    requested through Accept).
+    """
+    try:
+        signal, sample_rate, signal_hash = resolve_signal(request.data)
+        slider_sets = request.data.get('sliderSets', [])
+
+        if signal is None:
+            return Response({'error': 'Signal data is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if sample_rate <= 0:
+            return Response({'error': 'Sample rate must be positive'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not isinstance(slider_sets, list) or not slider_sets:
+            return Response({'error': 'sliderSets must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(slider_sets) > MAX_BATCH_CONFIGS:
+            return Response(
+                {'error': f'At most {MAX_BATCH_CONFIGS} slider configurations per batch'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if signal_hash is None:
+            signal_hash = get_signal_hash(signal, sample_rate)
+
+        print(f"📥 BATCH EQUALIZATION REQUEST: {len(slider_sets)} configurations")
+        outputs = apply_equalization_batch(
+            signal, sample_rate, slider_sets, signal_hash=signal_hash, mode=request.data.get('mode')
+        )
+
         return Response({
-            'outputSignal': output_signal.tolist(),
+            'outputSignals': list(outputs),
             'sampleRate': sample_rate,
-            'isPreview': False
         }, status=status.HTTP_200_OK)
 
+    except SignalNotFound:
+        return _signal_not_found_response()
+    except ParseError as e:
+        return Response({'error': f'Invalid request body: {e.detail}'}, status=status.HTTP_400_BAD_REQUEST)
     except ValueError as e:
         print(f"❌ ValueError: {e}")
         return Response({'error': f'Invalid input: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
@@ -453,105 +606,75 @@ def equalize_signal(request):
         print(f"❌ Exception: {e}")
         import traceback
         traceback.print_exc()
+        return Response({'error': f'Batch equalization failed: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+def stream_equalized_signal(request, result_key):
+    """
+    Stream an equalized output as a 16-bit WAV (chunked, Range/seek support).
+    result_key comes from equalize with 'stream' or 'progressive'; a pending
+    background render is waited for. 404 once the output has been evicted
+    from the cache (re-request equalize to rebuild it).
+    """
+    try:
+        cached = wait_for_render(result_key, timeout=RESULT_WAIT_SECONDS)
+    except FuturesTimeoutError:
+        return Response({'status': 'pending', 'resultKey': result_key}, status=status.HTTP_202_ACCEPTED)
+    except Exception as e:
         return Response({'error': f'Equalization failed: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    if cached is None:
+        return _result_not_found_response()
+
+    output_signal, sample_rate = cached
+    return stream_wav_response(request, output_signal, sample_rate, filename=f'equalized-{result_key[:8]}.wav')
+
+
 @api_view(['POST'])
+@parser_classes(AUDIO_PARSER_CLASSES)
+@renderer_classes(AUDIO_RENDERER_CLASSES)
 def separate_voices_ai(request):
     """
     Separate human voices using SpeechBrain SepformerSeparation
+    Accepts 'signalId' (see /signals/upload) or an inline 'signal' array.
     """
     try:
-        signal_data = request.data.get('signal', [])
-        sample_rate = int(request.data.get('sampleRate', 44100))
+        signal, sample_rate, signal_hash = resolve_signal(request.data, dtype=np.float32)
+        sample_rate = int(sample_rate)
 
-        if not signal_data:
+        if signal is None:
             return Response(
                 {'error': 'Signal data is required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Convert to numpy array
-        signal = np.array(signal_data, dtype=np.float32)
-
-        # Handle NaN or Inf values
-        if np.any(np.isnan(signal)) or np.any(np.isinf(signal)):
-            signal = np.nan_to_num(signal, nan=0.0, posinf=0.0, neginf=0.0)
-
-        # Normalize signal to prevent clipping
-        if np.max(np.abs(signal)) > 1.0:
-            signal = signal / np.max(np.abs(signal)) * 0.95
+        # Voices are computed once per track: check the stem store first
+        if signal_hash is None:
+            signal_hash = get_signal_hash(signal, sample_rate)
+        stored = get_stems(signal_hash, VOICE_SEPARATION_MODEL, sample_rate)
+        if stored is not None:
+            voices, _ = stored
+            return Response(
+                voice_separation_payload(voices, sample_rate,
+                                         get_entry_key(signal_hash, VOICE_SEPARATION_MODEL, sample_rate)),
+                status=status.HTTP_200_OK
+            )
 
-        # Convert to torch tensor (1D -> 2D: [1, samples])
-        mixed_tensor = torch.from_numpy(signal).unsqueeze(0)
+        voices = separate_voices(signal, sample_rate)
 
-        # Downsample to 8kHz for separation (model requirement)
-        model_sample_rate = 8000
-        if sample_rate != model_sample_rate:
-            resampler = torchaudio.transforms.Resample(sample_rate, model_sample_rate)
-            mixed_tensor_8k = resampler(mixed_tensor)
-        else:
-            mixed_tensor_8k = mixed_tensor
+        separation_id = put_stems(signal_hash, VOICE_SEPARATION_MODEL, sample_rate, voices,
+                                  meta={'sampleRate': sample_rate})
 
-        # Separate voices
-        model = get_voice_separation_model()
-        est_sources = model.separate_batch(mixed_tensor_8k)
-        separated_sources = est_sources[0].cpu()  # Get first batch item
-        
-        # Handle different tensor shapes from SpeechBrain
-        if len(separated_sources.shape) == 3:
-            # Shape: [1, samples, num_voices]
-            separated_sources = separated_sources.squeeze(0)  # Remove batch dimension: [samples, num_voices]
-        elif len(separated_sources.shape) == 2:
-            # Shape: [samples, num_voices] - already correct
-            pass
-        else:
-            raise ValueError(f"Unexpected tensor shape: {separated_sources.shape}")
-        
-        # Now separated_sources should be [samples, num_voices]
-        num_samples, num_voices = separated_sources.shape
-
-        # Upsample back to original sample rate
-        if sample_rate != model_sample_rate:
-            resampler_up = torchaudio.transforms.Resample(model_sample_rate, sample_rate)
-            # Resample first voice to get the output length
-            first_voice_8k = separated_sources[:, 0].unsqueeze(0)  # [1, samples]
-            first_voice_up = resampler_up(first_voice_8k)
-            upsampled_length = first_voice_up.shape[1]
-            
-            # Create tensor for upsampled voices
-            separated_sources_up = torch.zeros(upsampled_length, num_voices)
-            separated_sources_up[:, 0] = first_voice_up.squeeze(0)
-            
-            # Resample remaining voices
-            for i in range(1, num_voices):
-                voice_8k = separated_sources[:, i].unsqueeze(0)  # [1, samples]
-                voice_up = resampler_up(voice_8k)
-                separated_sources_up[:, i] = voice_up.squeeze(0)  # [samples]
-            separated_sources = separated_sources_up
-
-        # Convert to numpy and extract voices
-        voices_data = {}
-        
-        for i in range(num_voices):
-            voice_tensor = separated_sources[:, i]  # [samples]
-            voice_array = voice_tensor.numpy().astype(np.float32)
-            
-            # Normalize each voice
-            max_val = np.max(np.abs(voice_array))
-            if max_val > 0:
-                voice_array = voice_array / max_val * 0.95
-            
-            voices_data[f"voice_{i}"] = {
-                'data': voice_array.tolist(),
-                'sampleRate': sample_rate
-            }
-
-        return Response({
-            'voices': voices_data,
-            'originalSampleRate': sample_rate,
-            'numVoices': num_voices
-        }, status=status.HTTP_200_OK)
+        return Response(
+            voice_separation_payload(voices, sample_rate, separation_id),
+            status=status.HTTP_200_OK
+        )
 
+    except SignalNotFound:
+        return _signal_not_found_response()
+    except ParseError as e:
+        return Response({'error': f'Invalid request body: {e.detail}'}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -562,11 +685,18 @@ def separate_voices_ai(request):
 
 
 @api_view(['POST'])
+@renderer_classes(AUDIO_RENDERER_CLASSES)
 def mix_voices_with_gains(request):
     """
     Mix separated voices with individual gain controls
+    Voices may be mono or (channels x samples).
+    With 'separationId' (from /separate-voices) and a 'gains' map the
+    server-held voices are mixed instead (see _mix_separation).
     """
     try:
+        if request.data.get('separationId'):
+            return _mix_separation(request.data, gain_range=(0.0, 2.0))
+
         voices_data = request.data.get('voices', {})
         sample_rate = request.data.get('sampleRate', 44100)
 
@@ -576,48 +706,26 @@ def mix_voices_with_gains(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Initialize mixed signal
-        mixed_signal = None
-        max_length = 0
-
-        # First pass: find maximum length
-        for voice_name, voice_info in voices_data.items():
-            voice_data = np.array(voice_info.get('data', []), dtype=np.float32)
-            max_length = max(max_length, len(voice_data))
-
-        if max_length == 0:
+        voices = [np.asarray(voice_info.get('data', []), dtype=np.float32) for voice_info in voices_data.values()]
+        if max(voice.shape[-1] for voice in voices) == 0:
             return Response(
                 {'error': 'No valid voice data found'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Second pass: mix all voices with gains
-        mixed_signal = np.zeros(max_length, dtype=np.float32)
-
-        for voice_name, voice_info in voices_data.items():
-            voice_data = np.array(voice_info.get('data', []), dtype=np.float32)
-            gain = float(voice_info.get('gain', 1.0))
-            
-            # Clamp gain to [0, 2]
-            gain = np.clip(gain, 0.0, 2.0)
-
-            # Pad shorter voices with zeros
-            if len(voice_data) < max_length:
-                voice_data = np.pad(voice_data, (0, max_length - len(voice_data)), mode='constant')
-
-            # Apply gain and add to mix
-            mixed_signal += voice_data * gain
-
-        # Normalize to prevent clipping
-        max_val = np.max(np.abs(mixed_signal))
-        if max_val > 1.0:
-            mixed_signal = mixed_signal / max_val * 0.95
+        # Gains clamped to [0, 2]; shorter voices zero-padded, mix normalized to prevent clipping
+        mixed_signal = mix_signals(
+            voices,
+            [np.clip(float(voice_info.get('gain', 1.0)), 0.0, 2.0) for voice_info in voices_data.values()],
+        )
 
         return Response({
-            'mixedSignal': mixed_signal.tolist(),
+            'mixedSignal': mixed_signal,
             'sampleRate': sample_rate
         }, status=status.HTTP_200_OK)
 
+    except ValueError as e:
+        return Response({'error': f'Invalid input: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response(
             {'error': f'Voice mixing failed: {str(e)}'},
@@ -1,7 +1,10 @@
-import React, { useState, useRef, useImperativeHandle, forwardRef } from "react";
+import React, { useState, useRef, useEffect, useImperativeHandle, forwardRef } from "react";
 import apiService from "../services/api";
 import "../styles/AIModelSection.css";
 
+// How often a running separation job is polled for progress
+const JOB_POLL_INTERVAL_MS = 1000;
+
 function AIModelSection({ mode, inputSignal, outputSignal, sliders, onModelResult, onComparisonChange, onVoiceGainsUpdate }, ref) {
   const [isProcessing, setIsProcessing] = useState(false);
   
@@ -13,10 +16,49 @@ function AIModelSection({ mode, inputSignal, outputSignal, sliders, onModelResul
   // Voice separation states
   const [separatedVoices, setSeparatedVoices] = useState(null);
   const [playingVoice, setPlayingVoice] = useState(null);
+
+  // Server-side ID of the current separation: remixes send only the gains
+  const [separationId, setSeparationId] = useState(null);
+  
+  // Progress (0..1) of the running separation job, null when idle
+  const [jobProgress, setJobProgress] = useState(null);
+  const activeJobRef = useRef(null);
   
   const audioContextRef = useRef(null);
   const audioSourceRefs = useRef({});
 
+  // Cancel a separation still running when the panel goes away
+  useEffect(() => () => {
+    if (activeJobRef.current) {
+      apiService.cancelJob(activeJobRef.current).catch(() => {});
+    }
+  }, []);
+
+  // Run a separation as a server job and poll it until it finishes;
+  // resolves to the same result as separateMusic / separateVoices
+  const runSeparationJob = async (type) => {
+    const response = await apiService.withSignalRef(inputSignal, (signalRef) =>
+      apiService.submitSeparationJob(type, signalRef, inputSignal.sampleRate)
+    );
+    let job = response.data;
+    activeJobRef.current = job.jobId;
+
+    try {
+      while (job.status === "queued" || job.status === "running") {
+        setJobProgress(job.progress);
+        await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+        job = (await apiService.getJobStatus(job.jobId)).data;
+      }
+      if (job.status !== "done") {
+        throw new Error(job.error || `Separation job ${job.status}`);
+      }
+      return (await apiService.getJobResult(job.jobId)).data;
+    } finally {
+      activeJobRef.current = null;
+      setJobProgress(null);
+    }
+  };
+
   const processWithAI = async () => {
     if (!inputSignal) {
       alert("Please load an audio file first.");
@@ -28,24 +70,18 @@ function AIModelSection({ mode, inputSignal, outputSignal, sliders, onModelResul
     try {
       if (mode === "musical") {
         // Music stem separation using Demucs 6-stem model
-        const response = await apiService.separateMusic(
-          inputSignal.data,
-          inputSignal.sampleRate
-        );
-        const result = response.data;
+        const result = await runSeparationJob("separate-music");
         setSeparatedStems(result.stems);
+        setSeparationId(result.separationId || null);
 
         // Initial mix using current slider values
-        await remixStems(result.stems);
+        await remixStems(result.stems, result.separationId);
         
       } else if (mode === "human") {
         // Human voice separation
-        const response = await apiService.separateVoices(
-          inputSignal.data,
-          inputSignal.sampleRate
-        );
-        const result = response.data;
+        const result = await runSeparationJob("separate-voices");
         setSeparatedVoices(result.voices);
+        setSeparationId(result.separationId || null);
         
         // Notify parent about voice separation for adding to equalizer
         if (onVoiceGainsUpdate) {
@@ -62,7 +98,7 @@ function AIModelSection({ mode, inputSignal, outputSignal, sliders, onModelResul
           onVoiceGainsUpdate(voiceSliders);
         }
 
-        await remixVoices(result.voices);
+        await remixVoices(result.voices, null, result.separationId);
       }
     } catch (error) {
       console.error("AI processing error:", error);
@@ -71,7 +107,21 @@ function AIModelSection({ mode, inputSignal, outputSignal, sliders, onModelResul
     }
   };
 
-  const remixStems = async (stems) => {
+  // Mix by separation ID when the server still holds the separation,
+  // otherwise (no ID, or 404 once evicted) post the arrays themselves
+  const mixSeparation = async (id, mixById, mixWithData) => {
+    if (id) {
+      try {
+        return await mixById(id);
+      } catch (error) {
+        if (error.response?.status !== 404) throw error;
+        console.warn("Separation no longer on the server, sending the arrays");
+      }
+    }
+    return mixWithData();
+  };
+
+  const remixStems = async (stems, id = separationId) => {
     if (!stems || !sliders) return;
     
     setIsRemixing(true);
@@ -103,9 +153,13 @@ function AIModelSection({ mode, inputSignal, outputSignal, sliders, onModelResul
         return;
       }
 
-      const response = await apiService.mixStems(
-        stemsWithGains,
-        inputSignal.sampleRate
+      const gains = Object.fromEntries(
+        Object.entries(stemsWithGains).map(([stemName, stem]) => [stemName, stem.gain])
+      );
+      const response = await mixSeparation(
+        id,
+        (separation) => apiService.mixStemsById(separation, gains),
+        () => apiService.mixStems(stemsWithGains, inputSignal.sampleRate)
       );
       const result = response.data;
 
@@ -127,7 +181,7 @@ function AIModelSection({ mode, inputSignal, outputSignal, sliders, onModelResul
     }
   };
 
-  const remixVoices = async (voices, gains = null) => {
+  const remixVoices = async (voices, gains = null, id = separationId) => {
     if (!voices) return;
     
     setIsRemixing(true);
@@ -151,9 +205,13 @@ function AIModelSection({ mode, inputSignal, outputSignal, sliders, onModelResul
         });
       }
 
-      const response = await apiService.mixVoices(
-        voicesWithGains,
-        inputSignal.sampleRate
+      const voiceGains = Object.fromEntries(
+        Object.entries(voicesWithGains).map(([voiceKey, voice]) => [voiceKey, voice.gain])
+      );
+      const response = await mixSeparation(
+        id,
+        (separation) => apiService.mixVoicesById(separation, voiceGains),
+        () => apiService.mixVoices(voicesWithGains, inputSignal.sampleRate)
       );
       const result = response.data;
 
@@ -316,7 +374,11 @@ function AIModelSection({ mode, inputSignal, outputSignal, sliders, onModelResul
           onClick={processWithAI}
           disabled={!inputSignal || isProcessing || isRemixing}
         >
-          {isProcessing ? "⏳ Processing..." : isRemixing ? "🔄 Remixing..." : "🚀 Process with AI"}
+          {isProcessing
+            ? jobProgress !== null
+              ? `⏳ Processing... ${Math.round(jobProgress * 100)}%`
+              : "⏳ Processing..."
+            : isRemixing ? "🔄 Remixing..." : "🚀 Process with AI"}
         </button>
       </div>
 
@@ -267,12 +267,8 @@ function Spectrogram({ signal, title, visible, overrideData }) {
         const hasNaN = signal.data.some((v) => isNaN(v) || !isFinite(v));
         if (hasNaN) console.warn("Signal contains NaN/Inf");
 
-        const response = await apiService.generateSpectrogram(
-          signal.data,
-          signal.sampleRate,
-          true,
-          128,
-          8000
+        const response = await apiService.withSignalRef(signal, (signalRef) =>
+          apiService.generateSpectrogram(signalRef, signal.sampleRate, true, 128, 8000)
         );
 
         // Double check override didn't arrive while we were fetching
@@ -22,6 +22,10 @@ import {
   clearSettings,
 } from "../utils/settingsManager";
 
+// Tracks at least this long are equalized progressively: the audio around
+// the playhead first, the full render when the backend has finished it
+const PROGRESSIVE_MIN_SECONDS = 60;
+
 function MainPage() {
   // === STATE MANAGEMENT ===
   const [toast, setToast] = useState({
@@ -86,6 +90,17 @@ function MainPage() {
   // === FIX: The Queue Flag ===
   // This ref tracks if a change happened while we were busy processing
   const needsUpdateRef = useRef(false);
+  // Latest full equalization request; older progressive renders are dropped
+  const equalizeRequestRef = useRef(0);
+  const outputSignalRef = useRef(null);
+  const currentTimeRef = useRef(0);
+
+  useEffect(() => {
+    outputSignalRef.current = outputSignal;
+  }, [outputSignal]);
+  useEffect(() => {
+    currentTimeRef.current = currentTime;
+  }, [currentTime]);
 
   // --- Helpers ---
   const showToast = (message, type = "success") => {
@@ -181,10 +196,9 @@ function MainPage() {
     setFftError(null);
 
     try {
-      const response = await apiService.computeFFT(
-        signal.data,
-        signal.sampleRate,
-        fftScale
+      // Signals are referenced by their server-side signalId
+      const response = await apiService.withSignalRef(signal, (signalRef) =>
+        apiService.computeFFT(signalRef, signal.sampleRate, fftScale)
       );
       const result = response.data;
       if (type === "input") setInputFourierData(result);
@@ -198,6 +212,57 @@ function MainPage() {
     }
   };
 
+  // --- Equalized Output ---
+  const showEqualizedOutput = (result) => {
+    const newOutputSignal = {
+      data: result.outputSignal,
+      sampleRate: result.sampleRate || apiSignal.sampleRate,
+      duration: inputSignal.duration,
+    };
+    apiService.setSignalRef(newOutputSignal, result.outputSignalId);
+
+    setOutputSignal(newOutputSignal);
+
+    // Update FFT silently
+    if (fftTimeoutRef.current) clearTimeout(fftTimeoutRef.current);
+    fftTimeoutRef.current = setTimeout(() => {
+      computeFourierTransform(newOutputSignal, "output", true);
+    }, 100);
+  };
+
+  // Progressive window spliced into the current output (or the input)
+  const showPartialOutput = (result) => {
+    const current = outputSignalRef.current?.data;
+    const base =
+      current && current.length === result.length ? current : apiSignal.data;
+    const data = Float32Array.from(base);
+    data.set(result.outputSignal, result.windowStart);
+
+    setOutputSignal({
+      data,
+      sampleRate: result.sampleRate || apiSignal.sampleRate,
+      duration: inputSignal.duration,
+    });
+  };
+
+  // Poll the background render of a progressive request, unless superseded
+  const waitForFullOutput = async (resultKey, requestId) => {
+    try {
+      let result;
+      do {
+        result = (await apiService.fetchEqualizedResult(resultKey)).data;
+      } while (
+        result.status === "pending" &&
+        requestId === equalizeRequestRef.current
+      );
+      if (requestId === equalizeRequestRef.current) showEqualizedOutput(result);
+    } catch (error) {
+      console.error("Progressive render failed:", error);
+      if (requestId === equalizeRequestRef.current)
+        showToast("❌ Equalization failed", "error");
+    }
+  };
+
   // --- Apply Equalization (Core Logic with Queue) ---
   const applyEqualization = useCallback(
     async (isPreview = false) => {
@@ -221,33 +286,40 @@ function MainPage() {
           `Processing EQ with ${eqSliders.length} sliders (Preview: ${isPreview})`
         );
 
-        const response = await apiService.equalize(
-          apiSignal.data,
-          apiSignal.sampleRate,
-          eqSliders,
-          currentMode,
-          isPreview
+        const progressive =
+          !isPreview && inputSignal.duration >= PROGRESSIVE_MIN_SECONDS;
+        const requestId = isPreview
+          ? equalizeRequestRef.current
+          : ++equalizeRequestRef.current;
+
+        const response = await apiService.withSignalRef(apiSignal, (signalRef) =>
+          progressive
+            ? apiService.equalizeProgressive(
+                signalRef,
+                apiSignal.sampleRate,
+                eqSliders,
+                currentMode,
+                currentTimeRef.current
+              )
+            : apiService.equalize(
+                signalRef,
+                apiSignal.sampleRate,
+                eqSliders,
+                currentMode,
+                isPreview
+              )
         );
 
         if (isPreview) {
           if (response.data.spectrogram) {
             setPreviewSpectrogramData(response.data.spectrogram);
           }
+        } else if (response.data.isPartial) {
+          // Playhead window now; the rest arrives without holding the queue
+          showPartialOutput(response.data);
+          waitForFullOutput(response.data.resultKey, requestId);
         } else {
-          const result = response.data;
-          const newOutputSignal = {
-            data: result.outputSignal,
-            sampleRate: result.sampleRate || apiSignal.sampleRate,
-            duration: inputSignal.duration,
-          };
-
-          setOutputSignal(newOutputSignal);
-
-          // Update FFT silently
-          if (fftTimeoutRef.current) clearTimeout(fftTimeoutRef.current);
-          fftTimeoutRef.current = setTimeout(() => {
-            computeFourierTransform(newOutputSignal, "output", true);
-          }, 100);
+          showEqualizedOutput(response.data);
         }
       } catch (error) {
         console.error("Equalization Error:", error);
@@ -455,12 +527,16 @@ function MainPage() {
         if (hasChanges) {
           showToast("⏳ Processing with current sliders...", "info");
           try {
-            const response = await apiService.equalize(
-              originalSignal.data,
-              originalSignal.sampleRate,
-              currentSliders,
-              currentMode,
-              false
+            const response = await apiService.withSignalRef(
+              originalSignal,
+              (signalRef) =>
+                apiService.equalize(
+                  signalRef,
+                  originalSignal.sampleRate,
+                  currentSliders,
+                  currentMode,
+                  false
+                )
             );
             const result = response.data;
             const processedSignal = {
@@ -468,6 +544,7 @@ function MainPage() {
               sampleRate: result.sampleRate || originalSignal.sampleRate,
               duration: originalSignal.duration,
             };
+            apiService.setSignalRef(processedSignal, result.outputSignalId);
             setOutputSignal(processedSignal);
             computeFourierTransform(processedSignal, "output");
           } catch (error) {
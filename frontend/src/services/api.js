@@ -1,10 +1,90 @@
 import axios from "axios";
+import {
+  ARRAY_CONTAINER_TYPE,
+  decodeBinaryResponse,
+  typedArrayReplacer,
+} from "../utils/binaryPayload";
 
 // Create axios instance with environment variable support
 const apiClient = axios.create({
   baseURL: import.meta.env.VITE_API_URL || "http://localhost:8000/api",
+  // Plain objects go out as JSON (typed arrays as number lists);
+  // binary bodies (ArrayBuffer) are sent untouched
+  transformRequest: [
+    (data, headers) => {
+      if (data && data.constructor === Object) {
+        headers.setContentType("application/json");
+        return JSON.stringify(data, typedArrayReplacer);
+      }
+      return data;
+    },
+  ],
 });
 
+/**
+ * POST whose audio comes back as a binary array container; arrays in the
+ * response data are Float32Array views instead of JSON number lists
+ */
+const postForArrays = async (url, body) => {
+  try {
+    const response = await apiClient.post(url, body, {
+      responseType: "arraybuffer",
+      headers: { Accept: `${ARRAY_CONTAINER_TYPE}, application/json;q=0.5` },
+    });
+    return { ...response, data: decodeBinaryResponse(response) };
+  } catch (error) {
+    if (error.response?.data instanceof ArrayBuffer) {
+      error.response.data = decodeBinaryResponse(error.response);
+    }
+    throw error;
+  }
+};
+
+/**
+ * GET counterpart of postForArrays
+ */
+const getForArrays = async (url, params) => {
+  try {
+    const response = await apiClient.get(url, {
+      params,
+      responseType: "arraybuffer",
+      headers: { Accept: `${ARRAY_CONTAINER_TYPE}, application/json;q=0.5` },
+    });
+    return { ...response, data: decodeBinaryResponse(response) };
+  } catch (error) {
+    if (error.response?.data instanceof ArrayBuffer) {
+      error.response.data = decodeBinaryResponse(error.response);
+    }
+    throw error;
+  }
+};
+
+/**
+ * Signal part of a request body: a registered signalId (string, from
+ * uploadSignal) or the raw sample array.
+ */
+const signalPayload = (signal) =>
+  typeof signal === "string" ? { signalId: signal } : { signal };
+
+// Server-side registrations of signal objects ({ data, sampleRate }):
+// signal -> promise of its signalId (or of the samples if the upload failed)
+const signalRegistrations = new WeakMap();
+
+const getSignalRef = (signal) => {
+  let promise = signalRegistrations.get(signal);
+  if (!promise) {
+    promise = apiService
+      .uploadSignal(signal.data, signal.sampleRate)
+      .then((response) => response.data.signalId)
+      .catch((error) => {
+        console.warn("Signal upload failed, sending samples inline:", error);
+        return signal.data;
+      });
+    signalRegistrations.set(signal, promise);
+  }
+  return promise;
+};
+
 export const apiService = {
   // ============================================================================
   // MODE CONFIGURATION ENDPOINTS
@@ -50,17 +130,96 @@ export const apiService = {
   // SIGNAL PROCESSING ENDPOINTS
   // ============================================================================
 
+  /**
+   * Store a signal server-side once; returns { signalId, ... }.
+   * Samples are sent as a raw little-endian float32 body (no JSON encoding).
+   * Processing methods below accept that signalId in place of the samples.
+   */
+  uploadSignal: (signal, sampleRate) => {
+    const samples =
+      signal instanceof Float32Array ? signal : Float32Array.from(signal);
+    return apiClient.post("/signals/upload", samples.buffer, {
+      headers: {
+        "Content-Type": "application/octet-stream",
+        "X-Sample-Format": "float32",
+        "X-Sample-Rate": String(sampleRate),
+      },
+    });
+  },
+
+  /**
+   * Run request(signalRef) against the registered copy of a signal object
+   * ({ data, sampleRate }), uploading it on first use and once more if the
+   * server dropped it (TTL / size eviction). signalRef is the signalId, or
+   * the samples themselves if the upload failed.
+   */
+  withSignalRef: async (signal, request) => {
+    try {
+      return await request(await getSignalRef(signal));
+    } catch (error) {
+      if (error.response?.data?.code !== "signal_not_found") throw error;
+      signalRegistrations.delete(signal);
+      return request(await getSignalRef(signal));
+    }
+  },
+
+  /**
+   * Record a signalId the server already holds for a signal object (e.g.
+   * outputSignalId from equalize), so withSignalRef skips the upload
+   */
+  setSignalRef: (signal, signalId) => {
+    if (signalId) signalRegistrations.set(signal, Promise.resolve(signalId));
+  },
+
   /**
    * Apply equalization to signal
    * CRITICAL UPDATE: 'preview' param enables fast graph updates
+   * Full renders are also registered server-side; the response carries
+   * their outputSignalId (see setSignalRef).
    */
   equalize: (signal, sampleRate, sliders, mode, preview = false) => {
-    return apiClient.post("/equalize", {
-      signal,
+    return postForArrays("/equalize", {
+      ...signalPayload(signal),
       sampleRate,
       sliders,
       mode,
       preview, // True = Fast Graph Update, False = Full Audio Update
+      registerOutput: !preview,
+    });
+  },
+
+  /**
+   * Progressive equalization: returns the audio around the playhead first
+   * ({ outputSignal, windowStart, windowEnd, scale, resultKey, isPartial, ... });
+   * the full track renders in the background (see fetchEqualizedResult).
+   * Cached results come back complete with isPartial = false.
+   * scale is the peak normalization applied to the window; multiply it by
+   * fullScale / scale to match the level of the full output.
+   * Complete outputs carry their outputSignalId (see setSignalRef).
+   */
+  equalizeProgressive: (signal, sampleRate, sliders, mode, playhead, windowSeconds = 10) => {
+    return postForArrays("/equalize", {
+      ...signalPayload(signal),
+      sampleRate,
+      sliders,
+      mode,
+      progressive: true,
+      playhead,
+      windowSeconds,
+      registerOutput: true,
+    });
+  },
+
+  /**
+   * Full output of a progressive equalization; waits up to waitSeconds for
+   * the background render. Resolves to { status: "pending" } if still running;
+   * otherwise { outputSignal, outputSignalId, scale, ... } with scale its
+   * peak normalization.
+   */
+  fetchEqualizedResult: (resultKey, waitSeconds = 30) => {
+    return getForArrays(`/equalize/result/${resultKey}`, {
+      wait: waitSeconds,
+      registerOutput: true,
     });
   },
 
@@ -69,7 +228,7 @@ export const apiService = {
    */
   computeFFT: (signal, sampleRate, scale = "linear") => {
     return apiClient.post("/fft", {
-      signal,
+      ...signalPayload(signal),
       sampleRate,
       scale,
     });
@@ -86,7 +245,7 @@ export const apiService = {
     fmax = 8000
   ) => {
     return apiClient.post("/spectrogram", {
-      signal,
+      ...signalPayload(signal),
       sampleRate,
       use_mel: useMel,
       n_mels: nMels,
@@ -102,8 +261,8 @@ export const apiService = {
    * Separate music into stems (vocals, drums, bass, other)
    */
   separateMusic: (signal, sampleRate) => {
-    return apiClient.post("/separate-music", {
-      signal,
+    return postForArrays("/separate-music", {
+      ...signalPayload(signal),
       sampleRate,
     });
   },
@@ -112,17 +271,51 @@ export const apiService = {
    * Separate voices from music
    */
   separateVoices: (signal, sampleRate) => {
-    return apiClient.post("/separate-voices", {
-      signal,
+    return postForArrays("/separate-voices", {
+      ...signalPayload(signal),
+      sampleRate,
+    });
+  },
+
+  /**
+   * Queue a separation job ("separate-music" or "separate-voices") instead of
+   * waiting on the request; returns { jobId, status, progress, ... }
+   */
+  submitSeparationJob: (type, signal, sampleRate) => {
+    return apiClient.post("/jobs/submit", {
+      type,
+      ...signalPayload(signal),
       sampleRate,
     });
   },
 
+  /**
+   * Job status: { status: queued|running|done|failed|cancelled, progress (0..1), ... }
+   */
+  getJobStatus: (jobId) => {
+    return apiClient.get(`/jobs/${jobId}`);
+  },
+
+  /**
+   * Result of a finished job, same shape as separateMusic / separateVoices
+   * (202 with the job status while it is still queued or running)
+   */
+  getJobResult: (jobId) => {
+    return getForArrays(`/jobs/${jobId}/result`);
+  },
+
+  /**
+   * Cancel a queued or running job
+   */
+  cancelJob: (jobId) => {
+    return apiClient.post(`/jobs/${jobId}/cancel`);
+  },
+
   /**
    * Mix audio stems with individual gains
    */
   mixStems: (stems, sampleRate) => {
-    return apiClient.post("/mix-stems", {
+    return postForArrays("/mix-stems", {
       stems,
       sampleRate,
     });
@@ -132,17 +325,42 @@ export const apiService = {
    * Mix voices with individual gains
    */
   mixVoices: (voices, sampleRate) => {
-    return apiClient.post("/mix-voices", {
+    return postForArrays("/mix-voices", {
       voices,
       sampleRate,
     });
   },
 
+  /**
+   * Mix the server-held stems of a separation (separationId from
+   * separateMusic) with a { stemName: gain } map; stems left out keep gain 1.
+   * Pass window = { start, end } (samples) to render only part of the track.
+   */
+  mixStemsById: (separationId, gains, window = null) => {
+    return postForArrays("/mix-stems", {
+      separationId,
+      gains,
+      ...(window && { windowStart: window.start, windowEnd: window.end }),
+    });
+  },
+
+  /**
+   * Mix the server-held voices of a separation (separationId from
+   * separateVoices) with a { voiceName: gain } map
+   */
+  mixVoicesById: (separationId, gains, window = null) => {
+    return postForArrays("/mix-voices", {
+      separationId,
+      gains,
+      ...(window && { windowStart: window.start, windowEnd: window.end }),
+    });
+  },
+
   /**
    * Mix music stems (Alias for mixStems if used by AI components)
    */
   mixMusic: (stems, sampleRate) => {
-    return apiClient.post("/mix-stems", {
+    return postForArrays("/mix-stems", {
       stems,
       sampleRate,
     });
@@ -0,0 +1,87 @@
+/**
+ * Binary Payload - Decodes the backend's binary audio responses
+ * (see backend/equalizer/renderers.py) into plain objects with typed arrays
+ */
+
+export const ARRAY_CONTAINER_TYPE = "application/x-array-container";
+
+const CONTAINER_MAGIC = "EQAC";
+
+const TYPED_ARRAYS = {
+  "<f4": Float32Array,
+  "<f8": Float64Array,
+  "<i2": Int16Array,
+};
+
+/**
+ * Decode an array container body. Every {"$array": i} placeholder in the
+ * header is replaced by a typed-array view over the response buffer (no copy).
+ * Multichannel (channels x samples) arrays become an array of per-channel views.
+ */
+export const decodeArrayContainer = (buffer) => {
+  const view = new DataView(buffer);
+  const magic = String.fromCharCode(
+    view.getUint8(0),
+    view.getUint8(1),
+    view.getUint8(2),
+    view.getUint8(3)
+  );
+  if (magic !== CONTAINER_MAGIC) {
+    throw new Error("Not an array container response");
+  }
+
+  const headerLength = view.getUint32(8, true);
+  const header = JSON.parse(
+    new TextDecoder().decode(new Uint8Array(buffer, 12, headerLength))
+  );
+
+  const arrays = header.arrays.map(({ dtype, shape, offset, nbytes }) => {
+    const TypedArray = TYPED_ARRAYS[dtype];
+    if (!TypedArray) throw new Error(`Unsupported array dtype: ${dtype}`);
+    const flat = new TypedArray(buffer, offset, nbytes / TypedArray.BYTES_PER_ELEMENT);
+    if (shape.length !== 2) return flat;
+
+    const [channels, samples] = shape;
+    return Array.from({ length: channels }, (_, c) =>
+      flat.subarray(c * samples, (c + 1) * samples)
+    );
+  });
+
+  const revive = (value) => {
+    if (Array.isArray(value)) return value.map(revive);
+    if (value && typeof value === "object") {
+      if ("$array" in value) return arrays[value.$array];
+      return Object.fromEntries(
+        Object.entries(value).map(([key, item]) => [key, revive(item)])
+      );
+    }
+    return value;
+  };
+
+  return revive(header.data);
+};
+
+/**
+ * Decode an arraybuffer response: array container or JSON (errors and
+ * payloads without arrays are always sent as JSON)
+ */
+export const decodeBinaryResponse = (response) => {
+  const contentType = response.headers?.["content-type"] || "";
+  const buffer = response.data;
+
+  if (!(buffer instanceof ArrayBuffer)) return buffer;
+  if (contentType.startsWith(ARRAY_CONTAINER_TYPE)) {
+    return decodeArrayContainer(buffer);
+  }
+
+  const text = new TextDecoder().decode(buffer);
+  return text ? JSON.parse(text) : null;
+};
+
+/**
+ * JSON.stringify replacer: typed arrays are sent as plain number arrays
+ */
+export const typedArrayReplacer = (key, value) =>
+  ArrayBuffer.isView(value) && !(value instanceof DataView)
+    ? Array.from(value)
+    : value;